@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Elsevier MCP Server シリアライズ・ベンチマーク
+=====================
+
+JSON-RPCレスポンスの組み立てとシリアライズにかかる時間を、
+代表的なペイロード（initialize、tools/list、検索25件、抄録200件、ページング2000件）で計測します。
+
+- legacy:  以前の方式（tools/list を毎回組み立て、本文を indent=2 で json.dumps した後に外枠を再度 json.dumps）
+- stdlib:  現在の方式（標準の json）
+- orjson:  現在の方式（orjson がインストールされている場合）
+
+使い方:
+    python benchmarks/bench_serialization.py
+    python benchmarks/bench_serialization.py --iterations 200
+"""
+
+import argparse
+import copy
+import json
+import os
+import sys
+import time
+
+os.environ.setdefault("ELSEVIER_API_KEY", "benchmark-key")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import elsevier_mcp_complete as server_module  # noqa: E402
+from mock_elsevier_api import load_fixture  # noqa: E402
+
+
+def make_payloads(server) -> dict:
+    """ツール結果の代表例"""
+    entries = load_fixture("scopus_search.json")["search-results"]["entry"]
+    abstract = load_fixture("abstract_retrieval.json")
+
+    def papers(count):
+        result = []
+        for position in range(count):
+            entry = copy.deepcopy(entries[position % len(entries)])
+            entry["eid"] = f"2-s2.0-{85000000000 + position}"
+            result.append(server._paper_from_entry(entry))
+        return result
+
+    batch = []
+    for position in range(200):
+        paper = server._paper_from_abstract(abstract)
+        paper.eid = f"2-s2.0-{85000000000 + position}"
+        batch.append({"success": True, "cached": False, "paper": paper, "id": paper.eid})
+
+    pages = papers(2000)
+    return {
+        "search_papers (25)": {"success": True, "total_results": 184233, "papers": papers(25), "query": "q"},
+        "abstracts_batch (200)": {"success": True, "requested": 200, "unique": 200, "results": batch},
+        "paginated (2000)": {"success": True, "total_results": 184233, "returned": 2000, "query": "q",
+                             "pages": [pages[start:start + 25] for start in range(0, 2000, 25)]},
+    }
+
+
+def legacy_tools_list(server, request_id) -> bytes:
+    tools_list = [{"name": tool["name"], "description": tool["description"], "inputSchema": tool["inputSchema"]}
+                  for tool in server.tools.values()]
+    return json.dumps({"jsonrpc": "2.0", "id": request_id, "result": {"tools": tools_list}}).encode("utf-8")
+
+
+def legacy_initialize(request_id) -> bytes:
+    return json.dumps({"jsonrpc": "2.0", "id": request_id, "result": {
+        "protocolVersion": "2024-11-05", "capabilities": {"tools": {}, "resources": {}},
+        "serverInfo": {"name": "elsevier-mcp-complete-server", "version": "1.0.0"}}}).encode("utf-8")
+
+
+def legacy_tool_call(result, request_id) -> bytes:
+    content = []
+    if "pages" in result:
+        summary = {key: value for key, value in result.items() if key != "pages"}
+        content.append({"type": "text", "text": json.dumps(summary, ensure_ascii=False, indent=2)})
+        for number, page in enumerate(result["pages"], 1):
+            content.append({"type": "text", "text": json.dumps(
+                {"page": number, "papers": page}, ensure_ascii=False, default=server_module.json_default)})
+    else:
+        content.append({"type": "text", "text": json.dumps(
+            result, ensure_ascii=False, indent=2, default=server_module.json_default)})
+    return json.dumps({"jsonrpc": "2.0", "id": request_id, "result": {"content": content}}).encode("utf-8")
+
+
+def current_tool_call(result, request_id) -> bytes:
+    content = server_module.build_tool_content(result)
+    return server_module.encode_message({"jsonrpc": "2.0", "id": request_id, "result": {"content": content}})
+
+
+def time_per_call(function, iterations: int, rounds: int = 5) -> tuple:
+    """(1回あたりのマイクロ秒, 出力バイト数)。他の処理による揺れを避けるため rounds 回の最小値"""
+    output = function(0)
+    best = None
+    for _ in range(rounds):
+        started = time.perf_counter()
+        for request_id in range(iterations):
+            function(request_id)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best / iterations * 1e6, len(output)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure JSON-RPC response serialization overhead")
+    parser.add_argument("--iterations", type=int, default=100, help="iterations per payload and encoder")
+    args = parser.parse_args()
+
+    server = server_module.ElsevierMCPServer()
+    payloads = make_payloads(server)
+    has_orjson = bool(server_module._fast_json())
+
+    cases = {
+        "initialize": (
+            lambda i: legacy_initialize(i),
+            lambda i: server_module.encode_message(
+                {"jsonrpc": "2.0", "id": i, "result": server_module.INITIALIZE_RESULT}),
+        ),
+        "tools/list": (
+            lambda i: legacy_tools_list(server, i),
+            lambda i: server_module.encode_message({"jsonrpc": "2.0", "id": i, "result": server.tools_list}),
+        ),
+    }
+    for name, result in payloads.items():
+        cases[name] = (
+            lambda i, result=result: legacy_tool_call(result, i),
+            lambda i, result=result: current_tool_call(result, i),
+        )
+
+    header = f"{'payload':<24}{'legacy us':>12}{'stdlib us':>12}{'orjson us':>12}{'bytes':>10}"
+    print(header)
+    print("-" * len(header))
+    for name, (legacy, current) in cases.items():
+        legacy_us, _ = time_per_call(legacy, args.iterations)
+        server_module._orjson = False
+        stdlib_us, size = time_per_call(current, args.iterations)
+        server_module._orjson = None
+        if has_orjson:
+            orjson_us, size = time_per_call(current, args.iterations)
+            orjson_text = f"{orjson_us:>12.1f}"
+        else:
+            orjson_text = f"{'n/a':>12}"
+        print(f"{name:<24}{legacy_us:>12.1f}{stdlib_us:>12.1f}{orjson_text}{size:>10}")
+    server.http.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""
+Elsevier MCP Server ベンチマーク
+=====================
+
+モックElsevier API（mock_elsevier_api.py）を起動し、stdioサーバーへ
+JSON-RPC tools/call を指定した並列度で送信して、ツールごとに以下を計測します：
+- レイテンシ p50 / p95 / p99
+- スループット（requests/sec）
+- サーバープロセスのピークRSS
+
+ライブAPIやAPIキーは不要です。
+
+使い方:
+    python benchmarks/bench_server.py
+    python benchmarks/bench_server.py --tools search_papers,get_paper_abstract \\
+        --concurrency 1,8,32 --requests 200 --latency-ms 150 --error-rate 0.01
+    python benchmarks/bench_server.py --tools get_paper_abstract --slow-rate 0.03 --slow-ms 3000
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+
+from mock_elsevier_api import start_mock_server
+
+SERVER_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                           "elsevier_mcp_complete.py")
+
+# ツールごとの引数生成（iでクエリを変え、キャッシュと同時呼び出しの集約を避ける）
+TOOL_ARGUMENTS = {
+    "search_papers": lambda i: {"query": f"machine learning {i}", "count": 10},
+    "get_paper_abstract": lambda i: {"eid": f"2-s2.0-{85000000000 + i}"},
+    "get_author_info": lambda i: {"author_id": str(57215842016 + i)},
+    "get_authors_batch": lambda i: {"ids": [str(57215842016 + i * 50 + j) for j in range(50)]},
+    "analyze_research_trends": lambda i: {"field": f"quantum computing {i}",
+                                          "years": [2020, 2021, 2022, 2023, 2024]},
+    "get_institution_papers": lambda i: {"institution": f"Institute {i}", "year": 2024},
+    "search_open_access_papers": lambda i: {"field": f"climate change {i}", "count": 10},
+}
+
+# ベンチマーク中はクライアント側レート制限を実質無効にする
+UNLIMITED_RATES = "scopus_search=100000,abstract_retrieval=100000,author_retrieval=100000,scival=100000"
+
+
+class StdioServerProcess:
+    """stdioサーバーを子プロセスとして起動し、idでレスポンスを突き合わせる"""
+
+    def __init__(self, env: dict):
+        self.env = env
+        self.process = None
+        self._pending = {}
+        self._next_id = 0
+        self._reader = None
+
+    async def start(self):
+        self.process = await asyncio.create_subprocess_exec(
+            sys.executable, SERVER_PATH,
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.DEVNULL,
+            env=self.env,
+            limit=64 * 1024 * 1024,
+        )
+        self._reader = asyncio.ensure_future(self._read_responses())
+        await self.call("initialize", {"protocolVersion": "2024-11-05", "capabilities": {},
+                                       "clientInfo": {"name": "bench", "version": "1.0"}})
+
+    async def _read_responses(self):
+        while True:
+            line = await self.process.stdout.readline()
+            if not line:
+                break
+            message = json.loads(line)
+            future = self._pending.pop(message.get("id"), None)
+            if future is not None and not future.done():
+                future.set_result(message)
+        for future in self._pending.values():
+            if not future.done():
+                future.set_exception(RuntimeError("server exited"))
+
+    async def call(self, method: str, params: dict):
+        """(レイテンシ秒, レスポンス) を返す"""
+        self._next_id += 1
+        request_id = self._next_id
+        future = asyncio.get_running_loop().create_future()
+        self._pending[request_id] = future
+        message = {"jsonrpc": "2.0", "id": request_id, "method": method, "params": params}
+        started = time.perf_counter()
+        self.process.stdin.write((json.dumps(message) + "\n").encode("utf-8"))
+        await self.process.stdin.drain()
+        response = await future
+        return time.perf_counter() - started, response
+
+    def peak_rss_mb(self):
+        """ピークRSS（Linuxの/procから取得、取得できなければNone）"""
+        try:
+            with open(f"/proc/{self.process.pid}/status", "r") as f:
+                for line in f:
+                    if line.startswith("VmHWM:"):
+                        return int(line.split()[1]) / 1024
+        except OSError:
+            pass
+        return None
+
+    async def close(self):
+        self.process.stdin.close()
+        await self.process.wait()
+        await self._reader
+
+
+def is_error(response: dict) -> bool:
+    if "error" in response:
+        return True
+    for item in response.get("result", {}).get("content", [])[:1]:
+        try:
+            return json.loads(item["text"]).get("success") is False
+        except (KeyError, ValueError):
+            return False
+    return False
+
+
+def percentile(sorted_values: list, fraction: float) -> float:
+    """最近傍順位法によるパーセンタイル"""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[index]
+
+
+async def run_level(env: dict, tool: str, concurrency: int, total_requests: int, identical: bool) -> dict:
+    """1ツール・1並列度の計測（毎回新しいサーバープロセスで実行）"""
+    server = StdioServerProcess(env)
+    await server.start()
+    semaphore = asyncio.Semaphore(concurrency)
+    make_arguments = TOOL_ARGUMENTS[tool]
+
+    async def one(i):
+        async with semaphore:
+            arguments = make_arguments(0 if identical else i)
+            return await server.call("tools/call", {"name": tool, "arguments": arguments})
+
+    started = time.perf_counter()
+    outcomes = await asyncio.gather(*[one(i) for i in range(total_requests)])
+    wall = time.perf_counter() - started
+
+    peak_rss = server.peak_rss_mb()
+    await server.close()
+
+    latencies = sorted(latency for latency, _ in outcomes)
+    return {
+        "tool": tool,
+        "concurrency": concurrency,
+        "requests": total_requests,
+        "errors": sum(1 for _, response in outcomes if is_error(response)),
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 1),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 1),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 1),
+        "requests_per_sec": round(total_requests / wall, 1),
+        "peak_rss_mb": round(peak_rss, 1) if peak_rss is not None else None,
+    }
+
+
+def print_report(rows: list):
+    header = f"{'tool':<28}{'conc':>6}{'reqs':>6}{'err':>5}{'p50ms':>9}{'p95ms':>9}{'p99ms':>9}{'req/s':>9}{'RSS MB':>9}"
+    print(header)
+    print("-" * len(header))
+    for row in rows:
+        rss = f"{row['peak_rss_mb']:.1f}" if row["peak_rss_mb"] is not None else "n/a"
+        print(f"{row['tool']:<28}{row['concurrency']:>6}{row['requests']:>6}{row['errors']:>5}"
+              f"{row['p50_ms']:>9.1f}{row['p95_ms']:>9.1f}{row['p99_ms']:>9.1f}"
+              f"{row['requests_per_sec']:>9.1f}{rss:>9}")
+
+
+async def run(args):
+    mock, _ = start_mock_server(latency_ms=args.latency_ms, jitter_ms=args.jitter_ms,
+                                error_rate=args.error_rate, slow_rate=args.slow_rate, slow_ms=args.slow_ms)
+    cache_dir = tempfile.mkdtemp(prefix="elsevier-mcp-bench-")
+    env = dict(os.environ)
+    env.update({
+        "ELSEVIER_API_KEY": "benchmark-key",
+        "ELSEVIER_API_BASE_URL": f"http://127.0.0.1:{mock.server_port}",
+        "ELSEVIER_MCP_CACHE": "1" if args.cache else "0",
+        "ELSEVIER_MCP_CACHE_DIR": cache_dir,
+        "ELSEVIER_MCP_RATE_LIMITS": UNLIMITED_RATES,
+    })
+
+    tools = args.tools.split(",") if args.tools else list(TOOL_ARGUMENTS)
+    levels = [int(level) for level in args.concurrency.split(",")]
+    rows = []
+    for tool in tools:
+        for concurrency in levels:
+            rows.append(await run_level(env, tool, concurrency, args.requests, args.identical))
+
+    mock.shutdown()
+    print_report(rows)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(rows, f, indent=2)
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the Elsevier MCP server against a local mock API")
+    parser.add_argument("--tools", default="", help="comma separated tool names (default: all)")
+    parser.add_argument("--concurrency", default="1,8,32", help="comma separated concurrency levels")
+    parser.add_argument("--requests", type=int, default=100, help="requests per tool and level")
+    parser.add_argument("--latency-ms", type=float, default=100.0, help="mock upstream latency")
+    parser.add_argument("--jitter-ms", type=float, default=20.0, help="mock upstream latency jitter")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of upstream 429/5xx responses")
+    parser.add_argument("--slow-rate", type=float, default=0.0, help="share of upstream responses delayed by --slow-ms")
+    parser.add_argument("--slow-ms", type=float, default=3000.0, help="extra delay of slow upstream responses")
+    parser.add_argument("--identical", action="store_true", help="send identical arguments (measures coalescing)")
+    parser.add_argument("--cache", action="store_true", help="enable the response cache")
+    parser.add_argument("--json", default="", help="write results to this JSON file")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
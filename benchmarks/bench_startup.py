@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Elsevier MCP Server 起動時間ベンチマーク
+=====================
+
+stdioサーバーを繰り返し起動し、以下を計測します：
+- プロセス起動から最初の initialize レスポンスまでの時間
+- 続く tools/list の応答時間
+- 起動直後のRSS
+
+上流APIへは接続しないため、APIキーやモックサーバーは不要です。
+
+使い方:
+    python benchmarks/bench_startup.py
+    python benchmarks/bench_startup.py --runs 20 --json startup.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import time
+
+from bench_server import StdioServerProcess, percentile
+
+
+async def measure_once(env: dict) -> dict:
+    """1回分の起動計測（ミリ秒）"""
+    server = StdioServerProcess(env)
+    started = time.perf_counter()
+    await server.start()
+    initialized = time.perf_counter()
+    tools_list_latency, response = await server.call("tools/list", {})
+    rss = server.peak_rss_mb()
+    await server.close()
+    return {
+        "initialize_ms": (initialized - started) * 1000,
+        "tools_list_ms": tools_list_latency * 1000,
+        "tools": len(response.get("result", {}).get("tools", [])),
+        "rss_mb": rss,
+    }
+
+
+async def run(args):
+    env = dict(os.environ)
+    env.update({
+        "ELSEVIER_API_KEY": "benchmark-key",
+        # 起動だけを測るため、到達しない接続先とは通信しない
+        "ELSEVIER_API_BASE_URL": "http://127.0.0.1:9",
+        "ELSEVIER_MCP_CACHE_DIR": tempfile.mkdtemp(prefix="elsevier-mcp-startup-"),
+    })
+
+    # 初回はOSのファイルキャッシュを温めるため計測に含めない
+    await measure_once(env)
+    samples = [await measure_once(env) for _ in range(args.runs)]
+
+    report = {"runs": args.runs, "tools": samples[0]["tools"]}
+    for metric in ("initialize_ms", "tools_list_ms"):
+        values = sorted(sample[metric] for sample in samples)
+        report[metric] = {
+            "p50": round(percentile(values, 0.50), 1),
+            "p95": round(percentile(values, 0.95), 1),
+            "max": round(values[-1], 1),
+        }
+    rss = [sample["rss_mb"] for sample in samples if sample["rss_mb"] is not None]
+    report["rss_mb"] = round(sum(rss) / len(rss), 1) if rss else None
+
+    print(f"runs: {report['runs']}  tools: {report['tools']}  RSS: {report['rss_mb']} MB")
+    for metric in ("initialize_ms", "tools_list_ms"):
+        values = report[metric]
+        print(f"{metric:<16} p50 {values['p50']:>7.1f}  p95 {values['p95']:>7.1f}  max {values['max']:>7.1f}")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure cold start of the Elsevier MCP stdio server")
+    parser.add_argument("--runs", type=int, default=10, help="number of measured server starts")
+    parser.add_argument("--json", default="", help="write results to this JSON file")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
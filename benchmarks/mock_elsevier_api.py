@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+"""
+Elsevier API モックサーバー（ベンチマーク用）
+=====================
+
+fixtures/ の記録済みJSONを返すローカルHTTPサーバーです。
+Scopus Search / Abstract Retrieval / SciVal のエンドポイントを模倣し、
+応答遅延とエラー率、一部の応答だけを大きく遅らせる裾の遅延を設定できます。
+
+使い方:
+    python benchmarks/mock_elsevier_api.py --port 8089 --latency-ms 150 --error-rate 0.02
+    python benchmarks/mock_elsevier_api.py --slow-rate 0.03 --slow-ms 3000
+
+サーバー側は ELSEVIER_API_BASE_URL=http://127.0.0.1:8089 で接続先を切り替えます。
+"""
+
+import argparse
+import copy
+import json
+import os
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+
+def load_fixture(name: str) -> dict:
+    """記録済みレスポンスを読み込む"""
+    with open(os.path.join(FIXTURES_DIR, name), "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+class MockElsevierAPI:
+    """エンドポイントごとの応答生成と遅延・エラー注入"""
+
+    def __init__(self, latency_ms: float = 100.0, jitter_ms: float = 20.0, error_rate: float = 0.0,
+                 slow_rate: float = 0.0, slow_ms: float = 3000.0):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.slow_rate = slow_rate
+        self.slow_ms = slow_ms
+        self.fixtures = {
+            "search": load_fixture("scopus_search.json"),
+            "abstract": load_fixture("abstract_retrieval.json"),
+            "scival_author": load_fixture("scival_author.json"),
+            "author": load_fixture("author_retrieval.json"),
+            "scival_metrics": load_fixture("scival_metrics.json"),
+        }
+        self.routes = [
+            ("/content/search/scopus", self.search),
+            ("/content/abstract/", self.abstract),
+            ("/content/author", self.author),
+            ("/analytics/scival/author/metrics", self.scival_metrics),
+            ("/analytics/scival/author/", self.scival_author),
+        ]
+        self.request_count = 0
+        self._lock = threading.Lock()
+
+    def handle(self, path: str, params: dict):
+        """(status, headers, body) を返す"""
+        with self._lock:
+            self.request_count += 1
+
+        delay = max(0.0, random.gauss(self.latency_ms, self.jitter_ms)) / 1000
+        if self.slow_rate and random.random() < self.slow_rate:
+            delay += self.slow_ms / 1000
+        time.sleep(delay)
+
+        if self.error_rate and random.random() < self.error_rate:
+            status = random.choice([429, 500, 503])
+            headers = {"Retry-After": "0"} if status == 429 else {}
+            return status, headers, {"service-error": {"status": {"statusCode": str(status)}}}
+
+        for prefix, route in self.routes:
+            if path.startswith(prefix):
+                return 200, self.quota_headers(), route(path, params)
+        return 404, {}, {"service-error": {"status": {"statusCode": "RESOURCE_NOT_FOUND"}}}
+
+    @staticmethod
+    def quota_headers() -> dict:
+        return {
+            "X-RateLimit-Limit": "20000",
+            "X-RateLimit-Remaining": "19999",
+            "X-RateLimit-Reset": str(int(time.time()) + 7 * 24 * 3600),
+        }
+
+    @staticmethod
+    def project(record: dict, params: dict) -> dict:
+        """field パラメータ指定時は指定項目のみを残す（Scopusの挙動を模倣）"""
+        if not params.get("field"):
+            return record
+        names = set(params["field"].split(","))
+        return {key: value for key, value in record.items() if key in names}
+
+    def search(self, path: str, params: dict) -> dict:
+        """記録済みエントリを要求件数まで繰り返し、ページ位置に応じたEIDを振る"""
+        body = copy.deepcopy(self.fixtures["search"])
+        results = body["search-results"]
+        count = int(params.get("count", 25))
+        cursor = params.get("cursor")
+        offset = int(params.get("start", 0))
+        if cursor and cursor != "*":
+            offset = int(cursor)
+
+        total = int(results["opensearch:totalResults"])
+        template = results["entry"]
+        entries = []
+        for position in range(offset, min(offset + count, total)):
+            entry = copy.deepcopy(template[position % len(template)])
+            entry["eid"] = f"2-s2.0-{85000000000 + position}"
+            entry["citedby-count"] = str(max(0, 5000 - position))
+            entries.append(self.project(entry, params))
+
+        results["entry"] = entries
+        results["opensearch:startIndex"] = str(offset)
+        results["opensearch:itemsPerPage"] = str(len(entries))
+        if cursor:
+            results["cursor"] = {"@current": cursor, "@next": str(offset + len(entries))}
+        return body
+
+    def abstract(self, path: str, params: dict) -> dict:
+        identifier = path.rstrip("/").split("/")[-1]
+        if params.get("view") == "REF":
+            return self.references(identifier, params)
+        body = copy.deepcopy(self.fixtures["abstract"])
+        coredata = body["abstracts-retrieval-response"]["coredata"]
+        if "/eid/" in path:
+            coredata["eid"] = identifier
+        elif "/doi/" in path:
+            coredata["prism:doi"] = identifier
+        body["abstracts-retrieval-response"]["coredata"] = self.project(coredata, params)
+        return body
+
+    @staticmethod
+    def references(identifier: str, params: dict) -> dict:
+        """view=REF: EIDから決まる30件の参考文献（論文間で一部が重なる）を startref/refcount で返す"""
+        seed = sum(ord(char) for char in identifier)
+        total = 30
+        start = int(params.get("startref", 0))
+        count = int(params.get("refcount", 40))
+        references = []
+        for position in range(start, min(start + count, total)):
+            scopus_id = str(84000000000 + (seed * 7 + position * position) % 400)
+            references.append({
+                "@id": str(position + 1),
+                "scopus-id": scopus_id,
+                "scopus-eid": f"2-s2.0-{scopus_id}",
+                "title": f"Referenced work {scopus_id}",
+                "sourcetitle": "Journal of Mock Results",
+                "prism:coverDate": f"{2000 + position % 24}-01-01",
+                "citedby-count": str(position * 3),
+                "author-list": {"author": [{"@seq": "1", "ce:indexed-name": "Doe J."}]},
+            })
+        return {"abstracts-retrieval-response": {"references": {
+            "@total-references": str(total), "reference": references}}}
+
+    def scival_author(self, path: str, params: dict) -> dict:
+        body = copy.deepcopy(self.fixtures["scival_author"])
+        author_id = path.rstrip("/").split("/")[-1]
+        if author_id.isdigit():
+            body["author"]["id"] = int(author_id)
+        return body
+
+    def author(self, path: str, params: dict) -> dict:
+        """/author_id/{id}、/orcid/{orcid}、?author_id=a,b（複数ID）に応答"""
+        template = self.fixtures["author"]["author-retrieval-response"][0]
+        identifier = path.rstrip("/").split("/")[-1]
+        if "/orcid/" in path:
+            # ORCIDの数字部分から著者IDを決める
+            author_ids = [str(57000000000 + int(identifier.replace("-", "").rstrip("X")) % 1000000000)]
+        elif "/author_id/" in path:
+            author_ids = [identifier]
+        else:
+            author_ids = params.get("author_id", "").split(",")
+
+        entries = []
+        for author_id in filter(None, author_ids):
+            entry = copy.deepcopy(template)
+            entry["coredata"]["dc:identifier"] = f"AUTHOR_ID:{author_id}"
+            if "/orcid/" in path:
+                entry["coredata"]["orcid"] = identifier
+            entries.append(entry)
+        if "/author_id/" in path or "/orcid/" in path:
+            return {"author-retrieval-response": entries}
+        return {"author-retrieval-response-list": {"author-retrieval-response": entries}}
+
+    def scival_metrics(self, path: str, params: dict) -> dict:
+        body = copy.deepcopy(self.fixtures["scival_metrics"])
+        template = body["results"][0]
+        metric_types = set(filter(None, params.get("metricTypes", "").split(",")))
+        results = []
+        for author_id in filter(None, params.get("authors", "").split(",")):
+            result = copy.deepcopy(template)
+            result["author"]["id"] = int(author_id)
+            if metric_types:
+                result["metrics"] = [metric for metric in result["metrics"] if metric["metricType"] in metric_types]
+            results.append(result)
+        body["results"] = results
+        return body
+
+
+def make_handler(api: MockElsevierAPI):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):
+            pass
+
+        def do_GET(self):
+            parsed = urlparse(self.path)
+            params = {key: values[0] for key, values in parse_qs(parsed.query).items()}
+            status, headers, body = api.handle(parsed.path, params)
+            payload = json.dumps(body, ensure_ascii=False).encode("utf-8")
+            try:
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json;charset=UTF-8")
+                self.send_header("Content-Length", str(len(payload)))
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(payload)
+            except (BrokenPipeError, ConnectionResetError):
+                # タイムアウトやヘッジで取り消されたリクエスト
+                pass
+
+    return Handler
+
+
+def start_mock_server(host: str = "127.0.0.1", port: int = 0, **options):
+    """バックグラウンドスレッドでモックサーバーを起動し (server, api) を返す"""
+    api = MockElsevierAPI(**options)
+    server = ThreadingHTTPServer((host, port), make_handler(api))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, api
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Elsevier API mock server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--latency-ms", type=float, default=100.0)
+    parser.add_argument("--jitter-ms", type=float, default=20.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--slow-rate", type=float, default=0.0)
+    parser.add_argument("--slow-ms", type=float, default=3000.0)
+    args = parser.parse_args()
+
+    server, api = start_mock_server(args.host, args.port, latency_ms=args.latency_ms,
+                                    jitter_ms=args.jitter_ms, error_rate=args.error_rate,
+                                    slow_rate=args.slow_rate, slow_ms=args.slow_ms)
+    print(f"Mock Elsevier API listening on http://{args.host}:{server.server_port}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -4,12 +4,23 @@ Elsevier MCP Complete Server
 Cursorで使用するすべてのMCPツール機能を実装
 """
 
+import argparse
 import asyncio
+import contextvars
+import heapq
 import json
 import sys
-import requests
 import os
+import random
+import re
+import signal
+import socket
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from urllib.parse import urlencode, urlparse
 
 # Elsevier API設定
 API_KEY = os.getenv("ELSEVIER_API_KEY")
@@ -18,12 +29,2018 @@ if not API_KEY:
     print("Please set your API key: export ELSEVIER_API_KEY='your_api_key_here'", file=sys.stderr)
     sys.exit(1)
 
-BASE_URL = "https://api.elsevier.com"
+BASE_URL = os.getenv("ELSEVIER_API_BASE_URL", "https://api.elsevier.com").rstrip("/")
 HEADERS = {"X-ELS-APIKey": API_KEY, "Accept": "application/json"}
 
-class ElsevierMCPServer:
+# HTTP接続プール設定
+HTTP_POOL_SIZE = int(os.getenv("ELSEVIER_MCP_HTTP_POOL_SIZE", "16"))
+
+# 同時に処理するJSON-RPCリクエスト数の上限
+MAX_CONCURRENT_REQUESTS = int(os.getenv("ELSEVIER_MCP_MAX_CONCURRENCY", "16"))
+# 同一引数の同時呼び出しでも結果を共有しないツール（ジョブの作成・操作は呼び出しごとに実行する）
+UNCOALESCED_TOOLS = ("start_export", "job_status", "job_result")
+
+# analyze_research_trends / compare_institutions の件数クエリ同時実行数
+TREND_QUERY_CONCURRENCY = int(os.getenv("ELSEVIER_MCP_TREND_CONCURRENCY", "8"))
+# compare_institutions の機関×年の最大セル数
+COMPARE_MAX_CELLS = int(os.getenv("ELSEVIER_MCP_COMPARE_MAX_CELLS", "500"))
+
+# HTTPトランスポート設定（--transport http 使用時）
+HTTP_HOST = os.getenv("ELSEVIER_MCP_HTTP_HOST", "127.0.0.1")
+HTTP_PORT = int(os.getenv("ELSEVIER_MCP_HTTP_PORT", "8765"))
+HTTP_MAX_BODY_BYTES = 4 * 1024 * 1024
+HTTP_ALLOWED_ORIGINS = [origin for origin in os.getenv("ELSEVIER_MCP_HTTP_ALLOWED_ORIGINS", "").split(",") if origin]
+# keep-alive接続で次のリクエストを待つ時間、およびヘッダー・ボディの読み込みの上限（秒）
+HTTP_IDLE_TIMEOUT = float(os.getenv("ELSEVIER_MCP_HTTP_IDLE_TIMEOUT", "60"))
+
+# マルチプロセスワーカー数（HTTPトランスポート時）と、プロセス間での状態共有
+HTTP_WORKERS = int(os.getenv("ELSEVIER_MCP_WORKERS", "1"))
+SHARED_STATE = os.getenv("ELSEVIER_MCP_SHARED_STATE", "0") == "1"
+
+# search_papers のページングモードで取得できる最大件数
+SEARCH_MAX_RESULTS = int(os.getenv("ELSEVIER_MCP_SEARCH_MAX_RESULTS", "5000"))
+SEARCH_PAGE_SIZE = 25
+# 複数クエリを被引用数順にマージする際の上位件数の上限
+MERGE_TOP_MAX = int(os.getenv("ELSEVIER_MCP_MERGE_TOP_MAX", "200"))
+
+# 実行中のツール呼び出しの進捗通知先（リクエストごとのタスクで独立）
+_progress_reporter = contextvars.ContextVar("progress_reporter", default=None)
+# 実行中のツール呼び出しのキー（同時呼び出しをまとめた実行から、待っている全員へ進捗を送るため）
+_tool_call_key = contextvars.ContextVar("tool_call_key", default=None)
+
+# get_paper_abstracts_batch の上限と同時取得数
+ABSTRACT_BATCH_MAX_IDS = 200
+ABSTRACT_BATCH_CONCURRENCY = int(os.getenv("ELSEVIER_MCP_BATCH_CONCURRENCY", "8"))
+
+# get_authors_batch の上限と、1リクエストにまとめる著者ID数（Author Retrieval / SciVal Metrics のAPI上限）
+AUTHOR_BATCH_MAX_IDS = 200
+AUTHOR_RETRIEVAL_CHUNK = 25
+SCIVAL_METRICS_CHUNK = 100
+SCIVAL_DEFAULT_METRICS = ("ScholarlyOutput", "CitationCount", "FieldWeightedCitationImpact", "HIndices")
+ORCID_PATTERN = re.compile(r"^\d{4}-\d{4}-\d{4}-\d{3}[\dX]$")
+
+# APIファミリー別のレート制限（1秒あたりのリクエスト数, バースト）
+API_RATE_LIMITS = {
+    "scopus_search": (9.0, 9),
+    "abstract_retrieval": (9.0, 9),
+    "author_retrieval": (3.0, 3),
+    "scival": (3.0, 3),
+}
+
+# 上書き例: ELSEVIER_MCP_RATE_LIMITS="scopus_search=20,scival=5"
+for _item in filter(None, os.getenv("ELSEVIER_MCP_RATE_LIMITS", "").split(",")):
+    _family, _, _rate = _item.partition("=")
+    if _family.strip() in API_RATE_LIMITS and _rate:
+        API_RATE_LIMITS[_family.strip()] = (float(_rate), max(1, int(float(_rate))))
+
+# 429/5xx 時の再試行設定
+MAX_RETRIES = int(os.getenv("ELSEVIER_MCP_MAX_RETRIES", "3"))
+RETRY_BASE_DELAY = float(os.getenv("ELSEVIER_MCP_RETRY_BASE_DELAY", "0.5"))
+RETRY_MAX_DELAY = 30.0
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+
+# エンドポイント別の応答時間から決める適応タイムアウト（ELSEVIER_MCP_ADAPTIVE_TIMEOUTS=0 で固定値）
+ADAPTIVE_TIMEOUTS = os.getenv("ELSEVIER_MCP_ADAPTIVE_TIMEOUTS", "1") != "0"
+ADAPTIVE_TIMEOUT_FACTOR = 3.0
+ADAPTIVE_TIMEOUT_MIN = float(os.getenv("ELSEVIER_MCP_TIMEOUT_MIN", "2"))
+LATENCY_WINDOW = 512
+LATENCY_MIN_SAMPLES = 20
+# p95を過ぎても応答がないGETに送る2本目の上限（エンドポイント別リクエスト数に対する割合、0で無効）
+HEDGE_BUDGET = float(os.getenv("ELSEVIER_MCP_HEDGE_BUDGET", "0.05"))
+HEDGE_MIN_DELAY = 0.05
+
+# メトリクス設定（ELSEVIER_MCP_METRICS=0 で計測を無効化）
+METRICS_ENABLED = os.getenv("ELSEVIER_MCP_METRICS", "1") != "0"
+METRICS_FILE = os.getenv("ELSEVIER_MCP_METRICS_FILE", "")
+METRICS_FILE_INTERVAL = float(os.getenv("ELSEVIER_MCP_METRICS_INTERVAL", "15"))
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# レスポンスキャッシュ設定（ELSEVIER_MCP_CACHE=0 で無効化）
+CACHE_ENABLED = os.getenv("ELSEVIER_MCP_CACHE", "1") != "0"
+CACHE_DIR = os.path.expanduser(os.getenv("ELSEVIER_MCP_CACHE_DIR", "~/.cache/elsevier-mcp"))
+CACHE_MEMORY_ENTRIES = int(os.getenv("ELSEVIER_MCP_CACHE_MEMORY_ENTRIES", "512"))
+CACHE_DISK_ENTRIES = int(os.getenv("ELSEVIER_MCP_CACHE_DISK_ENTRIES", "50000"))
+
+# 全ツール共通の出力指定（fields: 出力フィールド、max_bytes / max_tokens: 出力サイズの上限）
+RESPONSE_PROPERTIES = {
+    "fields": {
+        "type": "array",
+        "items": {"type": "string"},
+        "description": "出力するフィールド（例: ['title', 'year', 'citations']）。論文を返すツールでは論文フィールドを指し、Scopusへの取得項目も絞ります。該当しない名前は無視して ignored_fields に示します。省略時は全フィールド"
+    },
+    "max_bytes": {
+        "type": "integer",
+        "description": "出力サイズの上限（バイト）。超える場合は抄録の切り詰め、入れ子のフィールドの除外、一覧の末尾の省略を行い、それでも超える場合は truncated.exceeded を返します",
+        "minimum": 256
+    },
+    "max_tokens": {
+        "type": "integer",
+        "description": "出力サイズの上限（概算トークン数、1トークン≒4バイト）",
+        "minimum": 64
+    }
+}
+# 論文一覧を返すツールの出力形式（format: json / compact）
+OUTPUT_FORMAT_PROPERTIES = dict({
+    "format": {
+        "type": "string",
+        "enum": ["json", "compact"],
+        "description": "出力形式（デフォルト: json）。compact は論文一覧を列指向・インデントなしのJSONで返します"
+    }
+}, **RESPONSE_PROPERTIES)
+# 出力形式の変換対象となる論文一覧のキーと、単一レコードのキー
+RECORD_LIST_KEYS = ("papers", "top_papers", "results")
+SINGLE_RECORD_KEYS = ("paper", "author")
+# fields指定時も常に残す結果のキー
+ALWAYS_KEPT_KEYS = ("success", "error", "partial", "errors", "truncated", "format", "ignored_fields")
+# 論文フィールドとScopus（Search / Abstract Retrieval）のfield名の対応
+SCOPUS_FIELDS = {
+    "title": "dc:title",
+    "abstract": "dc:description",
+    "authors": "dc:creator",
+    "journal": "prism:publicationName",
+    "year": "prism:coverDate",
+    "citations": "citedby-count",
+    "doi": "prism:doi",
+    "eid": "eid",
+    "open_access": "openaccess",
+}
+# max_tokens からバイト数への換算と、出力サイズ調整時の抄録の最小文字数
+# （一覧を省く前に、さらに BUDGET_LAST_ABSTRACT_CHARS まで切り詰めてから抄録を外す）
+BYTES_PER_TOKEN = 4
+BUDGET_MIN_ABSTRACT_CHARS = 200
+BUDGET_LAST_ABSTRACT_CHARS = 25
+
+# ローカル全文検索インデックス（ELSEVIER_MCP_INDEX=0 で無効化）
+INDEX_ENABLED = os.getenv("ELSEVIER_MCP_INDEX", "1") != "0"
+
+# トレンド時系列スナップショット（キャッシュ有効時に保存）
+# 前年以前の期間はこの日数を過ぎるまで再取得しない（今年・前年は検索結果のキャッシュ期間ごとに再取得）
+TREND_STALE_DAYS = float(os.getenv("ELSEVIER_MCP_TREND_STALE_DAYS", "90"))
+
+# 引用ネットワーク（build_citation_graph）の上限と同時展開数
+GRAPH_MAX_DEPTH = 3
+GRAPH_MAX_NODES = int(os.getenv("ELSEVIER_MCP_GRAPH_MAX_NODES", "2000"))
+GRAPH_CONCURRENCY = int(os.getenv("ELSEVIER_MCP_GRAPH_CONCURRENCY", "8"))
+GRAPH_REFERENCE_PAGE_SIZE = 40
+# 被引用側の展開結果はこの日数を過ぎるまでグラフストアから再利用する（参考文献側は変化しないため期限なし）
+GRAPH_STALE_DAYS = float(os.getenv("ELSEVIER_MCP_GRAPH_STALE_DAYS", "7"))
+# バックグラウンドの一括エクスポート（start_export）
+EXPORT_DIR = os.path.expanduser(os.getenv("ELSEVIER_MCP_EXPORT_DIR", os.path.join(CACHE_DIR, "exports")))
+EXPORT_MAX_RESULTS = int(os.getenv("ELSEVIER_MCP_EXPORT_MAX_RESULTS", "200000"))
+EXPORT_MAX_JOBS = int(os.getenv("ELSEVIER_MCP_EXPORT_MAX_JOBS", "2"))
+EXPORT_PREVIEW_MAX = 25
+
+# MCPリソース（resources/list の1ページの件数と、リソースURIの形式）
+RESOURCE_PAGE_SIZE = 200
+RESOURCE_URI_PATTERN = re.compile(r"^elsevier://(abstract|paper|author)/([^/]+)$")
+
+# 被引用論文の検索で取得する項目
+GRAPH_CITING_FIELDS = "eid,dc:title,dc:creator,prism:publicationName,prism:coverDate,citedby-count"
+
+# エンドポイント別のキャッシュ有効期間（秒）。該当しないURLはキャッシュしない
+CACHE_TTLS = {
+    "/content/abstract/": 30 * 24 * 3600,       # 抄録はほぼ変化しない
+    "/content/author/orcid/": 90 * 24 * 3600,   # ORCIDとScopus著者IDの対応はほぼ変化しない
+    "/content/author/": 7 * 24 * 3600,
+    "/analytics/scival/author/": 7 * 24 * 3600,
+    "/content/search/": 24 * 3600,              # 検索件数は日次で変化する
+}
+
+
+class APIResponse:
+    """Elsevier APIレスポンス（JSON解析済み）"""
+
+    def __init__(self, status_code: int, headers, data=None, from_cache: bool = False):
+        self.status_code = status_code
+        self.headers = headers
+        self._data = data
+        self.from_cache = from_cache
+
+    @property
+    def ok(self) -> bool:
+        return 200 <= self.status_code < 400
+
+    def json(self):
+        return self._data
+
+    @property
+    def error(self) -> str:
+        """ツール結果用のエラーメッセージ"""
+        message = f"API Error: {self.status_code}"
+        if self.status_code == 429:
+            retry_after = self.headers.get("Retry-After")
+            message += " (rate limited" + (f", retry after {retry_after}s" if retry_after else "") + ")"
+        return message
+
+
+class Histogram:
+    """固定バケットのレイテンシヒストグラム（秒）"""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        index = 0
+        while index < len(self.buckets) and value > self.buckets[index]:
+            index += 1
+        self.counts[index] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q: float) -> float:
+        """バケット内の線形補間による分位点の推定値"""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for index, bucket_count in enumerate(self.counts):
+            if seen + bucket_count >= rank and bucket_count:
+                lower = self.buckets[index - 1] if index > 0 else 0.0
+                upper = self.buckets[index] if index < len(self.buckets) else self.buckets[-1]
+                return lower + (upper - lower) * (rank - seen) / bucket_count
+            seen += bucket_count
+        return self.buckets[-1]
+
+    def summary(self) -> dict:
+        return {
+            "count": self.count,
+            "avg_ms": round(self.sum / self.count * 1000, 2) if self.count else 0.0,
+            "p50_ms": round(self.quantile(0.50) * 1000, 2),
+            "p95_ms": round(self.quantile(0.95) * 1000, 2),
+            "p99_ms": round(self.quantile(0.99) * 1000, 2),
+        }
+
+
+class Metrics:
+    """ツール・上流エンドポイント別の計測値（カウンタ、ゲージ、ヒストグラム）
+
+    ラベルは (名前, 値) のタプル。無効時は各メソッドが即座に戻る。
+    """
+
+    def __init__(self, enabled: bool = METRICS_ENABLED):
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._gauges = {}
+        self._histograms = {}
+
+    def inc(self, name: str, labels: tuple = (), value: float = 1):
+        if not self.enabled:
+            return
+        with self._lock:
+            self._counters[(name, labels)] = self._counters.get((name, labels), 0) + value
+
+    def gauge_add(self, name: str, labels: tuple = (), delta: float = 1):
+        if not self.enabled:
+            return
+        with self._lock:
+            self._gauges[(name, labels)] = self._gauges.get((name, labels), 0) + delta
+
+    def observe(self, name: str, labels: tuple, seconds: float):
+        if not self.enabled:
+            return
+        with self._lock:
+            histogram = self._histograms.get((name, labels))
+            if histogram is None:
+                histogram = self._histograms[(name, labels)] = Histogram()
+            histogram.observe(seconds)
+
+    def snapshot(self) -> dict:
+        """ツール別・エンドポイント別にまとめた計測値"""
+        tools = {}
+        upstream = {}
+        with self._lock:
+            for (name, labels), histogram in self._histograms.items():
+                label = dict(labels)
+                if "tool" in label:
+                    stage = name.replace("tool_", "").replace("_seconds", "")
+                    tools.setdefault(label["tool"], {})[stage] = histogram.summary()
+                elif "endpoint" in label:
+                    stage = name.replace("upstream_", "").replace("_seconds", "")
+                    upstream.setdefault(label["endpoint"], {})[stage] = histogram.summary()
+            for (name, labels), value in self._counters.items():
+                label = dict(labels)
+                if name == "tool_calls_total":
+                    entry = tools.setdefault(label["tool"], {})
+                    entry[label["outcome"]] = entry.get(label["outcome"], 0) + value
+                elif name == "upstream_responses_total":
+                    statuses = upstream.setdefault(label["endpoint"], {}).setdefault("status_codes", {})
+                    statuses[label["status"]] = value
+                elif name == "upstream_errors_total":
+                    errors = upstream.setdefault(label["endpoint"], {}).setdefault("errors", {})
+                    errors[label["error"]] = value
+                elif name == "upstream_hedges_total":
+                    hedges = upstream.setdefault(label["endpoint"], {}).setdefault("hedges", {})
+                    hedges[label["outcome"]] = value
+            for (name, labels), value in self._gauges.items():
+                label = dict(labels)
+                if name == "tool_in_flight":
+                    tools.setdefault(label["tool"], {})["in_flight"] = value
+                elif name == "upstream_in_flight":
+                    upstream.setdefault(label["endpoint"], {})["in_flight"] = value
+        return {"enabled": self.enabled, "tools": tools, "upstream": upstream}
+
+    def render_prometheus(self, extra: list = ()) -> str:
+        """Prometheusテキスト形式（extraは (名前, 型, ラベル, 値) のリスト）"""
+        def fmt(labels):
+            if not labels:
+                return ""
+            return "{" + ",".join(f'{key}="{value}"' for key, value in labels) + "}"
+
+        lines = []
+        typed = set()
+
+        def declare(name, kind):
+            if name not in typed:
+                typed.add(name)
+                lines.append(f"# TYPE {name} {kind}")
+
+        with self._lock:
+            for (name, labels), value in sorted(self._counters.items()):
+                declare(f"elsevier_mcp_{name}", "counter")
+                lines.append(f"elsevier_mcp_{name}{fmt(labels)} {value}")
+            for (name, labels), value in sorted(self._gauges.items()):
+                declare(f"elsevier_mcp_{name}", "gauge")
+                lines.append(f"elsevier_mcp_{name}{fmt(labels)} {value}")
+            for (name, labels), histogram in sorted(self._histograms.items()):
+                metric = f"elsevier_mcp_{name}"
+                declare(metric, "histogram")
+                cumulative = 0
+                for bound, bucket_count in zip(histogram.buckets, histogram.counts):
+                    cumulative += bucket_count
+                    lines.append(f"{metric}_bucket{fmt(labels + (('le', bound),))} {cumulative}")
+                lines.append(f"{metric}_bucket{fmt(labels + (('le', '+Inf'),))} {histogram.count}")
+                lines.append(f"{metric}_sum{fmt(labels)} {histogram.sum}")
+                lines.append(f"{metric}_count{fmt(labels)} {histogram.count}")
+        for name, kind, labels, value in extra:
+            declare(f"elsevier_mcp_{name}", kind)
+            lines.append(f"elsevier_mcp_{name}{fmt(labels)} {value}")
+        return "\n".join(lines) + "\n"
+
+
+class QuotaExhaustedError(Exception):
+    """APIキーのクォータを使い切った状態"""
+
+
+class UpstreamTimeoutError(Exception):
+    """再試行しても上流が時間内に応答しなかった"""
+
+
+class TokenBucket:
+    """非同期トークンバケット"""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.capacity = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+    def release(self):
+        """acquire で取ったが使わなかったトークンを戻す"""
+        self.tokens = min(self.capacity, self.tokens + 1)
+
+
+class RateLimiter:
+    """全ハンドラで共有するAPIファミリー別のレート制限とクォータ管理
+
+    X-RateLimit-* レスポンスヘッダーから残りクォータを追跡し、
+    使い切った場合はリセット時刻まで上流へ送信しない。
+    """
+
+    def __init__(self, limits: dict = None):
+        limits = API_RATE_LIMITS if limits is None else limits
+        self.limits = limits
+        self._buckets = {family: TokenBucket(rate, burst) for family, (rate, burst) in limits.items()}
+        self.quota = {
+            family: {"limit": None, "remaining": None, "reset_at": None, "requests": 0, "throttled": 0}
+            for family in limits
+        }
+
+    @staticmethod
+    def family_for(url: str) -> str:
+        """URLからAPIファミリーを判定"""
+        if "/content/search/" in url:
+            return "scopus_search"
+        if "/content/abstract/" in url:
+            return "abstract_retrieval"
+        if "/content/author" in url:
+            return "author_retrieval"
+        if "/analytics/scival/" in url:
+            return "scival"
+        return None
+
+    @staticmethod
+    def _check_quota(family: str, remaining, reset_at):
+        """クォータ切れならリセット時刻まで送信を止める"""
+        if remaining == 0 and reset_at and reset_at > time.time():
+            reset = datetime.fromtimestamp(reset_at).isoformat(timespec="seconds")
+            raise QuotaExhaustedError(f"API quota exhausted for {family} until {reset}")
+
+    async def acquire(self, family: str):
+        if family not in self._buckets:
+            return
+        quota = self.quota[family]
+        self._check_quota(family, quota["remaining"], quota["reset_at"])
+        await self._buckets[family].acquire()
+        quota["requests"] += 1
+
+    def release(self, family: str):
+        """acquire したが送信しなかった1回分を戻す"""
+        if family not in self._buckets:
+            return
+        self._buckets[family].release()
+        self.quota[family]["requests"] -= 1
+
+    def update(self, family: str, response: APIResponse):
+        """レスポンスヘッダーからクォータ状態を更新"""
+        if family not in self.quota:
+            return
+        quota = self.quota[family]
+        headers = response.headers
+        for header, field in (("X-RateLimit-Limit", "limit"),
+                              ("X-RateLimit-Remaining", "remaining"),
+                              ("X-RateLimit-Reset", "reset_at")):
+            value = headers.get(header)
+            if value is not None:
+                try:
+                    quota[field] = int(float(value))
+                except ValueError:
+                    pass
+        if response.status_code == 429:
+            quota["throttled"] += 1
+
+    @staticmethod
+    def backoff_delay(attempt: int, response: APIResponse) -> float:
+        """Retry-After を優先し、なければジッター付き指数バックオフ"""
+        retry_after = response.headers.get("Retry-After")
+        if retry_after:
+            try:
+                return min(RETRY_MAX_DELAY, max(0.0, float(retry_after)))
+            except ValueError:
+                pass
+        delay = min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * (2 ** attempt))
+        return delay / 2 + random.uniform(0, delay / 2)
+
+    def snapshot(self) -> dict:
+        result = {}
+        for family, quota in self.quota.items():
+            entry = dict(quota)
+            if entry["reset_at"]:
+                entry["reset_at"] = datetime.fromtimestamp(entry["reset_at"]).isoformat(timespec="seconds")
+            result[family] = entry
+        return result
+
+
+class SharedRateLimiter(RateLimiter):
+    """SQLite（WAL）経由で複数プロセス間で共有するレート制限とクォータ
+
+    トークンバケットと X-RateLimit-* の残りクォータをローカルDBに置き、
+    ワーカーが何個あっても合計でAPIキーの上限を超えないようにする。
+    """
+
+    def __init__(self, path: str = None, limits: dict = None):
+        super().__init__(limits)
+        if path is None:
+            path = os.path.join(CACHE_DIR, "ratelimit.sqlite3")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        import sqlite3
+        self._lock = threading.Lock()
+        self._closed = False
+        self._db = sqlite3.connect(path, timeout=10, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS buckets (family TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)"
+        )
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS quota (family TEXT PRIMARY KEY, quota_limit INTEGER, "
+            "remaining INTEGER, reset_at INTEGER)"
+        )
+
+    def _try_take(self, family: str):
+        """トークンを1つ取る。(待機秒数, クォータ情報) を返す（ワーカースレッドで実行）
+
+        待機秒数が0ならトークンを取った。クォータ切れで取らなかった場合はNone。
+        """
+        rate, burst = self.limits[family]
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                quota = self._db.execute(
+                    "SELECT remaining, reset_at FROM quota WHERE family = ?", (family,)
+                ).fetchone()
+                if quota is not None and quota[0] == 0 and quota[1] and quota[1] > time.time():
+                    self._db.execute("COMMIT")
+                    return None, quota
+
+                now = time.time()
+                row = self._db.execute(
+                    "SELECT tokens, updated FROM buckets WHERE family = ?", (family,)
+                ).fetchone()
+                tokens = float(burst) if row is None else min(burst, row[0] + (now - row[1]) * rate)
+                wait = 0.0
+                if tokens >= 1:
+                    tokens -= 1
+                else:
+                    wait = (1 - tokens) / rate
+                self._db.execute(
+                    "INSERT OR REPLACE INTO buckets (family, tokens, updated) VALUES (?, ?, ?)",
+                    (family, tokens, now)
+                )
+                self._db.execute("COMMIT")
+                return wait, quota
+            except Exception:
+                self._db.execute("ROLLBACK")
+                raise
+
+    async def acquire(self, family: str):
+        if family not in self.limits:
+            return
+        loop = asyncio.get_running_loop()
+        while True:
+            taking = loop.run_in_executor(None, self._try_take, family)
+            try:
+                wait, quota = await asyncio.shield(taking)
+            except asyncio.CancelledError:
+                # 取り消されてもスレッド側では取り終えるため、取れていれば戻す
+                taking.add_done_callback(lambda future: self._taken_after_cancel(family, future))
+                raise
+            if quota is not None:
+                self._check_quota(family, quota[0], quota[1])
+            if wait is None:
+                # 直前にリセット時刻を過ぎた
+                continue
+            if wait <= 0:
+                break
+            await asyncio.sleep(wait)
+        self.quota[family]["requests"] += 1
+
+    def _taken_after_cancel(self, family: str, future):
+        if not future.cancelled() and future.exception() is None and future.result()[0] == 0:
+            self._release_token(family)
+
+    def release(self, family: str):
+        if family not in self.limits:
+            return
+        self.quota[family]["requests"] -= 1
+        self._release_token(family)
+
+    def _release_token(self, family: str):
+        returned = asyncio.get_running_loop().run_in_executor(None, self._give_back, family)
+        returned.add_done_callback(self._token_returned)
+
+    @staticmethod
+    def _token_returned(future):
+        """共有DBへのトークン返却の失敗を記録する（送信は止めない）"""
+        if not future.cancelled() and future.exception() is not None:
+            print(f"⚠️ Failed to return shared rate limit token: {future.exception()}", file=sys.stderr)
+
+    def _give_back(self, family: str):
+        _, burst = self.limits[family]
+        with self._lock:
+            if self._closed:
+                return
+            self._db.execute("UPDATE buckets SET tokens = MIN(?, tokens + 1) WHERE family = ?", (burst, family))
+
+    def update(self, family: str, response: APIResponse):
+        super().update(family, response)
+        if family not in self.quota or "X-RateLimit-Remaining" not in response.headers:
+            return
+        quota = self.quota[family]
+        written = asyncio.get_running_loop().run_in_executor(
+            None, self._write_quota, family, quota["limit"], quota["remaining"], quota["reset_at"])
+        written.add_done_callback(self._quota_written)
+
+    @staticmethod
+    def _quota_written(future):
+        """共有DBへのクォータ書き込みの失敗を記録する（送信は止めない）"""
+        if not future.cancelled() and future.exception() is not None:
+            print(f"⚠️ Failed to store shared quota: {future.exception()}", file=sys.stderr)
+
+    def _write_quota(self, family: str, limit, remaining, reset_at):
+        with self._lock:
+            if self._closed:
+                return
+            self._db.execute(
+                "INSERT OR REPLACE INTO quota (family, quota_limit, remaining, reset_at) VALUES (?, ?, ?, ?)",
+                (family, limit, remaining, reset_at)
+            )
+
+    def snapshot(self) -> dict:
+        """共有DB上の最新クォータを反映した状態"""
+        with self._lock:
+            rows = self._db.execute("SELECT family, quota_limit, remaining, reset_at FROM quota").fetchall()
+        for family, limit, remaining, reset_at in rows:
+            if family in self.quota:
+                self.quota[family].update(limit=limit, remaining=remaining, reset_at=reset_at)
+        result = super().snapshot()
+        for entry in result.values():
+            entry["shared"] = True
+        return result
+
+    def close(self):
+        with self._lock:
+            self._closed = True
+            self._db.close()
+
+
+class ResponseCache:
+    """メモリLRU層 + SQLiteディスク層の2段レスポンスキャッシュ
+
+    キーは正規化したURLとパラメータ。ディスク層はサーバー再起動後も残り、
+    件数上限を超えると最終アクセスの古い順に削除する。
+    メモリ層（イベントループから参照）と統計は _lock、ディスク層のDBは _disk_lock で守り、
+    SQLiteの待ちがメモリ層の参照を止めないようにする。
+    """
+
+    def __init__(self, path: str = None, memory_entries: int = CACHE_MEMORY_ENTRIES,
+                 disk_entries: int = CACHE_DISK_ENTRIES, ttls: dict = None):
+        self.ttls = CACHE_TTLS if ttls is None else ttls
+        self.memory_entries = memory_entries
+        self.disk_entries = disk_entries
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._disk_lock = threading.Lock()
+        self._writes_since_prune = 0
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "stores": 0, "evictions": 0}
+
+        # ディスク層は起動を速くするため初回使用時に開く
+        self._path = os.path.join(CACHE_DIR, "responses.sqlite3") if path is None else path
+        self._db = None
+        self._opened = False
+
+    def _database(self):
+        """ディスク層のDB（初回呼び出しで開く、使えなければNone。_disk_lock 保持中に呼ぶ）"""
+        if self._opened:
+            return self._db
+        self._opened = True
+        import sqlite3
+        try:
+            os.makedirs(os.path.dirname(self._path), exist_ok=True)
+            self._db = sqlite3.connect(self._path, timeout=10, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, body TEXT NOT NULL, "
+                "expires_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses(accessed_at)")
+            self._db.commit()
+        except (sqlite3.Error, OSError) as e:
+            print(f"⚠️ Disk cache disabled ({self._path}): {e}", file=sys.stderr)
+            self._db = None
+        return self._db
+
+    @staticmethod
+    def make_key(url: str, params: dict = None) -> str:
+        """URLとパラメータから正規化キーを生成"""
+        key = url.rstrip("/")
+        if params:
+            key += "?" + urlencode(sorted((str(k), str(v)) for k, v in params.items()))
+        return key
+
+    def ttl_for(self, url: str) -> int:
+        """URLに対応するTTL（0ならキャッシュ対象外）"""
+        for prefix, ttl in self.ttls.items():
+            if prefix in url:
+                return ttl
+        return 0
+
+    def get_memory(self, key: str):
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is None:
+                return None
+            expires_at, data = entry
+            if expires_at < time.time():
+                del self._memory[key]
+                return None
+            self._memory.move_to_end(key)
+            self.stats["memory_hits"] += 1
+            return data
+
+    def get_disk(self, key: str):
+        """ディスク層を参照し、ヒットしたらメモリ層へ昇格（ワーカースレッドで実行）"""
+        now = time.time()
+        with self._disk_lock:
+            row = None
+            if self._database() is not None:
+                row = self._db.execute(
+                    "SELECT body, expires_at FROM responses WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None and row[1] < now:
+                    self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+                    self._db.commit()
+                    row = None
+                elif row is not None:
+                    self._db.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+                    self._db.commit()
+        with self._lock:
+            self.stats["misses" if row is None else "disk_hits"] += 1
+        if row is None:
+            return None
+
+        data = json.loads(row[0])
+        self._remember(key, data, row[1])
+        return data
+
+    def put(self, key: str, data, ttl: int):
+        """両層へ保存（ワーカースレッドで実行）"""
+        now = time.time()
+        expires_at = now + ttl
+        self._remember(key, data, expires_at)
+
+        body = json.dumps(data, ensure_ascii=False)
+        with self._disk_lock:
+            if self._database() is None:
+                return
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses (key, body, expires_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, body, expires_at, now)
+            )
+            self._writes_since_prune += 1
+            evicted = self._prune_disk(now) if self._writes_since_prune >= 100 else 0
+            self._db.commit()
+        with self._lock:
+            self.stats["stores"] += 1
+            self.stats["evictions"] += evicted
+
+    def _remember(self, key: str, data, expires_at: float):
+        with self._lock:
+            self._memory[key] = (expires_at, data)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_entries:
+                self._memory.popitem(last=False)
+                self.stats["evictions"] += 1
+
+    def _prune_disk(self, now: float):
+        """期限切れと件数上限超過分を削除し、上限超過で削除した件数を返す（_disk_lock 保持中に呼ぶ）"""
+        self._writes_since_prune = 0
+        self._db.execute("DELETE FROM responses WHERE expires_at < ?", (now,))
+        (count,) = self._db.execute("SELECT COUNT(*) FROM responses").fetchone()
+        excess = count - self.disk_entries
+        if excess > 0:
+            self._db.execute(
+                "DELETE FROM responses WHERE key IN "
+                "(SELECT key FROM responses ORDER BY accessed_at LIMIT ?)", (excess,)
+            )
+            return excess
+        return 0
+
+    def snapshot(self) -> dict:
+        """ヒット/ミス等の統計"""
+        with self._lock:
+            stats = dict(self.stats)
+            stats["memory_entries"] = len(self._memory)
+        lookups = stats["memory_hits"] + stats["disk_hits"] + stats["misses"]
+        stats["hit_ratio"] = round((stats["memory_hits"] + stats["disk_hits"]) / lookups, 4) if lookups else 0.0
+        return stats
+
+    def close(self):
+        with self._disk_lock:
+            self._opened = True
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+
+class LocalIndex:
+    """取得済み論文のローカル全文検索インデックス（SQLite FTS5、BM25順位付け）
+
+    FTS5が使えないSQLiteでは LIKE 検索（被引用数順）にフォールバックする。
+    """
+
+    def __init__(self, path: str = None):
+        if path is None:
+            path = os.path.join(CACHE_DIR, "index.sqlite3")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        import sqlite3
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, timeout=10, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS papers ("
+            "eid TEXT PRIMARY KEY, doi TEXT, title TEXT, abstract TEXT, authors TEXT, "
+            "journal TEXT, cover_date TEXT, year INTEGER, citations INTEGER, updated_at REAL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS papers_year ON papers(year)")
+        try:
+            self._db.execute(
+                "CREATE VIRTUAL TABLE IF NOT EXISTS papers_fts USING fts5("
+                "eid UNINDEXED, title, abstract, authors, journal)"
+            )
+            self.fts = True
+        except sqlite3.OperationalError:
+            self.fts = False
+        self._db.commit()
+
+    @staticmethod
+    def _abstract(paper):
+        """論文の抄録（"No abstract" の代替文字列や空の場合はNone）"""
+        abstract = paper.get("abstract")
+        return None if not abstract or abstract == "No abstract" else abstract
+
+    @staticmethod
+    def _text(value) -> str:
+        """著者オブジェクト等を検索用の文字列に変換"""
+        if value is None:
+            return ""
+        if isinstance(value, str):
+            return value
+        if isinstance(value, dict):
+            authors = value.get("author", [])
+            if isinstance(authors, dict):
+                authors = [authors]
+            return "; ".join(str(author.get("ce:indexed-name", "")) for author in authors)
+        return str(value)
+
+    def add_papers(self, papers: list):
+        """論文情報（eid必須）を追加・更新（ワーカースレッドで実行）"""
+        now = time.time()
+        with self._lock:
+            for paper in papers:
+                eid = paper.get("eid")
+                if not eid:
+                    continue
+                cover_date = paper.get("year", "") or ""
+                year = int(cover_date[:4]) if str(cover_date)[:4].isdigit() else None
+                abstract = self._abstract(paper)
+                self._db.execute(
+                    "INSERT INTO papers (eid, doi, title, abstract, authors, journal, cover_date, year, citations, updated_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?) "
+                    "ON CONFLICT(eid) DO UPDATE SET doi = excluded.doi, title = excluded.title, "
+                    "abstract = COALESCE(excluded.abstract, papers.abstract), authors = excluded.authors, "
+                    "journal = excluded.journal, cover_date = excluded.cover_date, year = excluded.year, "
+                    "citations = excluded.citations, updated_at = excluded.updated_at",
+                    (eid, paper.get("doi", ""), paper.get("title", ""), abstract,
+                     self._text(paper.get("authors")), paper.get("journal", ""), str(cover_date), year,
+                     int(paper.get("citations") or 0), now)
+                )
+                if self.fts:
+                    row = self._db.execute(
+                        "SELECT title, abstract, authors, journal FROM papers WHERE eid = ?", (eid,)
+                    ).fetchone()
+                    self._db.execute("DELETE FROM papers_fts WHERE eid = ?", (eid,))
+                    self._db.execute("INSERT INTO papers_fts (eid, title, abstract, authors, journal) "
+                                     "VALUES (?, ?, ?, ?, ?)", (eid,) + tuple(row))
+            self._db.commit()
+
+    def search(self, query: str, count: int = 10, year_from: int = None, year_to: int = None,
+               journal: str = None) -> list:
+        """ローカル検索（BM25スコアの小さい順＝関連度の高い順）"""
+        filters = []
+        params = []
+        if year_from:
+            filters.append("p.year >= ?")
+            params.append(int(year_from))
+        if year_to:
+            filters.append("p.year <= ?")
+            params.append(int(year_to))
+        if journal:
+            filters.append("p.journal LIKE ?")
+            params.append(f"%{journal}%")
+        columns = "p.eid, p.doi, p.title, p.abstract, p.authors, p.journal, p.cover_date, p.citations"
+
+        if self.fts:
+            # 各語をフレーズとして扱い、FTS5の構文エラーを避ける
+            match = " ".join('"' + token.replace('"', '""') + '"' for token in query.split())
+            sql = (f"SELECT {columns}, bm25(papers_fts, 0.0, 10.0, 3.0, 2.0, 1.0) AS score "
+                   "FROM papers_fts JOIN papers p ON p.eid = papers_fts.eid WHERE papers_fts MATCH ?")
+            params.insert(0, match)
+            order = "score"
+        else:
+            sql = f"SELECT {columns}, NULL AS score FROM papers p WHERE (p.title LIKE ? OR p.abstract LIKE ?)"
+            params[:0] = [f"%{query}%", f"%{query}%"]
+            order = "p.citations DESC"
+        for condition in filters:
+            sql += f" AND {condition}"
+        sql += f" ORDER BY {order} LIMIT ?"
+        params.append(int(count))
+
+        with self._lock:
+            rows = self._db.execute(sql, params).fetchall()
+        return [
+            PaperRecord(
+                title=title, authors=authors, journal=journal_name, year=cover_date,
+                citations=citations, doi=doi, eid=eid, abstract=abstract,
+                score=round(-score, 4) if score is not None else None
+            )
+            for eid, doi, title, abstract, authors, journal_name, cover_date, citations, score in rows
+        ]
+
+    def size(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM papers").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+class TrendStore:
+    """(クエリ, 期間) → 論文数の時系列スナップショット（SQLite）
+
+    期間を再取得すると、直前の件数と取得時刻を previous_* に残す。
+    """
+
+    def __init__(self, path: str = None):
+        if path is None:
+            path = os.path.join(CACHE_DIR, "trends.sqlite3")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        import sqlite3
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, timeout=10, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS trend_counts ("
+            "query TEXT NOT NULL, period TEXT NOT NULL, count INTEGER NOT NULL, fetched_at REAL NOT NULL, "
+            "previous_count INTEGER, previous_fetched_at REAL, PRIMARY KEY (query, period))"
+        )
+        self._db.commit()
+
+    def get(self, query: str, periods: list) -> dict:
+        """{期間: (count, fetched_at, previous_count, previous_fetched_at)}（保存済みのもののみ）"""
+        if not periods:
+            return {}
+        placeholders = ",".join("?" * len(periods))
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT period, count, fetched_at, previous_count, previous_fetched_at FROM trend_counts "
+                f"WHERE query = ? AND period IN ({placeholders})", [query] + list(periods)
+            ).fetchall()
+        return {row[0]: tuple(row[1:]) for row in rows}
+
+    def put(self, query: str, counts: dict):
+        """再取得した件数を保存（既存の件数は previous_* へ移す）"""
+        now = time.time()
+        with self._lock:
+            self._db.executemany(
+                "INSERT INTO trend_counts (query, period, count, fetched_at) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(query, period) DO UPDATE SET previous_count = trend_counts.count, "
+                "previous_fetched_at = trend_counts.fetched_at, count = excluded.count, "
+                "fetched_at = excluded.fetched_at",
+                [(query, period, count, now) for period, count in counts.items()]
+            )
+            self._db.commit()
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+class CitationGraphStore:
+    """引用ネットワークのノードと展開結果（SQLite）
+
+    ノードごとに参考文献側・被引用側を展開した時刻と件数上限を持ち、展開で得た隣接ノードは
+    取得順（参考文献は記載順、被引用は被引用数の多い順）のまま expansions 表に残す。
+    中断したクロールは展開済みのノードを再取得せずに再開でき、結果は新規のクロールと一致する。
+    """
+
+    COLUMNS = {"references": ("references_at", "references_limit"), "citing": ("citing_at", "citing_limit")}
+    SCHEMA_VERSION = 1
+
+    def __init__(self, path: str = None):
+        if path is None:
+            path = os.path.join(CACHE_DIR, "graph.sqlite3")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        import sqlite3
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, timeout=10, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS nodes ("
+            "eid TEXT PRIMARY KEY, title TEXT, authors TEXT, journal TEXT, year TEXT, citations INTEGER, "
+            "references_at REAL, references_limit INTEGER, citing_at REAL, citing_limit INTEGER, doi TEXT)"
+        )
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS expansions ("
+            "eid TEXT NOT NULL, direction TEXT NOT NULL, rank INTEGER NOT NULL, neighbour TEXT NOT NULL, "
+            "PRIMARY KEY (eid, direction, rank)) WITHOUT ROWID"
+        )
+        if self._db.execute("PRAGMA user_version").fetchone()[0] < self.SCHEMA_VERSION:
+            # 以前の辺だけの表からは展開ごとの隣接ノードと順序を復元できないため、展開をやり直す
+            self._db.execute("DROP TABLE IF EXISTS edges")
+            self._db.execute("UPDATE nodes SET references_at = NULL, citing_at = NULL")
+            if "doi" not in [column[1] for column in self._db.execute("PRAGMA table_info(nodes)")]:
+                self._db.execute("ALTER TABLE nodes ADD COLUMN doi TEXT")
+            self._db.execute(f"PRAGMA user_version = {self.SCHEMA_VERSION}")
+        self._db.commit()
+
+    def expanded(self, eid: str, direction: str, limit: int, max_age: float = None):
+        """展開済みなら隣接ノードのEID一覧（取得順、最大limit件）、未展開・期限切れ・件数上限不足ならNone"""
+        at_column, limit_column = self.COLUMNS[direction]
+        with self._lock:
+            row = self._db.execute(
+                f"SELECT {at_column}, {limit_column} FROM nodes WHERE eid = ?", (eid,)
+            ).fetchone()
+            if row is None or row[0] is None or (max_age is not None and row[0] < time.time() - max_age):
+                return None
+            rows = self._db.execute(
+                "SELECT neighbour FROM expansions WHERE eid = ? AND direction = ? ORDER BY rank",
+                (eid, direction)).fetchall()
+        # 前回より多く取得する指定で、前回は上限まで取得していた場合は再取得する
+        if row[1] < limit and len(rows) >= row[1]:
+            return None
+        return [neighbour for (neighbour,) in rows[:limit]]
+
+    def save_expansion(self, eid: str, direction: str, limit: int, papers: list):
+        """1ノードの展開結果（隣接論文の書誌と取得順）を1トランザクションで保存"""
+        at_column, limit_column = self.COLUMNS[direction]
+        with self._lock:
+            self._upsert(papers)
+            self._db.execute("DELETE FROM expansions WHERE eid = ? AND direction = ?", (eid, direction))
+            self._db.executemany(
+                "INSERT INTO expansions (eid, direction, rank, neighbour) VALUES (?, ?, ?, ?)",
+                [(eid, direction, rank, paper.eid) for rank, paper in enumerate(papers)]
+            )
+            self._db.execute(
+                f"INSERT INTO nodes (eid, {at_column}, {limit_column}) VALUES (?, ?, ?) "
+                f"ON CONFLICT(eid) DO UPDATE SET {at_column} = excluded.{at_column}, "
+                f"{limit_column} = excluded.{limit_column}", (eid, time.time(), limit)
+            )
+            self._db.commit()
+
+    def put_papers(self, papers: list):
+        with self._lock:
+            self._upsert(papers)
+            self._db.commit()
+
+    def _upsert(self, papers: list):
+        """書誌を保存（ロック保持中に呼ぶ）"""
+        self._db.executemany(
+            "INSERT INTO nodes (eid, title, authors, journal, year, citations, doi) VALUES (?, ?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT(eid) DO UPDATE SET title = excluded.title, authors = excluded.authors, "
+            "journal = excluded.journal, year = excluded.year, citations = excluded.citations, doi = excluded.doi",
+            [(paper.eid, LocalIndex._text(paper.get("title")), LocalIndex._text(paper.get("authors")),
+              LocalIndex._text(paper.get("journal")), paper.get("year"), int(paper.get("citations") or 0),
+              paper.get("doi"))
+             for paper in papers]
+        )
+
+    def papers(self, eids: list) -> dict:
+        """{EID: PaperRecord}（書誌を保存済みのもののみ）"""
+        found = {}
+        eids = list(eids)
+        with self._lock:
+            for start in range(0, len(eids), 500):
+                chunk = eids[start:start + 500]
+                rows = self._db.execute(
+                    "SELECT eid, title, authors, journal, year, citations, doi FROM nodes "
+                    f"WHERE title IS NOT NULL AND eid IN ({','.join('?' * len(chunk))})", chunk
+                ).fetchall()
+                for eid, title, authors, journal, year, citations, doi in rows:
+                    # 参考文献由来の書誌にはDOIがない（新規取得時と同じ形にする）
+                    extra = {"doi": doi} if doi is not None else {}
+                    found[eid] = PaperRecord(eid=eid, title=title, authors=authors, journal=journal,
+                                             year=year, citations=citations, **extra)
+        return found
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+class ExportJobStore:
+    """エクスポートジョブのチェックポイント（{job_id}.json）と出力ファイル（{job_id}.jsonl）
+
+    ページを出力ファイルへ追記・fsyncしてから、カーソルと出力済みバイト数を含むチェックポイントを
+    原子的に置き換える。再開時はチェックポイント以降に書かれた途中の行を切り捨てて続きから取得する。
+    """
+
+    def __init__(self, directory: str = None):
+        self.directory = EXPORT_DIR if directory is None else directory
+        os.makedirs(self.directory, exist_ok=True)
+        self._locks = {}
+
+    def _path(self, job_id: str, suffix: str) -> str:
+        return os.path.join(self.directory, f"{job_id}.{suffix}")
+
+    def create(self, spec: dict) -> dict:
+        job_id = datetime.now().strftime("%Y%m%d-%H%M%S-") + os.urandom(3).hex()
+        now = time.time()
+        job = dict(spec, job_id=job_id, status="queued", cursor="*", fetched=0, total=None, pages_fetched=0,
+                   bytes=0, created_at=now, updated_at=now, started_at=None, finished_at=None, error=None,
+                   data_path=self._path(job_id, "jsonl"), path=self._path(job_id, spec["format"]))
+        open(job["data_path"], "wb").close()
+        self.save(job)
+        return job
+
+    def save(self, job: dict):
+        """チェックポイントを原子的に書き換える"""
+        job["updated_at"] = time.time()
+        path = self._path(job["job_id"], "json")
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(job, f, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(path + ".tmp", path)
+
+    def load(self, job_id: str):
+        """チェックポイント（存在しない・不正なIDはNone）"""
+        if not re.match(r"^[\w-]+$", job_id or ""):
+            return None
+        try:
+            with open(self._path(job_id, "json"), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def jobs(self) -> list:
+        """すべてのジョブ（新しい順）"""
+        names = sorted((name for name in os.listdir(self.directory) if name.endswith(".json")), reverse=True)
+        return [job for job in (self.load(name[:-5]) for name in names) if job is not None]
+
+    def rewind(self, job: dict):
+        """出力ファイルを最後のチェックポイントの位置まで切り詰める"""
+        with open(job["data_path"], "ab") as f:
+            f.truncate(job["bytes"])
+
+    def append(self, job: dict, data: bytes, records: int, cursor: str, total: int):
+        """1ページ分を追記してfsyncし、チェックポイントを進める（ワーカースレッドで実行）"""
+        with open(job["data_path"], "ab") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        job.update(cursor=cursor, total=total, fetched=job["fetched"] + records,
+                   pages_fetched=job["pages_fetched"] + 1, bytes=job["bytes"] + len(data))
+        self.save(job)
+
+    def lock(self, job_id: str) -> bool:
+        """ジョブの実行権を取る（他プロセスが実行中ならFalse。fcntlのない環境ではプロセス内のみ）"""
+        if job_id in self._locks:
+            return False
+        handle = open(self._path(job_id, "lock"), "a")
+        try:
+            import fcntl
+            fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except ImportError:
+            pass
+        except OSError:
+            handle.close()
+            return False
+        self._locks[job_id] = handle
+        return True
+
+    def unlock(self, job_id: str):
+        handle = self._locks.pop(job_id, None)
+        if handle is not None:
+            handle.close()
+
+    def preview(self, job: dict, count: int) -> list:
+        """出力の先頭count件"""
+        if count <= 0:
+            return []
+        if job["path"] != job["data_path"]:
+            import pyarrow.parquet as pq
+            return pq.read_table(job["path"]).slice(0, count).to_pylist()
+        records = []
+        with open(job["data_path"], "rb") as f:
+            for line in f:
+                records.append(json.loads(line))
+                if len(records) >= count:
+                    break
+        return records
+
+    @staticmethod
+    def write_parquet(job: dict):
+        """JSONL出力をParquetに変換し、JSONLを削除する（pyarrowが必要）"""
+        import pyarrow as pa
+        import pyarrow.json as pa_json
+        import pyarrow.parquet as pq
+        if job["bytes"]:
+            # 出版日（year）は日付型に推論させず、JSON出力と同じ文字列のまま保存する
+            options = pa_json.ParseOptions(explicit_schema=pa.schema([("year", pa.string())]),
+                                           unexpected_field_behavior="infer")
+            pq.write_table(pa_json.read_json(job["data_path"], parse_options=options), job["path"])
+        else:
+            pq.write_table(pa.table({}), job["path"])
+        os.remove(job["data_path"])
+
+
+class ResourceStore:
+    """取得済みの論文・抄録・著者プロファイルをMCPリソースとして保持する追記専用ストア
+
+    本文は resources.dat に、resources/read の "text" へそのまま埋め込めるJSON文字列リテラルとして追記し、
+    URIごとの位置・長さを SQLite の索引（resources.sqlite3）に持つ。読み出しは resources.dat の
+    mmap への memoryview を返すだけで、コピーやJSONの解析・再シリアライズをしない。
+    内容が変わらない再保存は追記しない。
+    """
+
+    def __init__(self, directory: str = None):
+        directory = CACHE_DIR if directory is None else directory
+        os.makedirs(directory, exist_ok=True)
+        import sqlite3
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(os.path.join(directory, "resources.sqlite3"), timeout=10,
+                                   check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS resources ("
+            "uri TEXT PRIMARY KEY, name TEXT NOT NULL, offset INTEGER NOT NULL, length INTEGER NOT NULL, "
+            "checksum INTEGER NOT NULL, updated_at REAL NOT NULL)"
+        )
+        data_path = os.path.join(directory, "resources.dat")
+        self._writer = open(data_path, "ab")
+        self._reader = open(data_path, "rb")
+        self._map = None
+
+    def put(self, items: list):
+        """[(uri, name, record)] を保存（ワーカースレッドで実行）
+
+        追記と索引の更新は BEGIN IMMEDIATE の中で行い、複数プロセスからの書き込みを直列化する。
+        """
+        import zlib
+        encoded = []
+        for uri, name, record in items:
+            literal = json.dumps(dumps_text(record), ensure_ascii=False).encode("utf-8")
+            encoded.append((uri, name, literal, zlib.crc32(literal)))
+        if not encoded:
+            return
+        uris = list(OrderedDict.fromkeys(item[0] for item in encoded))
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                existing = {}
+                for start in range(0, len(uris), 500):
+                    chunk = uris[start:start + 500]
+                    existing.update((uri, (length, checksum)) for uri, length, checksum in self._db.execute(
+                        f"SELECT uri, length, checksum FROM resources WHERE uri IN ({','.join('?' * len(chunk))})",
+                        chunk))
+                offset = os.fstat(self._writer.fileno()).st_size
+                now = time.time()
+                rows = []
+                chunks = []
+                for uri, name, literal, checksum in encoded:
+                    if existing.get(uri) == (len(literal), checksum):
+                        continue
+                    existing[uri] = (len(literal), checksum)
+                    rows.append((uri, name, offset, len(literal), checksum, now))
+                    chunks.append(literal)
+                    offset += len(literal)
+                if chunks:
+                    self._writer.write(b"".join(chunks))
+                    self._writer.flush()
+                    self._db.executemany(
+                        "INSERT INTO resources (uri, name, offset, length, checksum, updated_at) "
+                        "VALUES (?, ?, ?, ?, ?, ?) ON CONFLICT(uri) DO UPDATE SET name = excluded.name, "
+                        "offset = excluded.offset, length = excluded.length, checksum = excluded.checksum, "
+                        "updated_at = excluded.updated_at", rows
+                    )
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+
+    def read(self, uri: str):
+        """本文（JSON文字列リテラルを指す mmap の memoryview）。未保存ならNone"""
+        import mmap
+        with self._lock:
+            row = self._db.execute("SELECT offset, length FROM resources WHERE uri = ?", (uri,)).fetchone()
+            if row is None:
+                return None
+            offset, length = row
+            # 他のスレッド・プロセスが追記した分が見えるよう、範囲外なら張り直す
+            # （古い mmap は送信中の memoryview が残っていれば参照がなくなった時点で解放される）
+            if self._map is None or len(self._map) < offset + length:
+                self._map = mmap.mmap(self._reader.fileno(), 0, access=mmap.ACCESS_READ)
+            return memoryview(self._map)[offset:offset + length]
+
+    def list(self, after: int, limit: int) -> tuple:
+        """rowid が after より後のリソースを limit 件（[(uri, name)], 次のカーソルまたはNone）"""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT rowid, uri, name FROM resources WHERE rowid > ? ORDER BY rowid LIMIT ?", (after, limit + 1)
+            ).fetchall()
+        next_cursor = rows[limit - 1][0] if len(rows) > limit else None
+        return [(uri, name) for _, uri, name in rows[:limit]], next_cursor
+
+    def close(self):
+        with self._lock:
+            self._map = None
+            self._writer.close()
+            self._reader.close()
+            self._db.close()
+
+
+class PaperRecord:
+    """論文1件のコンパクトな内部表現（__slots__、雑誌名・著者名はintern）
+
+    設定されていないフィールドは出力に含めない。dict互換の get() と [] を持つ。
+    """
+
+    __slots__ = ("title", "abstract", "authors", "journal", "year", "citations",
+                 "doi", "eid", "open_access", "score")
+    INTERNED = ("authors", "journal")
+
+    def __init__(self, **fields):
+        for name, value in fields.items():
+            if name in self.INTERNED and isinstance(value, str):
+                value = sys.intern(value)
+            setattr(self, name, value)
+
+    def get(self, name: str, default=None):
+        return getattr(self, name, default)
+
+    def __getitem__(self, name: str):
+        try:
+            return getattr(self, name)
+        except AttributeError:
+            raise KeyError(name) from None
+
+    def to_dict(self, fields=None) -> dict:
+        names = self.__slots__ if fields is None else fields
+        return {name: getattr(self, name) for name in names if hasattr(self, name)}
+
+
+def json_default(value):
+    """json.dumps で PaperRecord を辞書として出力する"""
+    if isinstance(value, PaperRecord):
+        return value.to_dict()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _record_row(item, fields=None) -> dict:
+    """論文レコード（またはバッチ結果の1件）を平坦な辞書に変換"""
+    if isinstance(item, PaperRecord):
+        return item.to_dict(fields)
+    if not isinstance(item, dict):
+        return item
+    row = {key: value for key, value in item.items() if key != "paper"}
+    paper = item.get("paper")
+    if isinstance(paper, PaperRecord):
+        row.update(paper.to_dict())
+    elif isinstance(paper, dict):
+        row.update(paper)
+    if fields is not None:
+        row = {name: row[name] for name in fields if name in row}
+    return row
+
+
+def select_fields(records: list, fields=None) -> list:
+    """指定フィールドのみを残した論文一覧（json形式用）"""
+    if fields is None:
+        return records
+    return [_record_row(record, fields) for record in records]
+
+
+def to_columns(records: list, fields=None) -> dict:
+    """論文一覧を列指向に変換（{"count": n, "columns": {フィールド: [値, ...]}}）"""
+    rows = [_record_row(record) for record in records]
+    if fields is None:
+        fields = list(OrderedDict.fromkeys(name for row in rows if isinstance(row, dict) for name in row))
+    return {
+        "count": len(rows),
+        "columns": {name: [row.get(name) if isinstance(row, dict) else None for row in rows]
+                    for name in fields}
+    }
+
+
+def response_budget(arguments: dict):
+    """max_bytes / max_tokens から出力サイズの上限（バイト）を求める（指定なしはNone）"""
+    limits = []
+    if arguments.get("max_bytes"):
+        limits.append(int(arguments["max_bytes"]))
+    if arguments.get("max_tokens"):
+        limits.append(int(arguments["max_tokens"]) * BYTES_PER_TOKEN)
+    return min(limits) if limits else None
+
+
+def _plain_paper(item):
+    """論文レコード（バッチ結果内のものを含む）を変更可能な辞書に変換"""
+    if isinstance(item, PaperRecord):
+        return item.to_dict()
+    if isinstance(item, dict):
+        item = dict(item)
+        if isinstance(item.get("paper"), PaperRecord):
+            item["paper"] = item["paper"].to_dict()
+    return item
+
+
+def _papers_in(result: dict) -> list:
+    """結果に含まれる論文（と単一レコード）の辞書をすべて返す"""
+    items = [result.get(key) for key in SINGLE_RECORD_KEYS]
+    for key in RECORD_LIST_KEYS:
+        if isinstance(result.get(key), list):
+            items.extend(result[key])
+    for page in result.get("pages") or []:
+        items.extend(page)
+    papers = []
+    for item in items:
+        if isinstance(item, dict):
+            papers.append(item)
+            if isinstance(item.get("paper"), dict):
+                papers.append(item["paper"])
+    return papers
+
+
+def _count_items(result: dict) -> int:
+    total = sum(len(page) for page in result.get("pages") or [])
+    return total + sum(len(result[key]) for key in RECORD_LIST_KEYS if isinstance(result.get(key), list))
+
+
+def _limit_items(result: dict, keep: int) -> dict:
+    """論文一覧を先頭から合計keep件に制限したコピー"""
+    limited = dict(result)
+    remaining = keep
+    if isinstance(result.get("pages"), list):
+        pages = []
+        for page in result["pages"]:
+            if remaining <= 0:
+                break
+            pages.append(page[:remaining])
+            remaining -= len(pages[-1])
+        limited["pages"] = pages
+    for key in RECORD_LIST_KEYS:
+        if isinstance(result.get(key), list):
+            limited[key] = result[key][:max(remaining, 0)]
+            remaining -= len(limited[key])
+    return limited
+
+
+def fit_to_budget(result: dict, max_bytes: int, measure) -> dict:
+    """出力サイズが上限に収まるよう、長い抄録を切り詰め、それでも超える場合は一覧の末尾を省く
+
+    順に、抄録を BUDGET_MIN_ABSTRACT_CHARS まで切り詰める、レコードの入れ子のフィールド
+    （Abstract Retrieval の著者一覧など）を外す、抄録をさらに切り詰めて外す、一覧の末尾を省く。
+    measure(result) は出力サイズ（バイト）を返す関数。
+    省略・切り詰めを行った場合は "truncated" に内容を記録し、それでも収まらなければ
+    "exceeded": true と実際のサイズ（"bytes"）を加える。
+    """
+    if not isinstance(result, dict) or measure(result) <= max_bytes:
+        return result
+
+    result = dict(result)
+    for key in SINGLE_RECORD_KEYS:
+        if key in result:
+            result[key] = _plain_paper(result[key])
+    for key in RECORD_LIST_KEYS:
+        if isinstance(result.get(key), list):
+            result[key] = [_plain_paper(item) for item in result[key]]
+    if isinstance(result.get("pages"), list):
+        result["pages"] = [[_plain_paper(item) for item in page] for page in result["pages"]]
+    truncated = {"max_bytes": max_bytes}
+    result["truncated"] = truncated
+
+    records = _papers_in(result)
+    papers = [paper for paper in records if isinstance(paper.get("abstract"), str)]
+    limit = max([len(paper["abstract"]) for paper in papers] or [0])
+
+    def shorten(floor):
+        """長い抄録を floor 文字まで半分ずつ切り詰める"""
+        nonlocal limit
+        while limit > floor and measure(result) > max_bytes:
+            limit = max(limit // 2, floor)
+            for paper in papers:
+                if len(paper["abstract"]) > limit:
+                    paper["abstract"] = paper["abstract"][:limit] + "…"
+            truncated["abstract_chars"] = limit
+
+    # 1. 長い抄録を半分ずつ切り詰める
+    shorten(BUDGET_MIN_ABSTRACT_CHARS)
+
+    # 2. レコードの入れ子のフィールドを外す（バッチ結果の "paper" はレコード本体なので残す）
+    if measure(result) > max_bytes:
+        dropped = set()
+        for record in records:
+            for name, value in list(record.items()):
+                if name != "paper" and isinstance(value, (dict, list)):
+                    del record[name]
+                    dropped.add(name)
+        if dropped:
+            truncated["dropped_fields"] = sorted(dropped)
+
+    # 3. 抄録をさらに切り詰め、それでも超えれば外す
+    shorten(BUDGET_LAST_ABSTRACT_CHARS)
+    if papers and measure(result) > max_bytes:
+        for paper in papers:
+            paper.pop("abstract", None)
+        truncated["abstract_chars"] = 0
+
+    # 4. 収まる件数を二分探索し、一覧の末尾を省く
+    total = _count_items(result)
+    if total and measure(result) > max_bytes:
+        def limited(keep):
+            trial = _limit_items(result, keep)
+            trial["truncated"] = dict(truncated, omitted_items=total - keep)
+            return trial
+
+        low, high = 0, total
+        while low < high:
+            middle = (low + high + 1) // 2
+            if measure(limited(middle)) <= max_bytes:
+                low = middle
+            else:
+                high = middle - 1
+        result = limited(low)
+        truncated = result["truncated"]
+
+    # 5. 省ける部分がなく上限を守れない場合は明示する（bytes はこの記録を含めた実際のサイズ）
+    if measure(result) > max_bytes:
+        truncated.update(exceeded=True, bytes=0)
+        while truncated["bytes"] != measure(result):
+            truncated["bytes"] = measure(result)
+    return result
+
+
+class SingleFlight:
+    """同一キーの同時呼び出しを1回の実行にまとめる（single-flight）
+
+    実行中の呼び出しと同じキーで来た呼び出しは、新たに実行せず
+    先行する実行の結果（または例外）を共有する。
+    """
+
     def __init__(self):
-        self.tools = self._define_tools()
+        self._inflight = {}
+        self.stats = {"calls": 0, "executions": 0, "coalesced": 0}
+
+    async def do(self, key, factory):
+        self.stats["calls"] += 1
+        future = self._inflight.get(key)
+        if future is None:
+            future = asyncio.ensure_future(factory())
+            self._inflight[key] = future
+            future.add_done_callback(lambda done: self._forget(key, done))
+            self.stats["executions"] += 1
+        else:
+            self.stats["coalesced"] += 1
+        # 呼び出し元の1つがキャンセルされても共有中の実行は継続する
+        return await asyncio.shield(future)
+
+    def _forget(self, key, future):
+        if self._inflight.get(key) is future:
+            del self._inflight[key]
+        if not future.cancelled():
+            future.exception()  # 待機者がいなくなった場合の未回収例外警告を防ぐ
+
+    def snapshot(self) -> dict:
+        stats = dict(self.stats)
+        stats["in_flight"] = len(self._inflight)
+        return stats
+
+
+class LatencyTracker:
+    """エンドポイント別の直近の応答時間と、そこから決めるタイムアウト・ヘッジ送信の待ち時間
+
+    応答を受け取ったリクエスト（ステータスを問わない）の所要時間を直近 window 件だけ保持する。
+    サンプルが min_samples 件に満たない間は分位点を返さず、呼び出し元の固定値を使う。
+    """
+
+    def __init__(self, window: int = LATENCY_WINDOW, min_samples: int = LATENCY_MIN_SAMPLES):
+        self.window = window
+        self.min_samples = min_samples
+        self._samples = {}
+        self._sorted = {}
+        self._lock = threading.Lock()
+        # エンドポイント別の送信数とヘッジの集計
+        self.stats = {}
+
+    def _stats(self, family: str) -> dict:
+        stats = self.stats.get(family)
+        if stats is None:
+            stats = self.stats[family] = {"requests": 0, "timeouts": 0, "hedged": 0, "hedge_wins": 0,
+                                          "hedge_saved_seconds": 0.0}
+        return stats
+
+    def record(self, family: str, key: str, value: float = 1):
+        """送信数・タイムアウト・ヘッジの集計を加算（ワーカースレッドからも呼ばれる）"""
+        with self._lock:
+            self._stats(family)[key] += value
+
+    def observe(self, family: str, seconds: float):
+        with self._lock:
+            samples = self._samples.get(family)
+            if samples is None:
+                samples = self._samples[family] = deque(maxlen=self.window)
+            samples.append(seconds)
+            self._sorted.pop(family, None)
+
+    def quantile(self, family: str, q: float):
+        """直近のサンプルの分位点（秒、サンプル不足ならNone）"""
+        with self._lock:
+            ordered = self._sorted.get(family)
+            if ordered is None:
+                samples = self._samples.get(family)
+                if not samples or len(samples) < self.min_samples:
+                    return None
+                ordered = self._sorted[family] = sorted(samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    def timeout_for(self, family: str, ceiling: float) -> float:
+        """p99 × ADAPTIVE_TIMEOUT_FACTOR（ADAPTIVE_TIMEOUT_MIN以上、呼び出し元の指定値以下）"""
+        p99 = self.quantile(family, 0.99) if ADAPTIVE_TIMEOUTS else None
+        if p99 is None:
+            return ceiling
+        return min(ceiling, max(ADAPTIVE_TIMEOUT_MIN, p99 * ADAPTIVE_TIMEOUT_FACTOR))
+
+    def hedge_delay(self, family: str):
+        """2本目を送るまでの待ち時間（p95）。予算を使い切っているか無効ならNone"""
+        if HEDGE_BUDGET <= 0:
+            return None
+        with self._lock:
+            stats = self._stats(family)
+            over_budget = stats["hedged"] + 1 > stats["requests"] * HEDGE_BUDGET
+        if over_budget:
+            return None
+        p95 = self.quantile(family, 0.95)
+        return None if p95 is None else max(HEDGE_MIN_DELAY, p95)
+
+    def snapshot(self) -> dict:
+        result = {}
+        with self._lock:
+            families = sorted(set(self._samples) | set(self.stats))
+        for family in families:
+            with self._lock:
+                entry = dict(self._stats(family))
+                entry["samples"] = len(self._samples.get(family, ()))
+            entry["hedge_saved_seconds"] = round(entry["hedge_saved_seconds"], 3)
+            for name, q in (("p50_ms", 0.50), ("p95_ms", 0.95), ("p99_ms", 0.99)):
+                value = self.quantile(family, q)
+                entry[name] = round(value * 1000, 2) if value is not None else None
+            # 呼び出し元の指定値で頭打ちになる前のタイムアウト
+            entry["adaptive_timeout_s"] = None
+            if ADAPTIVE_TIMEOUTS and entry["p99_ms"] is not None:
+                entry["adaptive_timeout_s"] = round(
+                    max(ADAPTIVE_TIMEOUT_MIN, entry["p99_ms"] / 1000 * ADAPTIVE_TIMEOUT_FACTOR), 3)
+            entry["hedge_budget"] = HEDGE_BUDGET
+            result[family] = entry
+        return result
+
+
+class ElsevierHTTPClient:
+    """全ツールハンドラで共有する非同期HTTPクライアント
+
+    keep-alive接続プールを持つrequests.Sessionを専用スレッドプール上で実行し、
+    上流の応答待ちでイベントループをブロックしない。
+    """
+
+    def __init__(self, pool_size: int = HTTP_POOL_SIZE, cache: ResponseCache = None,
+                 limiter: RateLimiter = None, metrics: Metrics = None):
+        self.cache = cache
+        self.limiter = limiter if limiter is not None else RateLimiter()
+        self.metrics = metrics if metrics is not None else Metrics(enabled=False)
+        self.inflight = SingleFlight()
+        self.latency = LatencyTracker()
+        self.pool_size = pool_size
+        self._executor = ThreadPoolExecutor(max_workers=pool_size,
+                                            thread_name_prefix="elsevier-http")
+        # requests の読み込みは起動時間の大半を占めるため、最初の送信時まで遅らせる
+        self._session = None
+        self._session_lock = threading.Lock()
+
+    def _get_session(self):
+        """keep-alive接続プール付きSession（初回呼び出しで作成、ワーカースレッドで実行）"""
+        with self._session_lock:
+            if self._session is None:
+                import requests
+                from requests.adapters import HTTPAdapter
+                session = requests.Session()
+                session.headers.update(HEADERS)
+                adapter = HTTPAdapter(pool_connections=self.pool_size, pool_maxsize=self.pool_size)
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                self._session = session
+            return self._session
+
+    def warm_up(self):
+        """initialize応答後にバックグラウンドでSessionを用意し、最初のツール呼び出しを速くする"""
+        if self._session is None:
+            self._executor.submit(self._get_session)
+
+    def _send(self, url: str, params, timeout, family: str = None) -> APIResponse:
+        """同期GET（ワーカースレッドで実行）"""
+        labels = (("endpoint", family or "other"),)
+        started = time.perf_counter()
+        try:
+            response = self._get_session().get(url, params=params, timeout=timeout)
+        except Exception as e:
+            self.metrics.inc("upstream_errors_total", labels + (("error", type(e).__name__),))
+            if "Timeout" in type(e).__name__:
+                # 打ち切った時間も記録し、遅い応答だけが観測値から抜け落ちないようにする
+                self.latency.observe(family or "other", time.perf_counter() - started)
+            raise
+        received = time.perf_counter()
+        self.latency.observe(family or "other", received - started)
+        data = response.json() if response.ok else None
+        self.metrics.observe("upstream_request_seconds", labels, received - started)
+        self.metrics.observe("upstream_parse_seconds", labels, time.perf_counter() - received)
+        self.metrics.inc("upstream_responses_total", labels + (("status", str(response.status_code)),))
+        return APIResponse(response.status_code, response.headers, data)
+
+    async def get(self, url: str, params: dict = None, timeout: float = 10,
+                  use_cache: bool = True) -> APIResponse:
+        """非同期GET（timeoutはリクエスト単位、対象エンドポイントはキャッシュ経由）
+
+        同一URL・パラメータの同時リクエストは1回の上流呼び出しにまとめる。
+        """
+        ttl = self.cache.ttl_for(url) if self.cache is not None and use_cache else 0
+        if ttl:
+            data = await self.get_cached(url, params)
+            if data is not None:
+                return APIResponse(200, {}, data, from_cache=True)
+
+        key = ResponseCache.make_key(url, params)
+        return await self.inflight.do(key, lambda: self._fetch(url, params, timeout, ttl))
+
+    @staticmethod
+    def _is_transient(error: Exception) -> bool:
+        """再試行で回復しうる送信エラー（タイムアウト・接続失敗）"""
+        import requests
+        return isinstance(error, (requests.Timeout, requests.ConnectionError))
+
+    def _submit(self, url: str, params, timeout, family: str):
+        """ワーカースレッドで送信（スレッド側のFutureと、それを待つasyncioのFuture）"""
+        submitted = self._executor.submit(self._send, url, params, timeout, family)
+        return submitted, asyncio.wrap_future(submitted)
+
+    async def _send_hedged(self, url: str, params, timeout, family: str) -> APIResponse:
+        """1回分の送信。p95を過ぎても応答がなければ予算内で2本目を送り、先に成功した方を使う
+
+        2本目のトークンを待つ間に1本目が返れば2本目は送らず、取ったトークンは戻す。
+        負けた方は待機を取り消して結果を捨てる（スレッド上の送信そのものは中断できない）。
+        """
+        endpoint = family or "other"
+        labels = (("endpoint", endpoint),)
+        self.latency.record(endpoint, "requests")
+        delay = self.latency.hedge_delay(endpoint)
+        first_submitted, first = self._submit(url, params, timeout, family)
+        if delay is None:
+            return await first
+        done, _ = await asyncio.wait([first], timeout=delay)
+        if done:
+            return first.result()
+        acquiring = asyncio.ensure_future(self.limiter.acquire(family))
+        await asyncio.wait([first, acquiring], return_when=asyncio.FIRST_COMPLETED)
+        if first.done() or acquiring.exception() is not None:
+            if not acquiring.done():
+                acquiring.cancel()
+            elif acquiring.exception() is None:
+                self.limiter.release(family)
+            # QuotaExhaustedError などで2本目を送れない場合も1本目を待つ
+            return await first
+
+        self.latency.record(endpoint, "hedged")
+        self.metrics.inc("upstream_hedges_total", labels + (("outcome", "sent"),))
+        _, hedge = self._submit(url, params, timeout, family)
+        pending = {first, hedge}
+        winner = None
+        while pending and winner is None:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for future in sorted(done, key=lambda future: future is not first):
+                if future.exception() is None and future.result().status_code not in RETRY_STATUS_CODES:
+                    winner = future
+                    break
+        for future in pending:
+            future.cancel()
+        if winner is None:
+            # どちらも失敗した場合は1本目の結果で再試行を判断する
+            return first.result()
+        if winner is hedge:
+            self.latency.record(endpoint, "hedge_wins")
+            self.metrics.inc("upstream_hedges_total", labels + (("outcome", "won"),))
+            won_at = time.perf_counter()
+
+            def saved(_):
+                # 1本目が実際に返るまでの時間を、ヘッジで短縮できた時間として記録する
+                seconds = time.perf_counter() - won_at
+                self.latency.record(endpoint, "hedge_saved_seconds", seconds)
+                self.metrics.observe("upstream_hedge_saved_seconds", labels, seconds)
+
+            first_submitted.add_done_callback(saved)
+        return winner.result()
+
+    async def _fetch(self, url: str, params, timeout, ttl: int) -> APIResponse:
+        """レート制限と再試行付きで上流へ送信し、成功時はキャッシュへ保存
+
+        タイムアウトはエンドポイントの観測値から決め（timeoutは上限）、再試行ごとに2倍へ広げる。
+        """
+        loop = asyncio.get_running_loop()
+        family = self.limiter.family_for(url)
+        endpoint = family or "other"
+        for attempt in range(MAX_RETRIES + 1):
+            await self.limiter.acquire(family)
+            attempt_timeout = min(timeout, self.latency.timeout_for(endpoint, timeout) * (2 ** attempt))
+            self.metrics.gauge_add("upstream_in_flight", (("endpoint", endpoint),), 1)
+            error = None
+            try:
+                response = await self._send_hedged(url, params, attempt_timeout, family)
+            except Exception as e:
+                if not self._is_transient(e):
+                    raise
+                error = e
+            finally:
+                self.metrics.gauge_add("upstream_in_flight", (("endpoint", endpoint),), -1)
+            if error is not None:
+                import requests
+                timed_out = isinstance(error, requests.Timeout)
+                if timed_out:
+                    self.latency.record(endpoint, "timeouts")
+                if attempt == MAX_RETRIES:
+                    if timed_out:
+                        raise UpstreamTimeoutError(
+                            f"{endpoint} API did not respond within {attempt_timeout:.1f}s "
+                            f"({attempt + 1} attempts)") from error
+                    raise error
+                await asyncio.sleep(self.limiter.backoff_delay(attempt, APIResponse(0, {})))
+                continue
+            self.limiter.update(family, response)
+            if response.status_code not in RETRY_STATUS_CODES or attempt == MAX_RETRIES:
+                break
+            await asyncio.sleep(self.limiter.backoff_delay(attempt, response))
+
+        if ttl and response.status_code == 200:
+            key = self.cache.make_key(url, params)
+            await loop.run_in_executor(self._executor, self.cache.put, key, response.json(), ttl)
+        return response
+
+    async def get_cached(self, url: str, params: dict = None):
+        """キャッシュ済みのデータを返す（なければNone、上流へは送信しない）"""
+        if self.cache is None or not self.cache.ttl_for(url):
+            return None
+        key = self.cache.make_key(url, params)
+        data = self.cache.get_memory(key)
+        if data is None:
+            loop = asyncio.get_running_loop()
+            data = await loop.run_in_executor(self._executor, self.cache.get_disk, key)
+        return data
+
+    async def put_cached(self, url: str, params: dict, data):
+        """url・params への単独リクエストの結果として data を保存（一括取得の結果を分割して保存する用）"""
+        ttl = self.cache.ttl_for(url) if self.cache is not None else 0
+        if ttl:
+            key = self.cache.make_key(url, params)
+            await asyncio.get_running_loop().run_in_executor(self._executor, self.cache.put, key, data, ttl)
+
+    def close(self):
+        if self._session is not None:
+            self._session.close()
+        self._executor.shutdown(wait=False)
+        if self.cache is not None:
+            self.cache.close()
+        if isinstance(self.limiter, SharedRateLimiter):
+            self.limiter.close()
+
+
+class ElsevierMCPServer:
+    # ツール定義と tools/list の結果はプロセス内で1度だけ作る
+    _tool_definitions = None
+
+    def __init__(self, shared_state: bool = SHARED_STATE):
+        """shared_state: レート制限とクォータを他プロセスとSQLite経由で共有する"""
+        if ElsevierMCPServer._tool_definitions is None:
+            tools = self._define_tools()
+            tools_list = PreSerialized({"tools": [
+                {"name": tool["name"], "description": tool["description"], "inputSchema": tool["inputSchema"]}
+                for tool in tools.values()
+            ]})
+            ElsevierMCPServer._tool_definitions = (tools, tools_list)
+        self.tools, self.tools_list = ElsevierMCPServer._tool_definitions
+        self.metrics = Metrics()
+        self.http = ElsevierHTTPClient(cache=ResponseCache() if CACHE_ENABLED else None,
+                                       limiter=SharedRateLimiter() if shared_state else RateLimiter(),
+                                       metrics=self.metrics)
+        self.tool_calls = SingleFlight()
+        # ツール呼び出しのキー → 結果を待っている呼び出し元の (progressToken, notify)
+        self._progress_listeners = {}
+        # SQLiteのインデックスとスナップショットは初回使用時に開く
+        self._index = None
+        self._trends = None
+        self._graph = None
+        self._resources = None
+        self._background = set()
+        # 実行中のエクスポートジョブ（job_id → Task）
+        self._exports = None
+        self._export_tasks = {}
+        self._export_slots = None
+        self._exports_resumed = False
+        # ORCID → Scopus著者ID（プロセス内。ディスクにはORCID検索のレスポンスとしてキャッシュされる）
+        self._orcid_ids = {}
+
+    @property
+    def index(self):
+        """ローカル全文検索インデックス（無効ならNone）"""
+        if self._index is None and INDEX_ENABLED:
+            self._index = LocalIndex()
+        return self._index
+
+    @property
+    def trends(self):
+        """トレンド時系列スナップショット（キャッシュ無効ならNone）"""
+        if self._trends is None and CACHE_ENABLED:
+            self._trends = TrendStore()
+        return self._trends
+
+    @property
+    def graph(self):
+        """引用ネットワークのグラフストア（キャッシュ無効ならNone）"""
+        if self._graph is None and CACHE_ENABLED:
+            self._graph = CitationGraphStore()
+        return self._graph
+
+    @property
+    def exports(self):
+        """エクスポートジョブのチェックポイントと出力ファイル"""
+        if self._exports is None:
+            self._exports = ExportJobStore()
+        return self._exports
+
+    @property
+    def resources(self):
+        """MCPリソースのストア（キャッシュ無効ならNone）"""
+        if self._resources is None and CACHE_ENABLED:
+            self._resources = ResourceStore()
+        return self._resources
+
+    def _in_background(self, function, *args):
+        """同期処理をワーカースレッドで実行し、終了時に完了を待てるよう記録する"""
+        future = asyncio.get_running_loop().run_in_executor(None, function, *args)
+        self._background.add(future)
+        future.add_done_callback(self._background_done)
+
+    def _index_papers(self, papers: list, field_param: str = None):
+        """取得した論文をバックグラウンドでローカルインデックスとリソースストアに追加
+
+        field_param 付きで取得した（項目が欠けた）論文は既存の内容を上書きしないよう追加しない。
+        抄録を含む論文は elsevier://abstract/{eid}、それ以外（"No abstract" を含む）は
+        elsevier://paper/{eid} として保存する。
+        """
+        if not papers or field_param:
+            return
+        if self.index is not None:
+            self._in_background(self.index.add_papers, papers)
+        if self.resources is not None:
+            self._in_background(self.resources.put, [
+                (f"elsevier://{'abstract' if LocalIndex._abstract(paper) else 'paper'}/{paper.eid}",
+                 paper.get("title") or paper.eid, paper.to_dict())
+                for paper in papers if paper.get("eid")
+            ])
+
+    async def aclose(self):
+        """バックグラウンド処理の完了を待ってから資源を解放
+
+        実行中のエクスポートジョブは中断し、チェックポイントから次回起動時に再開する。
+        """
+        for task in self._export_tasks.values():
+            task.cancel()
+        if self._export_tasks:
+            await asyncio.gather(*self._export_tasks.values(), return_exceptions=True)
+        if self._background:
+            await asyncio.gather(*self._background, return_exceptions=True)
+        self.http.close()
+        if self._index is not None:
+            self._index.close()
+        if self._trends is not None:
+            self._trends.close()
+        if self._graph is not None:
+            self._graph.close()
+        if self._resources is not None:
+            self._resources.close()
+
+    def _background_done(self, future):
+        self._background.discard(future)
+        if not future.cancelled() and future.exception() is not None:
+            print(f"⚠️ Background update failed: {future.exception()}", file=sys.stderr)
+
+    async def call_tool(self, tool_name: str, arguments: dict) -> dict:
+        """ツール実行（同一ツール・同一引数の同時呼び出しは結果を共有。UNCOALESCED_TOOLS を除く）
+
+        進捗通知は、実行中に合流した呼び出し元も含め、待っている全員へそれぞれのprogressTokenで送る。
+        """
+        handler = getattr(self, tool_name)
+        if tool_name in UNCOALESCED_TOOLS:
+            # 呼び出しごとに別のキー（進捗通知はこの呼び出し元だけに送る）
+            key = (tool_name, object())
+        else:
+            key = (tool_name, json.dumps(arguments, sort_keys=True, ensure_ascii=False, default=str))
+        reporter = _progress_reporter.get()
+        if reporter is not None:
+            self._progress_listeners.setdefault(key, []).append(reporter)
+
+        async def run():
+            _tool_call_key.set(key)
+            return await handler(arguments)
+
+        try:
+            return await self.tool_calls.do(key, run)
+        finally:
+            if reporter is not None:
+                listeners = self._progress_listeners[key]
+                listeners.remove(reporter)
+                if not listeners:
+                    del self._progress_listeners[key]
 
     def _define_tools(self):
         """全ツール定義（MCPプロトコル準拠）"""
@@ -36,56 +2053,289 @@ class ElsevierMCPServer:
                     "properties": {
                         "query": {
                             "type": "string",
-                            "description": "検索キーワード（例: 'machine learning', '著者名', '分野名'）"
+                            "description": "検索キーワード（例: 'machine learning', '著者名', '分野名'）"
+                        },
+                        "count": {
+                            "type": "integer",
+                            "description": "取得件数（最大25）",
+                            "minimum": 1,
+                            "maximum": 25
+                        },
+                        "year": {
+                            "type": "string",
+                            "description": "発行年（YYYY形式）"
+                        },
+                        "local_first": {
+                            "type": "boolean",
+                            "description": "trueの場合、ローカルインデックスで件数を満たせればScopusへ問い合わせずに返します"
+                        },
+                        "max_results": {
+                            "type": "integer",
+                            "description": "ページングモードで取得する最大件数（指定すると25件を超えてカーソルページングで取得し、ページ単位で返します）",
+                            "minimum": 1,
+                            "maximum": SEARCH_MAX_RESULTS
+                        },
+                        **OUTPUT_FORMAT_PROPERTIES
+                    },
+                    "required": ["query"]
+                }
+            },
+            "search_local": {
+                "name": "search_local",
+                "description": "過去に取得した論文・抄録のローカル全文インデックスを検索します（BM25順、Scopusへは問い合わせません）。",
+                "inputSchema": {
+                    "type": "object",
+                    "properties": {
+                        "query": {
+                            "type": "string",
+                            "description": "検索キーワード（タイトル・抄録・著者・雑誌名が対象）"
+                        },
+                        "count": {
+                            "type": "integer",
+                            "description": "取得件数（最大100）",
+                            "minimum": 1,
+                            "maximum": 100
+                        },
+                        "year_from": {
+                            "type": "integer",
+                            "description": "発行年の下限"
+                        },
+                        "year_to": {
+                            "type": "integer",
+                            "description": "発行年の上限"
+                        },
+                        "journal": {
+                            "type": "string",
+                            "description": "雑誌名（部分一致）"
+                        },
+                        **OUTPUT_FORMAT_PROPERTIES
+                    },
+                    "required": ["query"]
+                }
+            },
+            "get_paper_abstract": {
+                "name": "get_paper_abstract",
+                "description": "論文のEIDまたはDOIから詳細な抄録とメタデータを取得します。",
+                "inputSchema": {
+                    "type": "object",
+                    "properties": {
+                        "eid": {
+                            "type": "string",
+                            "description": "論文のElsevier ID（EID）"
+                        },
+                        "doi": {
+                            "type": "string",
+                            "description": "論文のDigital Object Identifier（DOI）"
+                        },
+                        **RESPONSE_PROPERTIES
+                    }
+                }
+            },
+            "get_paper_abstracts_batch": {
+                "name": "get_paper_abstracts_batch",
+                "description": "複数論文のEID/DOIから抄録とメタデータを一括取得します。重複は除外し、キャッシュ済みのものは再取得しません。結果は入力順に返します。",
+                "inputSchema": {
+                    "type": "object",
+                    "properties": {
+                        "ids": {
+                            "type": "array",
+                            "items": {"type": "string"},
+                            "description": "EIDまたはDOIのリスト（'10.'で始まるものはDOIとして扱います。最大200件）",
+                            "maxItems": ABSTRACT_BATCH_MAX_IDS
+                        },
+                        **OUTPUT_FORMAT_PROPERTIES
+                    },
+                    "required": ["ids"]
+                }
+            },
+            "get_author_info": {
+                "name": "get_author_info",
+                "description": "著者IDから研究者の詳細プロファイルを取得します。",
+                "inputSchema": {
+                    "type": "object",
+                    "properties": {
+                        "author_id": {
+                            "type": "string",
+                            "description": "Scopus著者ID"
+                        },
+                        **RESPONSE_PROPERTIES
+                    },
+                    "required": ["author_id"]
+                }
+            },
+            "get_authors_batch": {
+                "name": "get_authors_batch",
+                "description": "複数の著者（Scopus著者IDまたはORCID）のプロファイルとSciValメトリクスを一括取得します。IDは複数件ずつ1リクエストにまとめ、取得済みのプロファイルはキャッシュから返します。結果は入力順に返します。",
+                "inputSchema": {
+                    "type": "object",
+                    "properties": {
+                        "ids": {
+                            "type": "array",
+                            "items": {"type": "string"},
+                            "description": "Scopus著者IDまたはORCID（0000-0000-0000-0000形式）のリスト（最大200件）",
+                            "maxItems": AUTHOR_BATCH_MAX_IDS
+                        },
+                        "metrics": {
+                            "type": "array",
+                            "items": {"type": "string"},
+                            "description": "SciValのmetricType（デフォルト: ScholarlyOutput, CitationCount, FieldWeightedCitationImpact, HIndices）。空リストでメトリクスを取得しません"
+                        },
+                        "year_range": {
+                            "type": "string",
+                            "description": "SciValの集計期間（例: 3yrs, 5yrs, 10yrs）",
+                            "default": "5yrs"
+                        },
+                        **OUTPUT_FORMAT_PROPERTIES
+                    },
+                    "required": ["ids"]
+                }
+            },
+            "start_export": {
+                "name": "start_export",
+                "description": "Scopus検索結果の全件をバックグラウンドでファイル（JSONL / Parquet）にエクスポートします。レート制限内でページングし、ページごとにチェックポイントを保存するため、サーバーが停止しても次回起動時に続きから再開します。ジョブIDと出力先のパスを返します。進捗は job_status、完了後は job_result で確認します。",
+                "inputSchema": {
+                    "type": "object",
+                    "properties": {
+                        "query": {
+                            "type": "string",
+                            "description": "Scopus検索クエリ（例: TITLE-ABS-KEY(machine learning)）"
                         },
-                        "count": {
-                            "type": "integer",
-                            "description": "取得件数（最大25）",
-                            "minimum": 1,
-                            "maximum": 25
+                        "institution": {
+                            "type": "string",
+                            "description": "機関名（aff() 条件として追加）"
                         },
                         "year": {
+                            "type": "integer",
+                            "description": "出版年（year_to と組み合わせると範囲）"
+                        },
+                        "year_to": {
+                            "type": "integer",
+                            "description": "出版年の範囲の終わり"
+                        },
+                        "max_results": {
+                            "type": "integer",
+                            "description": "エクスポートする最大件数（省略時は全件）",
+                            "maximum": EXPORT_MAX_RESULTS
+                        },
+                        "output": {
                             "type": "string",
-                            "description": "発行年（YYYY形式）"
-                        }
-                    },
-                    "required": ["query"]
+                            "enum": ["jsonl", "parquet"],
+                            "description": "出力形式（デフォルト: jsonl。parquet にはpyarrowが必要）",
+                            "default": "jsonl"
+                        },
+                        "columns": {
+                            "type": "array",
+                            "items": {"type": "string"},
+                            "description": "出力する論文フィールド（例: ['title', 'year', 'citations', 'eid']）。Scopusへの取得項目も絞ります。省略時は全フィールド"
+                        },
+                        **RESPONSE_PROPERTIES
+                    }
                 }
             },
-            "get_paper_abstract": {
-                "name": "get_paper_abstract",
-                "description": "論文のEIDまたはDOIから詳細な抄録とメタデータを取得します。",
+            "job_status": {
+                "name": "job_status",
+                "description": "エクスポートジョブの状態と進捗（取得件数、割合、経過時間、残り時間の目安）を返します。job_idを省略するとすべてのジョブを返します。",
                 "inputSchema": {
                     "type": "object",
                     "properties": {
-                        "eid": {
+                        "job_id": {
                             "type": "string",
-                            "description": "論文のElsevier ID（EID）"
+                            "description": "start_export が返したジョブID"
                         },
-                        "doi": {
-                            "type": "string",
-                            "description": "論文のDigital Object Identifier（DOI）"
-                        }
+                        **RESPONSE_PROPERTIES
                     }
                 }
             },
-            "get_author_info": {
-                "name": "get_author_info",
-                "description": "著者IDから研究者の詳細プロファイルを取得します。",
+            "job_result": {
+                "name": "job_result",
+                "description": "完了したエクスポートジョブの出力ファイルのパス・URI・件数と、先頭数件のプレビューを返します。",
                 "inputSchema": {
                     "type": "object",
                     "properties": {
-                        "author_id": {
+                        "job_id": {
                             "type": "string",
-                            "description": "Scopus著者ID"
-                        }
+                            "description": "start_export が返したジョブID"
+                        },
+                        "preview": {
+                            "type": "integer",
+                            "description": "プレビューとして返す件数",
+                            "default": 5,
+                            "minimum": 0,
+                            "maximum": EXPORT_PREVIEW_MAX
+                        },
+                        **OUTPUT_FORMAT_PROPERTIES
                     },
-                    "required": ["author_id"]
+                    "required": ["job_id"]
+                }
+            },
+            "build_citation_graph": {
+                "name": "build_citation_graph",
+                "description": "起点論文から参考文献（Abstract Retrieval view=REF）と被引用論文（REFEID検索）を幅優先でたどり、引用ネットワークを構築します。ノードと辺はローカルのグラフストアに保存し、展開済みのノードは再取得しません。入次数・出次数と上位のハブ論文を返します。",
+                "inputSchema": {
+                    "type": "object",
+                    "properties": {
+                        "eid": {
+                            "type": "string",
+                            "description": "起点論文のEID"
+                        },
+                        "doi": {
+                            "type": "string",
+                            "description": "起点論文のDOI（EIDがない場合）"
+                        },
+                        "direction": {
+                            "type": "string",
+                            "enum": ["references", "citing", "both"],
+                            "description": "たどる方向（デフォルト: both）",
+                            "default": "both"
+                        },
+                        "depth": {
+                            "type": "integer",
+                            "description": "起点からの深さ",
+                            "default": 1,
+                            "minimum": 1,
+                            "maximum": GRAPH_MAX_DEPTH
+                        },
+                        "max_nodes": {
+                            "type": "integer",
+                            "description": "ノード数の上限（到達したら新しいノードを追加しません）",
+                            "default": 500,
+                            "maximum": GRAPH_MAX_NODES
+                        },
+                        "max_references": {
+                            "type": "integer",
+                            "description": "1論文あたりに取得する参考文献の上限",
+                            "default": 40,
+                            "maximum": 200
+                        },
+                        "max_citing": {
+                            "type": "integer",
+                            "description": "1論文あたりに取得する被引用論文の上限（被引用数の多い順）",
+                            "default": 25,
+                            "maximum": 200
+                        },
+                        "top_n": {
+                            "type": "integer",
+                            "description": "返すハブ論文の件数",
+                            "default": 10,
+                            "maximum": 100
+                        },
+                        "include_edges": {
+                            "type": "boolean",
+                            "description": "辺の一覧（[引用元EID, 引用先EID]）を含める",
+                            "default": False
+                        },
+                        "refresh": {
+                            "type": "boolean",
+                            "description": "グラフストアの展開結果を使わずに再取得する",
+                            "default": False
+                        },
+                        **OUTPUT_FORMAT_PROPERTIES
+                    }
                 }
             },
             "analyze_research_trends": {
                 "name": "analyze_research_trends",
-                "description": "指定された研究分野の年別論文数推移を分析します。",
+                "description": "指定された研究分野の年別（または月別・任意期間別）論文数推移を分析します。過去の集計は保存され、前回のスナップショットとの差分も返します。",
                 "inputSchema": {
                     "type": "object",
                     "properties": {
@@ -97,7 +2347,29 @@ class ElsevierMCPServer:
                             "type": "array",
                             "items": {"type": "integer"},
                             "description": "分析対象年のリスト（例: [2022, 2023, 2024]）"
-                        }
+                        },
+                        "months": {
+                            "type": "array",
+                            "items": {"type": "string"},
+                            "description": "分析対象月のリスト（YYYY-MM形式、例: ['2024-01', '2024-02']）"
+                        },
+                        "ranges": {
+                            "type": "array",
+                            "items": {
+                                "type": "object",
+                                "properties": {
+                                    "from": {"type": "integer"},
+                                    "to": {"type": "integer"}
+                                },
+                                "required": ["from", "to"]
+                            },
+                            "description": "任意の年範囲のリスト（例: [{'from': 2015, 'to': 2019}, {'from': 2020, 'to': 2024}]）"
+                        },
+                        "refresh": {
+                            "type": "boolean",
+                            "description": "trueの場合、保存済みの集計を使わずすべての期間を再取得します"
+                        },
+                        **RESPONSE_PROPERTIES
                     },
                     "required": ["field"]
                 }
@@ -109,17 +2381,56 @@ class ElsevierMCPServer:
                     "type": "object",
                     "properties": {
                         "institution": {
-                            "type": "string",
-                            "description": "機関名（例: 'MIT', 'Stanford University'）"
+                            "type": ["string", "array"],
+                            "items": {"type": "string"},
+                            "description": "機関名（例: 'MIT', 'Stanford University'）。リストを指定すると全機関を合わせた被引用数上位を返します"
                         },
                         "year": {
                             "type": "integer",
                             "description": "対象年"
-                        }
+                        },
+                        "year_to": {
+                            "type": "integer",
+                            "description": "対象期間の最終年（指定すると year〜year_to の期間）"
+                        },
+                        "count": {
+                            "type": "integer",
+                            "description": "上位論文の件数（デフォルト: 5）",
+                            "minimum": 1,
+                            "maximum": MERGE_TOP_MAX
+                        },
+                        **OUTPUT_FORMAT_PROPERTIES
                     },
                     "required": ["institution"]
                 }
             },
+            "compare_institutions": {
+                "name": "compare_institutions",
+                "description": "複数機関・複数年の論文数を並行して集計し、機関×年の表と機関別の被引用数上位論文を返します。progressTokenを指定するとセルごとに結果を通知します。",
+                "inputSchema": {
+                    "type": "object",
+                    "properties": {
+                        "institutions": {
+                            "type": "array",
+                            "items": {"type": "string"},
+                            "description": "機関名のリスト（例: ['MIT', 'Stanford University']）"
+                        },
+                        "years": {
+                            "type": "array",
+                            "items": {"type": "integer"},
+                            "description": "対象年のリスト（例: [2020, 2021, 2022, 2023, 2024]）"
+                        },
+                        "top_papers": {
+                            "type": "integer",
+                            "description": "機関ごとに返す被引用数上位論文の件数（全対象年、0で省略、デフォルト: 3）",
+                            "minimum": 0,
+                            "maximum": 25
+                        },
+                        **OUTPUT_FORMAT_PROPERTIES
+                    },
+                    "required": ["institutions", "years"]
+                }
+            },
             "search_open_access_papers": {
                 "name": "search_open_access_papers",
                 "description": "指定された分野のオープンアクセス論文を検索します。",
@@ -127,58 +2438,193 @@ class ElsevierMCPServer:
                     "type": "object",
                     "properties": {
                         "field": {
-                            "type": "string",
-                            "description": "研究分野（例: 'machine learning', 'climate change'）"
+                            "type": ["string", "array"],
+                            "items": {"type": "string"},
+                            "description": "研究分野（例: 'machine learning', 'climate change'）。リストを指定すると全分野を合わせた被引用数上位を返します"
                         },
                         "count": {
                             "type": "integer",
-                            "description": "取得件数",
+                            "description": "取得件数（単一分野・単年は最大20）",
                             "minimum": 1,
-                            "maximum": 20
-                        }
+                            "maximum": MERGE_TOP_MAX
+                        },
+                        "year": {
+                            "type": "integer",
+                            "description": "対象年（デフォルト: 2024）"
+                        },
+                        "year_to": {
+                            "type": "integer",
+                            "description": "対象期間の最終年（指定すると year〜year_to の期間）"
+                        },
+                        **OUTPUT_FORMAT_PROPERTIES
                     },
                     "required": ["field"]
                 }
+            },
+            "get_server_metrics": {
+                "name": "get_server_metrics",
+                "description": "サーバー内部の計測値（ツール別・エンドポイント別のレイテンシ、ステータスコード、キャッシュヒット率、同時実行数）を取得します。",
+                "inputSchema": {
+                    "type": "object",
+                    "properties": {
+                        "format": {
+                            "type": "string",
+                            "enum": ["json", "prometheus"],
+                            "description": "出力形式（デフォルト: json）"
+                        },
+                        **RESPONSE_PROPERTIES
+                    }
+                }
+            },
+            "get_api_quota": {
+                "name": "get_api_quota",
+                "description": "APIキーの残りクォータ（APIファミリー別）とレート制限の状態を取得します。",
+                "inputSchema": {
+                    "type": "object",
+                    "properties": dict(RESPONSE_PROPERTIES)
+                }
             }
         }
 
+    async def report_progress(self, progress: int, total: int = None, message: str = None):
+        """結果を待っている呼び出し元のうちprogressTokenを指定したものへ進捗通知を送る"""
+        key = _tool_call_key.get()
+        reporters = list(self._progress_listeners.get(key, ())) if key is not None else ()
+        for token, notify in reporters:
+            params = {"progressToken": token, "progress": progress}
+            if total is not None:
+                params["total"] = total
+            if message:
+                params["message"] = message
+            try:
+                await notify({"jsonrpc": "2.0", "method": "notifications/progress", "params": params})
+            except OSError:
+                # 切断した呼び出し元のために、他の呼び出し元と共有している実行を止めない
+                pass
+
+    @staticmethod
+    def scopus_field_param(arguments: dict) -> str:
+        """fields引数をScopusのfieldパラメータに変換（指定なし・対応項目なしはNone）"""
+        fields = arguments.get("fields")
+        if not fields:
+            return None
+        names = [SCOPUS_FIELDS[name] for name in fields if name in SCOPUS_FIELDS]
+        return ",".join(OrderedDict.fromkeys(names)) or None
+
+    @staticmethod
+    def _paper_from_entry(entry: dict) -> "PaperRecord":
+        """Scopus検索エントリを論文情報に変換"""
+        return PaperRecord(
+            title=entry.get('dc:title', 'No title'),
+            authors=entry.get('dc:creator', 'Unknown'),
+            journal=entry.get('prism:publicationName', 'Unknown'),
+            year=entry.get('prism:coverDate', ''),
+            citations=int(entry.get('citedby-count', 0)),
+            doi=entry.get('prism:doi', ''),
+            eid=entry.get('eid', '')
+        )
+
+    async def iter_search_pages(self, search_query: str, max_results: int,
+                                sort: str = "citedby-count", timeout: float = 15, field_param: str = None,
+                                prefetch: bool = True):
+        """Scopusカーソルページングで検索結果をページ単位に返す非同期ジェネレータ
+
+        現在のページを呼び出し元が処理している間に次ページを先読みする
+        （prefetch=False では次ページを要求された時点で取得する）。
+        (total_results, entries) を順に返す。
+        """
+        url = f"{BASE_URL}/content/search/scopus"
+        params = {
+            "query": search_query,
+            "count": min(SEARCH_PAGE_SIZE, max_results),
+            "cursor": "*",
+            "sort": sort
+        }
+        if field_param:
+            params["field"] = field_param
+        # カーソルは時間が経つと無効になるためキャッシュを通さない
+        next_page = asyncio.ensure_future(self.http.get(url, params=dict(params), timeout=timeout, use_cache=False))
+        fetched = 0
+        try:
+            while next_page is not None:
+                response = await next_page
+                next_page = None
+                if not response.ok:
+                    raise RuntimeError(response.error)
+
+                results = response.json().get('search-results', {})
+                total = int(results.get('opensearch:totalResults', 0))
+                entries = results.get('entry', [])
+                # 0件時は {"error": "Result set was empty"} のエントリが1つ返る
+                entries = [entry for entry in entries if 'error' not in entry][:max_results - fetched]
+                fetched += len(entries)
+
+                next_cursor = results.get('cursor', {}).get('@next')
+                if entries and next_cursor and fetched < min(max_results, total):
+                    params["cursor"] = next_cursor
+                    params["count"] = min(SEARCH_PAGE_SIZE, max_results - fetched)
+                    next_page = self.http.get(url, params=dict(params), timeout=timeout, use_cache=False)
+                    if prefetch:
+                        next_page = asyncio.ensure_future(next_page)
+
+                yield total, entries
+        finally:
+            if asyncio.isfuture(next_page):
+                next_page.cancel()
+            elif next_page is not None:
+                next_page.close()
+
     async def search_papers(self, arguments: dict) -> dict:
         """論文検索"""
         query = arguments.get("query", "")
         count = arguments.get("count", 10)
         year = arguments.get("year", "")
+        max_results = arguments.get("max_results")
 
         # クエリ構築
         search_query = f"TITLE-ABS-KEY({query})"
         if year:
             search_query += f" AND PUBYEAR = {year}"
 
+        field_param = self.scopus_field_param(arguments)
+
+        if max_results:
+            return await self._search_papers_paginated(query, search_query, min(int(max_results), SEARCH_MAX_RESULTS),
+                                                       field_param)
+
+        # ローカルインデックスで件数を満たせればScopusへ問い合わせない
+        if arguments.get("local_first") and self.index is not None:
+            loop = asyncio.get_running_loop()
+            year_filter = int(year) if str(year).isdigit() else None
+            local_papers = await loop.run_in_executor(
+                None, self.index.search, query, min(count, 25), year_filter, year_filter)
+            if local_papers and len(local_papers) >= min(count, 25):
+                return {
+                    "success": True,
+                    "source": "local",
+                    "local_matches": len(local_papers),
+                    "papers": local_papers,
+                    "query": query
+                }
+
         url = f"{BASE_URL}/content/search/scopus"
         params = {
             "query": search_query,
             "count": min(count, 25),
             "sort": "citedby-count"
         }
+        if field_param:
+            params["field"] = field_param
 
         try:
-            response = requests.get(url, headers=HEADERS, params=params, timeout=15)
+            response = await self.http.get(url, params=params, timeout=15)
             if response.ok:
                 data = response.json()
                 entries = data.get('search-results', {}).get('entry', [])
                 total = data.get('search-results', {}).get('opensearch:totalResults', 0)
 
-                results = []
-                for entry in entries:
-                    paper = {
-                        "title": entry.get('dc:title', 'No title'),
-                        "authors": entry.get('dc:creator', 'Unknown'),
-                        "journal": entry.get('prism:publicationName', 'Unknown'),
-                        "year": entry.get('prism:coverDate', ''),
-                        "citations": int(entry.get('citedby-count', 0)),
-                        "doi": entry.get('prism:doi', ''),
-                        "eid": entry.get('eid', '')
-                    }
-                    results.append(paper)
+                results = [self._paper_from_entry(entry) for entry in entries]
+                self._index_papers(results, field_param)
 
                 return {
                     "success": True,
@@ -187,11 +2633,90 @@ class ElsevierMCPServer:
                     "query": query
                 }
             else:
-                return {"success": False, "error": f"API Error: {response.status_code}"}
+                return {"success": False, "error": response.error}
+
+        except Exception as e:
+            return {"success": False, "error": str(e)}
+
+    async def search_local(self, arguments: dict) -> dict:
+        """ローカルインデックス検索"""
+        query = arguments.get("query", "")
+        count = min(int(arguments.get("count", 10)), 100)
 
+        if not query.strip():
+            return {"success": False, "error": "queryが必要です"}
+        if self.index is None:
+            return {"success": False, "error": "ローカルインデックスは無効です（ELSEVIER_MCP_INDEX=0）"}
+
+        try:
+            loop = asyncio.get_running_loop()
+            papers = await loop.run_in_executor(
+                None, self.index.search, query, count,
+                arguments.get("year_from"), arguments.get("year_to"), arguments.get("journal"))
+            return {
+                "success": True,
+                "source": "local",
+                "ranking": "bm25" if self.index.fts else "citations",
+                "indexed_papers": await loop.run_in_executor(None, self.index.size),
+                "papers": papers,
+                "query": query
+            }
         except Exception as e:
             return {"success": False, "error": str(e)}
 
+    async def _search_papers_paginated(self, query: str, search_query: str, max_results: int,
+                                       field_param: str = None) -> dict:
+        """ページングモードの論文検索（ページごとに進捗通知）"""
+        pages = []
+        total = 0
+        returned = 0
+        try:
+            async for total, entries in self.iter_search_pages(search_query, max_results,
+                                                               field_param=field_param):
+                pages.append([self._paper_from_entry(entry) for entry in entries])
+                self._index_papers(pages[-1], field_param)
+                returned += len(entries)
+                await self.report_progress(returned, min(total, max_results),
+                                           f"page {len(pages)}: {returned} papers")
+        except Exception as e:
+            if not pages:
+                return {"success": False, "error": str(e)}
+            # 取得済みページは返し、途中で失敗したことを明示する
+            return {"success": True, "partial": True, "error": str(e), "total_results": total,
+                    "returned": returned, "query": query, "pages": pages}
+
+        return {
+            "success": True,
+            "total_results": total,
+            "returned": returned,
+            "query": query,
+            "pages": pages
+        }
+
+    @staticmethod
+    def _abstract_url(eid: str = "", doi: str = "") -> str:
+        """抄録取得URL（EID優先）"""
+        if eid:
+            return f"{BASE_URL}/content/abstract/eid/{eid}"
+        return f"{BASE_URL}/content/abstract/doi/{doi}"
+
+    @staticmethod
+    def _paper_from_abstract(data: dict) -> "PaperRecord":
+        """Abstract Retrievalレスポンスのcoredataを論文情報に変換"""
+        abstract_response = data.get('abstracts-retrieval-response', {})
+        coredata = abstract_response.get('coredata', {})
+
+        return PaperRecord(
+            title=coredata.get('dc:title', 'No title'),
+            abstract=coredata.get('dc:description', 'No abstract'),
+            authors=coredata.get('dc:creator', 'Unknown'),
+            journal=coredata.get('prism:publicationName', 'Unknown'),
+            year=coredata.get('prism:coverDate', ''),
+            doi=coredata.get('prism:doi', ''),
+            eid=coredata.get('eid', ''),
+            citations=coredata.get('citedby-count', '0')
+        )
+
     async def get_paper_abstract(self, arguments: dict) -> dict:
         """論文抄録取得"""
         eid = arguments.get("eid", "")
@@ -200,144 +2725,835 @@ class ElsevierMCPServer:
         if not eid and not doi:
             return {"success": False, "error": "EIDまたはDOIが必要です"}
 
-        # EID優先
-        if eid:
-            url = f"{BASE_URL}/content/abstract/eid/{eid}"
-        else:
-            url = f"{BASE_URL}/content/abstract/doi/{doi}"
+        url = self._abstract_url(eid, doi)
+        field_param = self.scopus_field_param(arguments)
+        params = {"field": field_param} if field_param else None
+
+        try:
+            response = await self.http.get(url, params=params, timeout=10)
+            if response.ok:
+                paper = self._paper_from_abstract(response.json())
+                self._index_papers([paper], field_param)
+                return {"success": True, "paper": paper}
+            else:
+                return {"success": False, "error": response.error}
+
+        except Exception as e:
+            return {"success": False, "error": str(e)}
+
+    async def get_paper_abstracts_batch(self, arguments: dict) -> dict:
+        """論文抄録の一括取得"""
+        ids = arguments.get("ids", [])
+
+        if not ids:
+            return {"success": False, "error": "idsが必要です"}
+        if len(ids) > ABSTRACT_BATCH_MAX_IDS:
+            return {"success": False, "error": f"idsは最大{ABSTRACT_BATCH_MAX_IDS}件です"}
+
+        # 重複を除き、DOI（'10.'で始まる）とEIDを判別
+        unique_ids = list(OrderedDict.fromkeys(str(item).strip() for item in ids if str(item).strip()))
+        urls = {
+            item: self._abstract_url(doi=item) if item.startswith("10.") else self._abstract_url(eid=item)
+            for item in unique_ids
+        }
+        field_param = self.scopus_field_param(arguments)
+        params = {"field": field_param} if field_param else None
+        outcomes = {}
+
+        # キャッシュ済みを先に返す
+        for item in unique_ids:
+            data = await self.http.get_cached(urls[item], params)
+            if data is not None:
+                outcomes[item] = {"success": True, "cached": True, "paper": self._paper_from_abstract(data)}
+
+        semaphore = asyncio.Semaphore(ABSTRACT_BATCH_CONCURRENCY)
+
+        async def fetch(item):
+            try:
+                async with semaphore:
+                    response = await self.http.get(urls[item], params=params, timeout=10)
+                if response.ok:
+                    paper = self._paper_from_abstract(response.json())
+                    self._index_papers([paper], field_param)
+                    outcomes[item] = {"success": True, "cached": False, "paper": paper}
+                else:
+                    outcomes[item] = {"success": False, "error": response.error}
+            except Exception as e:
+                outcomes[item] = {"success": False, "error": str(e)}
+
+        missing = [item for item in unique_ids if item not in outcomes]
+        await asyncio.gather(*[fetch(item) for item in missing])
+
+        # 入力順で返す
+        results = []
+        for item in ids:
+            key = str(item).strip()
+            results.append(dict(outcomes.get(key, {"success": False, "error": "空のIDです"}), id=item))
+
+        return {
+            "success": True,
+            "requested": len(ids),
+            "unique": len(unique_ids),
+            "from_cache": len(unique_ids) - len(missing),
+            "fetched": len(missing),
+            "failed": sum(1 for result in results if not result["success"]),
+            "results": results
+        }
+
+    async def get_author_info(self, arguments: dict) -> dict:
+        """著者情報取得"""
+        author_id = arguments.get("author_id", "")
+
+        if not author_id:
+            return {"success": False, "error": "author_idが必要です"}
+
+        url = f"{BASE_URL}/analytics/scival/author/{author_id}"
 
         try:
-            response = requests.get(url, headers=HEADERS, timeout=10)
+            response = await self.http.get(url, timeout=10)
             if response.ok:
                 data = response.json()
-                abstract_response = data.get('abstracts-retrieval-response', {})
-                coredata = abstract_response.get('coredata', {})
+                author_data = data.get('author', {})
 
                 result = {
-                    "title": coredata.get('dc:title', 'No title'),
-                    "abstract": coredata.get('dc:description', 'No abstract'),
-                    "authors": coredata.get('dc:creator', 'Unknown'),
-                    "journal": coredata.get('prism:publicationName', 'Unknown'),
-                    "year": coredata.get('prism:coverDate', ''),
-                    "doi": coredata.get('prism:doi', ''),
-                    "eid": coredata.get('eid', ''),
-                    "citations": coredata.get('citedby-count', '0')
+                    "author_id": author_id,
+                    "name": author_data.get('name', 'Unknown'),
+                    "current_institution": author_data.get('currentInstitutionName', 'Unknown'),
+                    "scopus_url": author_data.get('link', {}).get('@href', '')
                 }
 
-                return {"success": True, "paper": result}
+                return {"success": True, "author": result}
+            else:
+                return {"success": False, "error": response.error}
+
+        except Exception as e:
+            return {"success": False, "error": str(e)}
+
+    @staticmethod
+    def _author_url(author_id: str) -> str:
+        return f"{BASE_URL}/content/author/author_id/{author_id}"
+
+    @staticmethod
+    def _author_entries(data: dict) -> list:
+        """Author Retrievalレスポンス（単独・複数ID）から著者ごとのエントリを取り出す"""
+        if "author-retrieval-response-list" in data:
+            data = data["author-retrieval-response-list"] or {}
+        entries = data.get("author-retrieval-response") or []
+        return entries if isinstance(entries, list) else [entries]
+
+    @staticmethod
+    def _author_id_of(entry: dict) -> str:
+        coredata = entry.get("coredata") or {}
+        return str(coredata.get("dc:identifier", "")).replace("AUTHOR_ID:", "")
+
+    @classmethod
+    def _author_from_retrieval(cls, entry: dict) -> dict:
+        """Author Retrievalの著者エントリをプロファイルに変換"""
+        coredata = entry.get("coredata") or {}
+        author_profile = entry.get("author-profile") or {}
+        preferred = (entry.get("preferred-name") or author_profile.get("preferred-name")
+                     or coredata.get("preferred-name") or {})
+        name = preferred.get("ce:indexed-name") or ", ".join(
+            part for part in (preferred.get("surname"), preferred.get("given-name")) if part)
+        affiliation = entry.get("affiliation-current") or {}
+        if isinstance(affiliation, list):
+            affiliation = affiliation[0] if affiliation else {}
+        links = coredata.get("link") or []
+        if isinstance(links, dict):
+            links = [links]
+        return {
+            "author_id": cls._author_id_of(entry),
+            "orcid": coredata.get("orcid", ""),
+            "name": name or "Unknown",
+            "current_institution": affiliation.get("affiliation-name", "Unknown"),
+            "document_count": coredata.get("document-count", "0"),
+            "cited_by_count": coredata.get("cited-by-count", "0"),
+            "citation_count": coredata.get("citation-count", "0"),
+            "scopus_url": next((link.get("@href", "") for link in links
+                                if link.get("@rel") == "scopus-author"), ""),
+        }
+
+    @staticmethod
+    def _metrics_from_scival(result: dict) -> dict:
+        """SciVal Author Metricsの1著者分を {metricType: 値} に変換（年別指定時は年別の値）"""
+        metrics = {}
+        for metric in result.get("metrics") or []:
+            name = metric.get("metricType", "Unknown")
+            metrics[name] = metric["value"] if "value" in metric else metric.get("valueByYear")
+        return metrics
+
+    async def get_authors_batch(self, arguments: dict) -> dict:
+        """著者プロファイルとSciValメトリクスの一括取得
+
+        著者IDは AUTHOR_RETRIEVAL_CHUNK / SCIVAL_METRICS_CHUNK 件ずつ1リクエストにまとめ、
+        結果は著者ごとに単独取得と同じキーでキャッシュする。
+        """
+        ids = arguments.get("ids", [])
+
+        if not ids:
+            return {"success": False, "error": "idsが必要です"}
+        if len(ids) > AUTHOR_BATCH_MAX_IDS:
+            return {"success": False, "error": f"idsは最大{AUTHOR_BATCH_MAX_IDS}件です"}
+
+        metric_types = arguments.get("metrics")
+        if metric_types is None:
+            metric_types = list(SCIVAL_DEFAULT_METRICS)
+        year_range = arguments.get("year_range") or "5yrs"
+
+        unique_ids = list(OrderedDict.fromkeys(str(item).strip().upper() for item in ids if str(item).strip()))
+        outcomes = {}
+        author_ids = {}
+        for item in unique_ids:
+            if item.isdigit():
+                author_ids[item] = item
+            elif ORCID_PATTERN.match(item):
+                if item in self._orcid_ids:
+                    author_ids[item] = self._orcid_ids[item]
+            else:
+                outcomes[item] = {"success": False, "error": "Scopus著者IDまたはORCIDではありません"}
+
+        semaphore = asyncio.Semaphore(ABSTRACT_BATCH_CONCURRENCY)
+        profiles = {}
+        cached = set()
+        errors = {}
+        upstream_requests = [0]
+
+        # 1. 未知のORCIDをScopus著者IDに変換（新しく取得した応答はそのままプロファイルとして使う）
+        async def resolve(orcid):
+            try:
+                async with semaphore:
+                    response = await self.http.get(f"{BASE_URL}/content/author/orcid/{orcid}", timeout=10)
+                if not response.from_cache:
+                    upstream_requests[0] += 1
+                entries = self._author_entries(response.json()) if response.ok else []
+                author_id = self._author_id_of(entries[0]) if entries else ""
+                if not author_id:
+                    outcomes[orcid] = {"success": False,
+                                       "error": response.error if not response.ok else "著者が見つかりません"}
+                    return
+                self._orcid_ids[orcid] = author_ids[orcid] = author_id
+                if not response.from_cache:
+                    profiles[author_id] = entries[0]
+                    await self.http.put_cached(self._author_url(author_id), None,
+                                               {"author-retrieval-response": [entries[0]]})
+            except Exception as e:
+                outcomes[orcid] = {"success": False, "error": str(e)}
+
+        await asyncio.gather(*[resolve(item) for item in unique_ids
+                               if item not in outcomes and item not in author_ids])
+
+        wanted = list(OrderedDict.fromkeys(author_ids.values()))
+        for author_id in wanted:
+            if author_id in profiles:
+                continue
+            data = await self.http.get_cached(self._author_url(author_id))
+            entries = self._author_entries(data) if data is not None else []
+            if entries:
+                profiles[author_id] = entries[0]
+                cached.add(author_id)
+
+        # 2. 残りのプロファイルとメトリクスを複数IDずつまとめて取得
+        metrics_url = f"{BASE_URL}/analytics/scival/author/metrics"
+        metrics_params = {"metricTypes": ",".join(metric_types), "yearRange": year_range}
+        metrics = {}
+        metric_errors = {}
+        if metric_types:
+            for author_id in wanted:
+                data = await self.http.get_cached(metrics_url, dict(metrics_params, authors=author_id))
+                if data is not None and data.get("results"):
+                    metrics[author_id] = self._metrics_from_scival(data["results"][0])
+
+        async def fetch_profiles(chunk):
+            try:
+                async with semaphore:
+                    upstream_requests[0] += 1
+                    response = await self.http.get(f"{BASE_URL}/content/author",
+                                                   params={"author_id": ",".join(chunk)}, timeout=30)
+                if not response.ok:
+                    errors.update((author_id, response.error) for author_id in chunk)
+                    return
+                stores = []
+                for entry in self._author_entries(response.json()):
+                    author_id = self._author_id_of(entry)
+                    if author_id in chunk:
+                        profiles[author_id] = entry
+                        stores.append(self.http.put_cached(self._author_url(author_id), None,
+                                                           {"author-retrieval-response": [entry]}))
+                await asyncio.gather(*stores)
+            except Exception as e:
+                errors.update((author_id, str(e)) for author_id in chunk)
+
+        async def fetch_metrics(chunk):
+            try:
+                async with semaphore:
+                    upstream_requests[0] += 1
+                    response = await self.http.get(metrics_url, params=dict(metrics_params, authors=",".join(chunk)),
+                                                   timeout=30, use_cache=False)
+                if not response.ok:
+                    metric_errors.update((author_id, response.error) for author_id in chunk)
+                    return
+                stores = []
+                for result in response.json().get("results") or []:
+                    author_id = str((result.get("author") or {}).get("id", ""))
+                    if author_id in chunk:
+                        metrics[author_id] = self._metrics_from_scival(result)
+                        stores.append(self.http.put_cached(metrics_url, dict(metrics_params, authors=author_id),
+                                                           {"results": [result]}))
+                await asyncio.gather(*stores)
+            except Exception as e:
+                metric_errors.update((author_id, str(e)) for author_id in chunk)
+
+        missing = [author_id for author_id in wanted if author_id not in profiles]
+        missing_metrics = [author_id for author_id in wanted if metric_types and author_id not in metrics]
+        await asyncio.gather(
+            *[fetch_profiles(missing[start:start + AUTHOR_RETRIEVAL_CHUNK])
+              for start in range(0, len(missing), AUTHOR_RETRIEVAL_CHUNK)],
+            *[fetch_metrics(missing_metrics[start:start + SCIVAL_METRICS_CHUNK])
+              for start in range(0, len(missing_metrics), SCIVAL_METRICS_CHUNK)]
+        )
+
+        # 入力順で返す
+        results = []
+        for item in ids:
+            key = str(item).strip().upper()
+            author_id = author_ids.get(key)
+            if not key:
+                outcome = {"success": False, "error": "空のIDです"}
+            elif key in outcomes:
+                outcome = outcomes[key]
+            elif author_id not in profiles:
+                outcome = {"success": False, "error": errors.get(author_id, "著者が見つかりません")}
             else:
-                return {"success": False, "error": f"API Error: {response.status_code}"}
+                outcome = dict({"success": True, "cached": author_id in cached},
+                               **self._author_from_retrieval(profiles[author_id]))
+                if metric_types:
+                    outcome["metrics"] = metrics.get(author_id, {})
+                    if author_id in metric_errors:
+                        outcome["metrics_error"] = metric_errors[author_id]
+            results.append(dict(outcome, id=item))
+
+        if self.resources is not None:
+            self._in_background(self.resources.put, [
+                (f"elsevier://author/{result['author_id']}", result["name"],
+                 {key: value for key, value in result.items() if key not in ("success", "cached", "id")})
+                for result in results if result["success"] and "metrics_error" not in result
+            ])
+
+        return {
+            "success": True,
+            "requested": len(ids),
+            "unique": len(unique_ids),
+            "from_cache": len(cached),
+            "upstream_requests": upstream_requests[0],
+            "failed": sum(1 for result in results if not result["success"]),
+            "results": results
+        }
+
+    @staticmethod
+    def _paper_from_reference(entry: dict):
+        """view=REF の参考文献1件を論文情報に変換（ScopusのIDがない文献はNone）"""
+        eid = entry.get("scopus-eid") or (f"2-s2.0-{entry['scopus-id']}" if entry.get("scopus-id") else "")
+        if not eid:
+            return None
+        authors = (entry.get("author-list") or {}).get("author") or []
+        if isinstance(authors, dict):
+            authors = [authors]
+        return PaperRecord(
+            title=entry.get("title") or "No title",
+            authors=authors[0].get("ce:indexed-name", "Unknown") if authors else "Unknown",
+            journal=entry.get("sourcetitle") or "Unknown",
+            year=entry.get("prism:coverDate") or "",
+            citations=int(entry.get("citedby-count") or 0),
+            eid=eid
+        )
+
+    async def _fetch_references(self, eid: str, limit: int) -> list:
+        """参考文献（Abstract Retrieval view=REF、startref/refcount でページング）"""
+        url = self._abstract_url(eid)
+        papers = OrderedDict()
+        start = 0
+        while len(papers) < limit:
+            params = {"view": "REF", "startref": start, "refcount": GRAPH_REFERENCE_PAGE_SIZE}
+            response = await self.http.get(url, params=params, timeout=15)
+            if not response.ok:
+                raise RuntimeError(response.error)
+            references = (response.json().get("abstracts-retrieval-response") or {}).get("references") or {}
+            entries = references.get("reference") or []
+            if isinstance(entries, dict):
+                entries = [entries]
+            for entry in entries:
+                paper = self._paper_from_reference(entry)
+                if paper is not None and paper.eid != eid:
+                    papers.setdefault(paper.eid, paper)
+            start += len(entries)
+            if not entries or start >= int(references.get("@total-references") or 0):
+                break
+        return list(papers.values())[:limit]
+
+    async def _fetch_citing(self, eid: str, limit: int) -> list:
+        """被引用論文（REFEID検索、被引用数の多い順）"""
+        papers = OrderedDict()
+        async for _, entries in self.iter_search_pages(f"REFEID({eid})", limit, field_param=GRAPH_CITING_FIELDS,
+                                                       prefetch=False):
+            for entry in entries:
+                paper = self._paper_from_entry(entry)
+                if paper.eid and paper.eid != eid:
+                    papers.setdefault(paper.eid, paper)
+        return list(papers.values())[:limit]
+
+    async def build_citation_graph(self, arguments: dict) -> dict:
+        """引用ネットワークの幅優先クロール
+
+        深さごとに、前の深さで見つかったノードを GRAPH_CONCURRENCY 件ずつ並列に展開する。
+        展開結果はノード単位でグラフストアに保存し、次回以降（中断後の再実行を含む）は再利用する。
+        """
+        eid = arguments.get("eid", "")
+        doi = arguments.get("doi", "")
+        direction = arguments.get("direction", "both")
+
+        if not eid and not doi:
+            return {"success": False, "error": "EIDまたはDOIが必要です"}
+        if direction not in ("references", "citing", "both"):
+            return {"success": False, "error": "directionはreferences、citing、bothのいずれかです"}
+
+        depth = min(max(int(arguments.get("depth", 1)), 1), GRAPH_MAX_DEPTH)
+        max_nodes = min(max(int(arguments.get("max_nodes", 500)), 1), GRAPH_MAX_NODES)
+        limits = {
+            "references": min(max(int(arguments.get("max_references", 40)), 1), 200),
+            "citing": min(max(int(arguments.get("max_citing", 25)), 1), 200),
+        }
+        top_n = min(max(int(arguments.get("top_n", 10)), 0), 100)
+        refresh = bool(arguments.get("refresh"))
+        directions = ("references", "citing") if direction == "both" else (direction,)
 
+        # 起点論文の書誌（DOI指定時はここでEIDを得る）
+        try:
+            response = await self.http.get(self._abstract_url(eid, doi), timeout=10)
+            if not response.ok:
+                return {"success": False, "error": response.error}
+            seed = self._paper_from_abstract(response.json())
         except Exception as e:
             return {"success": False, "error": str(e)}
+        seed_eid = seed.eid or eid
+        if not seed_eid:
+            return {"success": False, "error": "起点論文のEIDを取得できませんでした"}
+        seed.eid = seed_eid
 
-    async def get_author_info(self, arguments: dict) -> dict:
-        """著者情報取得"""
-        author_id = arguments.get("author_id", "")
+        graph = self.graph
+        loop = asyncio.get_running_loop()
+        semaphore = asyncio.Semaphore(GRAPH_CONCURRENCY)
+        papers = {seed_eid: seed}
+        depth_of = {seed_eid: 0}
+        edges = set()
+        errors = {}
+        counts = {"fetched": 0, "from_store": 0}
+        node_limit_reached = False
+        if graph is not None:
+            await loop.run_in_executor(None, graph.put_papers, [seed])
 
-        if not author_id:
-            return {"success": False, "error": "author_idが必要です"}
+        async def expand(node, way):
+            """(node, way, 隣接ノードのEID一覧, エラー) を返す"""
+            limit = limits[way]
+            try:
+                if graph is not None and not refresh:
+                    max_age = None if way == "references" else GRAPH_STALE_DAYS * 24 * 3600
+                    stored = await loop.run_in_executor(None, graph.expanded, node, way, limit, max_age)
+                    if stored is not None:
+                        counts["from_store"] += 1
+                        return node, way, stored, None
+                async with semaphore:
+                    if way == "references":
+                        found = await self._fetch_references(node, limit)
+                    else:
+                        found = await self._fetch_citing(node, limit)
+                counts["fetched"] += 1
+                for paper in found:
+                    papers.setdefault(paper.eid, paper)
+                if graph is not None:
+                    await loop.run_in_executor(None, graph.save_expansion, node, way, limit, found)
+                return node, way, [paper.eid for paper in found], None
+            except Exception as e:
+                return node, way, [], str(e)
 
-        url = f"{BASE_URL}/analytics/scival/author/{author_id}"
+        frontier = [seed_eid]
+        done = 0
+        for level in range(1, depth + 1):
+            tasks = [asyncio.ensure_future(expand(node, way)) for node in frontier for way in directions]
+            total = done + len(tasks)
+            for task in asyncio.as_completed(tasks):
+                await task
+                done += 1
+                await self.report_progress(done, total, f"depth {level}: {done}/{total} expansions")
+            # 完了順ではなく展開順に反映し、ノード数の上限に達した場合も毎回同じグラフにする
+            next_frontier = []
+            for task in tasks:
+                node, way, neighbours, error = await task
+                if error is not None:
+                    errors[f"{node}/{way}"] = error
+                for neighbour in neighbours:
+                    if neighbour not in depth_of:
+                        if len(depth_of) >= max_nodes:
+                            node_limit_reached = True
+                            continue
+                        depth_of[neighbour] = level
+                        next_frontier.append(neighbour)
+                    edges.add((node, neighbour) if way == "references" else (neighbour, node))
+            frontier = next_frontier
+            if not frontier or node_limit_reached:
+                break
 
-        try:
-            response = requests.get(url, headers=HEADERS, timeout=10)
-            if response.ok:
-                data = response.json()
-                author_data = data.get('author', {})
+        # 次数はクロールしたサブグラフ内で数える
+        in_degree = {}
+        out_degree = {}
+        for citing, cited in edges:
+            out_degree[citing] = out_degree.get(citing, 0) + 1
+            in_degree[cited] = in_degree.get(cited, 0) + 1
+        hubs = heapq.nlargest(top_n, depth_of, key=lambda node: (
+            in_degree.get(node, 0) + out_degree.get(node, 0), in_degree.get(node, 0)))
+        missing = [node for node in hubs if node not in papers]
+        if missing and graph is not None:
+            papers.update(await loop.run_in_executor(None, graph.papers, missing))
 
-                result = {
-                    "author_id": author_id,
-                    "name": author_data.get('name', 'Unknown'),
-                    "current_institution": author_data.get('currentInstitutionName', 'Unknown'),
-                    "scopus_url": author_data.get('link', {}).get('@href', '')
-                }
+        top_papers = []
+        for node in hubs:
+            row = papers[node].to_dict() if node in papers else {"eid": node}
+            row.pop("abstract", None)
+            row.update(in_degree=in_degree.get(node, 0), out_degree=out_degree.get(node, 0), depth=depth_of[node])
+            top_papers.append(row)
 
-                return {"success": True, "author": result}
-            else:
-                return {"success": False, "error": f"API Error: {response.status_code}"}
+        node_count = len(depth_of)
+        reached = max(depth_of.values())
+        result = {
+            "success": len(errors) < done,
+            "seed": seed_eid,
+            "direction": direction,
+            "depth": reached,
+            "nodes": node_count,
+            "edges": len(edges),
+            "nodes_by_depth": [sum(1 for value in depth_of.values() if value == level)
+                               for level in range(reached + 1)],
+            "expansions": {"fetched": counts["fetched"], "from_store": counts["from_store"]},
+            "degree": {
+                "mean": round(2 * len(edges) / node_count, 2),
+                "max_in": max(in_degree.values() or [0]),
+                "max_out": max(out_degree.values() or [0]),
+            },
+            "top_papers": top_papers
+        }
+        if node_limit_reached:
+            result["node_limit_reached"] = True
+        if arguments.get("include_edges"):
+            result["edge_list"] = sorted(list(edge) for edge in edges)
+        if errors:
+            result["partial"] = True
+            result["errors"] = errors
+        return result
 
-        except Exception as e:
-            return {"success": False, "error": str(e)}
+    @staticmethod
+    def _trend_periods(arguments: dict) -> list:
+        """集計期間の一覧 [(種別, ラベル, Scopusクエリ条件, 期間の最終年)]"""
+        periods = []
+        months = arguments.get("months") or []
+        ranges = arguments.get("ranges") or []
+        years = arguments.get("years")
+        if years is None and not months and not ranges:
+            years = [2022, 2023, 2024]
+        for year in years or []:
+            periods.append(("year", int(year), f"PUBYEAR = {int(year)}", int(year)))
+        for month in months:
+            date = datetime.strptime(str(month), "%Y-%m")
+            periods.append(("month", date.strftime("%Y-%m"), f'PUBDATETXT("{date.strftime("%B %Y")}")', date.year))
+        for period_range in ranges:
+            low, high = sorted((int(period_range["from"]), int(period_range["to"])))
+            periods.append(("range", f"{low}-{high}", f"PUBYEAR > {low - 1} AND PUBYEAR < {high + 1}", high))
+        return periods
 
     async def analyze_research_trends(self, arguments: dict) -> dict:
-        """研究分野トレンド分析"""
+        """研究分野トレンド分析
+
+        保存済みの期間は、今年・前年を含むものは検索キャッシュの有効期間、
+        それより前のものは TREND_STALE_DAYS を過ぎた場合のみ再取得する。
+        """
         field = arguments.get("field", "")
-        years = arguments.get("years", [2022, 2023, 2024])
 
         if not field:
             return {"success": False, "error": "research fieldが必要です"}
+        try:
+            periods = self._trend_periods(arguments)
+        except (ValueError, KeyError, TypeError) as e:
+            return {"success": False, "error": f"期間の指定が不正です: {e}"}
 
         url = f"{BASE_URL}/content/search/scopus"
-        yearly_data = {}
+        base_query = f"TITLE-ABS-KEY({field})"
+        semaphore = asyncio.Semaphore(TREND_QUERY_CONCURRENCY)
+        refresh = bool(arguments.get("refresh"))
+
+        async def fetch_period_total(label, clause):
+            params = {
+                "query": f"{base_query} AND {clause}",
+                "count": 1,
+                # 件数のみ使うため、エントリの項目は最小限にする
+                "field": "dc:identifier"
+            }
+            try:
+                async with semaphore:
+                    response = await self.http.get(url, params=params, timeout=10, use_cache=not refresh)
+                if not response.ok:
+                    return label, None, response.error
+                data = response.json()
+                total = int(data.get('search-results', {}).get('opensearch:totalResults', 0))
+                return label, total, None
+            except Exception as e:
+                return label, None, str(e)
 
         try:
-            for year in years:
-                params = {
-                    "query": f"TITLE-ABS-KEY({field}) AND PUBYEAR = {year}",
-                    "count": 1
-                }
+            keys = {label: str(label) for _, label, _, _ in periods}
+            loop = asyncio.get_running_loop()
+            stored = {}
+            if self.trends is not None:
+                stored = await loop.run_in_executor(None, self.trends.get, base_query, list(keys.values()))
 
-                response = requests.get(url, headers=HEADERS, params=params, timeout=10)
-                if response.ok:
-                    data = response.json()
-                    total = int(data.get('search-results', {}).get('opensearch:totalResults', 0))
-                    yearly_data[year] = total
-
-            # 成長率計算
-            growth_rates = {}
-            years_sorted = sorted(yearly_data.keys())
-            for i in range(1, len(years_sorted)):
-                prev_year = years_sorted[i-1]
-                curr_year = years_sorted[i]
-                if yearly_data[prev_year] > 0:
-                    growth_rate = ((yearly_data[curr_year] - yearly_data[prev_year]) / yearly_data[prev_year]) * 100
-                    growth_rates[f"{prev_year}-{curr_year}"] = round(growth_rate, 2)
+            # 再取得が必要な期間を判定
+            now = time.time()
+            recent_year = datetime.now().year - 1
+            stale = []
+            for kind, label, clause, last_year in periods:
+                snapshot = stored.get(keys[label])
+                if refresh or snapshot is None:
+                    stale.append((label, clause))
+                    continue
+                max_age = CACHE_TTLS["/content/search/"] if last_year >= recent_year else TREND_STALE_DAYS * 86400
+                if now - snapshot[1] > max_age:
+                    stale.append((label, clause))
 
-            return {
-                "success": True,
+            # 期間別の件数クエリを並行実行
+            outcomes = await asyncio.gather(*[fetch_period_total(label, clause) for label, clause in stale])
+
+            counts = {label: stored[keys[label]][0] for label in keys if keys[label] in stored}
+            fetched = {}
+            errors = {}
+            # 再取得に失敗し、保存済みの件数を使った期間（→ 保存時刻）
+            outdated = {}
+            for label, total, error in outcomes:
+                if error is None:
+                    counts[label] = total
+                    fetched[keys[label]] = total
+                else:
+                    errors[label] = error
+                    if label in counts:
+                        outdated[label] = datetime.fromtimestamp(
+                            stored[keys[label]][1]).isoformat(timespec="seconds")
+            if fetched and self.trends is not None:
+                await loop.run_in_executor(None, self.trends.put, base_query, fetched)
+
+            # 前回スナップショットとの差分（今回再取得した期間のみ）
+            deltas = {}
+            for label in keys:
+                snapshot = stored.get(keys[label])
+                if keys[label] in fetched and snapshot is not None:
+                    deltas[label] = {
+                        "count": counts[label],
+                        "previous": snapshot[0],
+                        "change": counts[label] - snapshot[0],
+                        "previous_fetched_at": datetime.fromtimestamp(snapshot[1]).isoformat(timespec="seconds")
+                    }
+
+            series = {
+                kind: {label: counts[label] for k, label, _, _ in periods if k == kind and label in counts}
+                for kind in ("year", "month", "range")
+            }
+            result = {
+                "success": bool(counts) or not errors,
                 "field": field,
-                "yearly_papers": yearly_data,
-                "growth_rates": growth_rates,
-                "total_papers": sum(yearly_data.values())
+                "yearly_papers": series["year"],
+                "growth_rates": self._growth_rates(series["year"], "{}-{}"),
+                # 年別がなければ月別（月別もなければ期間別）の合計
+                "total_papers": sum(next((values for values in series.values() if values), {}).values())
+            }
+            if series["month"]:
+                result["monthly_papers"] = series["month"]
+                result["monthly_growth_rates"] = self._growth_rates(series["month"], "{}→{}")
+            if series["range"]:
+                result["range_papers"] = series["range"]
+                result["range_growth_rates"] = self._growth_rates(series["range"], "{}→{}")
+
+            result["snapshot"] = {
+                "stored": self.trends is not None,
+                "refreshed": len(fetched),
+                "from_store": len(keys) - len(stale)
             }
+            if deltas:
+                result["deltas"] = deltas
+            if errors:
+                result["partial"] = True
+                result["errors"] = errors
+            if outdated:
+                result["stale"] = outdated
+            return result
 
         except Exception as e:
             return {"success": False, "error": str(e)}
 
+    @staticmethod
+    def _growth_rates(series: dict, label_format: str) -> dict:
+        """期間順に並べた件数の成長率（%）"""
+        growth_rates = {}
+        labels = sorted(series.keys())
+        for i in range(1, len(labels)):
+            prev_label = labels[i-1]
+            curr_label = labels[i]
+            if series[prev_label] > 0:
+                growth_rate = ((series[curr_label] - series[prev_label]) / series[prev_label]) * 100
+                growth_rates[label_format.format(prev_label, curr_label)] = round(growth_rate, 2)
+        return growth_rates
+
+    @staticmethod
+    def _year_clause(year, year_to=None) -> str:
+        """対象年（または期間）のScopusクエリ条件"""
+        if year_to and int(year_to) != int(year):
+            low, high = sorted((int(year), int(year_to)))
+            return f"PUBYEAR > {low - 1} AND PUBYEAR < {high + 1}"
+        return f"PUBYEAR = {year}"
+
+    @classmethod
+    def _years_clause(cls, years: list) -> str:
+        """昇順の年リストのScopusクエリ条件（連続していなければ年ごとのOR）"""
+        if years[-1] - years[0] == len(years) - 1:
+            return cls._year_clause(years[0], years[-1])
+        return "(" + " OR ".join(f"PUBYEAR = {year}" for year in years) + ")"
+
+    async def merge_top_papers(self, search_queries: list, top_n: int, field_param: str = None) -> dict:
+        """複数クエリの被引用数順の結果をk-wayマージし、全体の上位N件を返す
+
+        各クエリの先頭ページを並行取得し、ヒープで各クエリの先頭エントリを比較する。
+        あるクエリのバッファが尽きた時だけ次ページを取得し、上位N件が確定した時点で
+        取得を打ち切る。EIDが重複する論文は最初の1件のみ残す。
+        """
+        # 上位が確定した時点で止められるよう、次ページは必要になるまで取得しない
+        sources = [self.iter_search_pages(search_query, top_n, field_param=field_param, prefetch=False)
+                   for search_query in search_queries]
+        buffers = [deque() for _ in sources]
+        exhausted = [False] * len(sources)
+        totals = [0] * len(sources)
+        errors = {}
+        stats = {"queries": len(sources), "pages_fetched": 0, "entries_fetched": 0, "duplicates": 0}
+
+        async def refill(index):
+            try:
+                total, entries = await sources[index].__anext__()
+                totals[index] = total
+                buffers[index].extend(entries)
+                stats["pages_fetched"] += 1
+                stats["entries_fetched"] += len(entries)
+            except StopAsyncIteration:
+                exhausted[index] = True
+            except Exception as e:
+                exhausted[index] = True
+                errors[search_queries[index]] = str(e)
+
+        def push_head(index):
+            if buffers[index]:
+                entry = buffers[index].popleft()
+                heapq.heappush(heap, (-int(entry.get('citedby-count', 0)), index, next(sequence), entry))
+
+        heap = []
+        sequence = iter(range(1 << 62))
+        top = []
+        seen = set()
+        try:
+            await asyncio.gather(*[refill(index) for index in range(len(sources))])
+            for index in range(len(sources)):
+                push_head(index)
+
+            while heap and len(top) < top_n:
+                _, index, _, entry = heapq.heappop(heap)
+                # 取り出したクエリの次の先頭をヒープに入れる（バッファが空なら次ページを待つ）
+                if not buffers[index] and not exhausted[index]:
+                    await refill(index)
+                push_head(index)
+
+                eid = entry.get('eid')
+                if eid and eid in seen:
+                    stats["duplicates"] += 1
+                    continue
+                seen.add(eid)
+                top.append(entry)
+        finally:
+            for source in sources:
+                await source.aclose()
+
+        return {"entries": top, "totals": totals, "errors": errors, "stats": stats}
+
+    async def _merged_paper_search(self, labels: list, search_queries: list, top_n: int,
+                                   field_param: str = None) -> dict:
+        """merge_top_papers の結果をツール出力の共通部分に変換"""
+        merged = await self.merge_top_papers(search_queries, top_n, field_param)
+        papers = [self._paper_from_entry(entry) for entry in merged["entries"]]
+        self._index_papers(papers, field_param)
+        result = {
+            "success": len(merged["errors"]) < len(search_queries),
+            "totals": dict(zip(labels, merged["totals"])),
+            "papers": papers,
+            "merge": merged["stats"]
+        }
+        if merged["errors"]:
+            result["partial"] = True
+            result["errors"] = merged["errors"]
+        return result
+
     async def get_institution_papers(self, arguments: dict) -> dict:
         """機関論文統計"""
         institution = arguments.get("institution", "")
         year = arguments.get("year", 2024)
+        year_to = arguments.get("year_to")
+        count = min(int(arguments.get("count", 5)), MERGE_TOP_MAX)
 
         if not institution:
             return {"success": False, "error": "institution nameが必要です"}
 
+        field_param = self.scopus_field_param(arguments)
+        year_clause = self._year_clause(year, year_to)
+
+        # 複数機関・期間指定・25件超は各クエリの被引用数順ページをマージする
+        if isinstance(institution, list) or (year_to and year_to != year) or count > SEARCH_PAGE_SIZE:
+            institutions = institution if isinstance(institution, list) else [institution]
+            try:
+                merged = await self._merged_paper_search(
+                    institutions, [f"aff({name}) AND {year_clause}" for name in institutions], count, field_param)
+            except Exception as e:
+                return {"success": False, "error": str(e)}
+            result = {
+                "success": merged["success"],
+                "institution": institution,
+                "year": year if not year_to else f"{min(year, year_to)}-{max(year, year_to)}",
+                "total_papers": sum(merged["totals"].values()),
+                "total_papers_by_institution": merged["totals"],
+                "top_papers": merged["papers"],
+                "merge": merged["merge"]
+            }
+            if merged.get("partial"):
+                result.update(partial=True, errors=merged["errors"])
+            return result
+
         url = f"{BASE_URL}/content/search/scopus"
         params = {
-            "query": f"aff({institution}) AND PUBYEAR = {year}",
-            "count": 5,
+            "query": f"aff({institution}) AND {year_clause}",
+            "count": count,
             "sort": "citedby-count"
         }
+        if field_param:
+            params["field"] = field_param
 
         try:
-            response = requests.get(url, headers=HEADERS, params=params, timeout=15)
+            response = await self.http.get(url, params=params, timeout=15)
             if response.ok:
                 data = response.json()
                 entries = data.get('search-results', {}).get('entry', [])
+                # 複数クエリのマージ時と同じ形のレコードにする
+                top_papers = [self._paper_from_entry(entry) for entry in entries]
+                self._index_papers([paper for paper in top_papers if paper.eid], field_param)
                 total = int(data.get('search-results', {}).get('opensearch:totalResults', 0))
 
-                top_papers = []
-                for entry in entries:
-                    paper = {
-                        "title": entry.get('dc:title', 'No title'),
-                        "authors": entry.get('dc:creator', 'Unknown'),
-                        "journal": entry.get('prism:publicationName', 'Unknown'),
-                        "citations": int(entry.get('citedby-count', 0)),
-                        "doi": entry.get('prism:doi', '')
-                    }
-                    top_papers.append(paper)
-
                 return {
                     "success": True,
                     "institution": institution,
@@ -346,45 +3562,166 @@ class ElsevierMCPServer:
                     "top_papers": top_papers
                 }
             else:
-                return {"success": False, "error": f"API Error: {response.status_code}"}
+                return {"success": False, "error": response.error}
 
         except Exception as e:
             return {"success": False, "error": str(e)}
 
+    async def compare_institutions(self, arguments: dict) -> dict:
+        """複数機関・複数年の論文数比較"""
+        institutions = list(OrderedDict.fromkeys(arguments.get("institutions") or []))
+        years = sorted(set(int(year) for year in arguments.get("years") or []))
+        top_count = max(0, min(int(arguments.get("top_papers", 3)), 25))
+
+        if not institutions or not years:
+            return {"success": False, "error": "institutionsとyearsが必要です"}
+        if len(institutions) * len(years) > COMPARE_MAX_CELLS:
+            return {"success": False, "error": f"機関数×年数は最大{COMPARE_MAX_CELLS}です"}
+
+        url = f"{BASE_URL}/content/search/scopus"
+        semaphore = asyncio.Semaphore(TREND_QUERY_CONCURRENCY)
+        field_param = self.scopus_field_param(arguments)
+
+        async def fetch_cell(institution, year):
+            # 件数のみ使うため count=1 でエントリの項目も最小限にする
+            params = {
+                "query": f"aff({institution}) AND PUBYEAR = {year}",
+                "count": 1,
+                "field": "dc:identifier"
+            }
+            try:
+                async with semaphore:
+                    response = await self.http.get(url, params=params, timeout=10)
+                if not response.ok:
+                    return institution, year, None, response.error
+                total = int(response.json().get('search-results', {}).get('opensearch:totalResults', 0))
+                return institution, year, total, None
+            except Exception as e:
+                return institution, year, None, str(e)
+
+        async def fetch_top(institution):
+            params = {
+                "query": f"aff({institution}) AND {self._years_clause(years)}",
+                "count": top_count,
+                "sort": "citedby-count"
+            }
+            if field_param:
+                params["field"] = field_param
+            try:
+                async with semaphore:
+                    response = await self.http.get(url, params=params, timeout=15)
+                if not response.ok:
+                    return institution, None, response.error
+                entries = response.json().get('search-results', {}).get('entry', [])
+                papers = [self._paper_from_entry(entry) for entry in entries if 'error' not in entry]
+                self._index_papers(papers, field_param)
+                return institution, papers, None
+            except Exception as e:
+                return institution, None, str(e)
+
+        matrix = {institution: {} for institution in institutions}
+        errors = {}
+        cells = [fetch_cell(institution, year) for institution in institutions for year in years]
+        top_tasks = [asyncio.ensure_future(fetch_top(institution)) for institution in institutions] if top_count else []
+
+        # 完了したセルから順に進捗通知で返す
+        try:
+            for done, cell in enumerate(asyncio.as_completed(cells), 1):
+                institution, year, total, error = await cell
+                if error is None:
+                    matrix[institution][year] = total
+                    message = f"{institution} {year}: {total}"
+                else:
+                    errors[f"{institution}/{year}"] = error
+                    message = f"{institution} {year}: error"
+                await self.report_progress(done, len(cells), message)
+            top_outcomes = await asyncio.gather(*top_tasks)
+        finally:
+            for task in top_tasks:
+                task.cancel()
+
+        top_papers = {}
+        for institution, papers, error in top_outcomes:
+            if error is None:
+                top_papers[institution] = papers
+            else:
+                errors[f"{institution}/top_papers"] = error
+
+        result = {
+            "success": len(errors) < len(cells) + len(top_tasks),
+            "institutions": institutions,
+            "years": years,
+            "matrix": {institution: {year: matrix[institution].get(year) for year in years}
+                       for institution in institutions},
+            "totals_by_institution": {institution: sum(matrix[institution].values())
+                                      for institution in institutions},
+            "totals_by_year": {year: sum(row.get(year, 0) for row in matrix.values()) for year in years}
+        }
+        if top_count:
+            result["top_papers"] = top_papers
+        if errors:
+            result["partial"] = True
+            result["errors"] = errors
+        return result
+
     async def search_open_access_papers(self, arguments: dict) -> dict:
         """オープンアクセス論文検索"""
         field = arguments.get("field", "")
-        count = arguments.get("count", 10)
+        count = min(int(arguments.get("count", 10)), MERGE_TOP_MAX)
+        year = arguments.get("year", 2024)
+        year_to = arguments.get("year_to")
 
         if not field:
             return {"success": False, "error": "research fieldが必要です"}
 
+        field_param = self.scopus_field_param(arguments)
+        year_clause = self._year_clause(year, year_to)
+
+        # 複数分野・期間指定・20件超は各クエリの被引用数順ページをマージする
+        if isinstance(field, list) or (year_to and year_to != year) or count > 20:
+            research_fields = field if isinstance(field, list) else [field]
+            try:
+                merged = await self._merged_paper_search(
+                    research_fields,
+                    [f"TITLE-ABS-KEY({name}) AND OPENACCESS(1) AND {year_clause}" for name in research_fields],
+                    count, field_param)
+            except Exception as e:
+                return {"success": False, "error": str(e)}
+            for paper in merged["papers"]:
+                paper.open_access = True
+            result = {
+                "success": merged["success"],
+                "field": field,
+                "total_open_access": sum(merged["totals"].values()),
+                "total_open_access_by_field": merged["totals"],
+                "papers": merged["papers"],
+                "merge": merged["merge"]
+            }
+            if merged.get("partial"):
+                result.update(partial=True, errors=merged["errors"])
+            return result
+
         url = f"{BASE_URL}/content/search/scopus"
         params = {
-            "query": f"TITLE-ABS-KEY({field}) AND OPENACCESS(1) AND PUBYEAR = 2024",
-            "count": min(count, 20),
+            "query": f"TITLE-ABS-KEY({field}) AND OPENACCESS(1) AND {year_clause}",
+            "count": count,
             "sort": "citedby-count"
         }
+        if field_param:
+            params["field"] = field_param
 
         try:
-            response = requests.get(url, headers=HEADERS, params=params, timeout=15)
+            response = await self.http.get(url, params=params, timeout=15)
             if response.ok:
                 data = response.json()
                 entries = data.get('search-results', {}).get('entry', [])
+                # 複数クエリのマージ時と同じ形のレコードにする
+                papers = [self._paper_from_entry(entry) for entry in entries]
+                for paper in papers:
+                    paper.open_access = True
+                self._index_papers([paper for paper in papers if paper.eid], field_param)
                 total = int(data.get('search-results', {}).get('opensearch:totalResults', 0))
 
-                papers = []
-                for entry in entries:
-                    paper = {
-                        "title": entry.get('dc:title', 'No title'),
-                        "authors": entry.get('dc:creator', 'Unknown'),
-                        "journal": entry.get('prism:publicationName', 'Unknown'),
-                        "citations": int(entry.get('citedby-count', 0)),
-                        "doi": entry.get('prism:doi', ''),
-                        "open_access": True
-                    }
-                    papers.append(paper)
-
                 return {
                     "success": True,
                     "field": field,
@@ -392,64 +3729,580 @@ class ElsevierMCPServer:
                     "papers": papers
                 }
             else:
-                return {"success": False, "error": f"API Error: {response.status_code}"}
+                return {"success": False, "error": response.error}
+
+        except Exception as e:
+            return {"success": False, "error": str(e)}
+
+    def _launch_export(self, job: dict) -> bool:
+        """ジョブをバックグラウンドで開始（このプロセスまたは他のプロセスで実行中ならFalse）"""
+        job_id = job["job_id"]
+        if job_id in self._export_tasks or not self.exports.lock(job_id):
+            return False
+        task = asyncio.ensure_future(self._run_export(job))
+        self._export_tasks[job_id] = task
+        task.add_done_callback(lambda _: self._export_tasks.pop(job_id, None))
+        return True
+
+    async def resume_exports(self):
+        """前回のプロセスで完了しなかったジョブをチェックポイントから再開（初回のinitialize時に1度だけ）"""
+        if self._exports_resumed:
+            return
+        self._exports_resumed = True
+        if not os.path.isdir(EXPORT_DIR):
+            return
+        try:
+            jobs = await asyncio.get_running_loop().run_in_executor(None, self.exports.jobs)
+        except OSError as e:
+            print(f"⚠️ Export jobs not resumed: {e}", file=sys.stderr)
+            return
+        for job in jobs:
+            if job["status"] in ("queued", "running"):
+                self._launch_export(job)
 
+    async def _run_export(self, job: dict):
+        """エクスポートジョブ本体（同時実行数は EXPORT_MAX_JOBS）"""
+        store = self.exports
+        loop = asyncio.get_running_loop()
+        if self._export_slots is None:
+            self._export_slots = asyncio.Semaphore(EXPORT_MAX_JOBS)
+        try:
+            async with self._export_slots:
+                job.update(status="running", started_at=job["started_at"] or time.time())
+                await loop.run_in_executor(None, store.save, job)
+                await self._harvest(job)
+                if job["format"] == "parquet":
+                    await loop.run_in_executor(None, store.write_parquet, job)
+                job.update(status="completed", finished_at=time.time())
+                await loop.run_in_executor(None, store.save, job)
+        except asyncio.CancelledError:
+            # サーバー終了時。状態は queued / running のまま残し、次回起動時に再開する
+            raise
         except Exception as e:
+            job.update(status="failed", error=str(e), finished_at=time.time())
+            await loop.run_in_executor(None, store.save, job)
+        finally:
+            store.unlock(job["job_id"])
+
+    async def _harvest(self, job: dict):
+        """Scopusカーソルページングで全件を取得し、ページごとに追記・チェックポイントする
+
+        再開時のカーソルが失効していた場合は先頭から取り直し、出力済みの件数分を読み飛ばす。
+        """
+        store = self.exports
+        loop = asyncio.get_running_loop()
+        url = f"{BASE_URL}/content/search/scopus"
+        fields = job.get("fields")
+        await loop.run_in_executor(None, store.rewind, job)
+
+        skip = 0
+        resumed = job["cursor"] != "*"
+        cursor = job["cursor"]
+        while True:
+            limit = job["max_results"] if job["total"] is None else min(job["max_results"], job["total"])
+            if job["fetched"] >= limit:
+                break
+            params = {"query": job["query"], "count": SEARCH_PAGE_SIZE, "cursor": cursor}
+            if job.get("field"):
+                params["field"] = job["field"]
+            response = await self.http.get(url, params=params, timeout=30, use_cache=False)
+            if not response.ok:
+                if resumed and skip == 0 and job["fetched"]:
+                    cursor, skip, resumed = "*", job["fetched"], False
+                    continue
+                raise RuntimeError(response.error)
+            resumed = False
+
+            results = response.json().get('search-results', {})
+            total = int(results.get('opensearch:totalResults', 0))
+            entries = [entry for entry in results.get('entry', []) if 'error' not in entry]
+            next_cursor = results.get('cursor', {}).get('@next')
+            dropped = min(skip, len(entries))
+            skip -= dropped
+            papers = [self._paper_from_entry(entry) for entry in entries[dropped:]]
+            papers = papers[:max(0, min(job["max_results"], total) - job["fetched"])]
+
+            data = b"".join(dumps_bytes(paper.to_dict(fields)) + b"\n" for paper in papers)
+            await loop.run_in_executor(None, store.append, job, data, len(papers), next_cursor or cursor, total)
+            self.metrics.inc("export_records_total", (), len(papers))
+            if not entries or not next_cursor:
+                break
+            cursor = next_cursor
+
+    @staticmethod
+    def _job_summary(job: dict) -> dict:
+        """ジョブの状態と進捗"""
+        now = time.time()
+        summary = {key: job[key] for key in ("job_id", "status", "query", "format", "fetched", "total",
+                                             "pages_fetched", "error") if job.get(key) is not None}
+        target = job["max_results"] if job["total"] is None else min(job["max_results"], job["total"])
+        if target:
+            summary["percent"] = round(100.0 * job["fetched"] / target, 1)
+        if job["started_at"]:
+            elapsed = (job["finished_at"] or now) - job["started_at"]
+            summary["elapsed_seconds"] = round(elapsed, 1)
+            if elapsed > 0 and job["fetched"]:
+                rate = job["fetched"] / elapsed
+                summary["records_per_second"] = round(rate, 1)
+                if job["status"] == "running":
+                    summary["eta_seconds"] = round((target - job["fetched"]) / rate, 1)
+        summary["created_at"] = datetime.fromtimestamp(job["created_at"]).isoformat(timespec="seconds")
+        return summary
+
+    async def start_export(self, arguments: dict) -> dict:
+        """Scopus検索結果のバックグラウンド一括エクスポートを開始"""
+        query = arguments.get("query", "")
+        institution = arguments.get("institution", "")
+        year = arguments.get("year")
+        output_format = arguments.get("output", "jsonl")
+
+        if institution:
+            query = f"({query}) AND aff({institution})" if query else f"aff({institution})"
+        if year:
+            query = f"{query} AND {self._year_clause(year, arguments.get('year_to'))}" if query else \
+                self._year_clause(year, arguments.get("year_to"))
+        if not query:
+            return {"success": False, "error": "query、institution、yearのいずれかが必要です"}
+        if output_format not in ("jsonl", "parquet"):
+            return {"success": False, "error": "outputはjsonlまたはparquetです"}
+        if output_format == "parquet":
+            import importlib.util
+            if importlib.util.find_spec("pyarrow") is None:
+                return {"success": False, "error": "Parquet出力にはpyarrowが必要です（pip install pyarrow）"}
+
+        columns = arguments.get("columns")
+        spec = {
+            "query": query,
+            "max_results": min(max(int(arguments.get("max_results", EXPORT_MAX_RESULTS)), 1), EXPORT_MAX_RESULTS),
+            "format": output_format,
+            "fields": [name for name in columns if name in SCOPUS_FIELDS] if columns else None,
+            "field": self.scopus_field_param({"fields": columns}),
+        }
+        try:
+            loop = asyncio.get_running_loop()
+            job = await loop.run_in_executor(None, self.exports.create, spec)
+        except OSError as e:
+            return {"success": False, "error": str(e)}
+        self._launch_export(job)
+
+        import pathlib
+        return {
+            "success": True,
+            "job_id": job["job_id"],
+            "status": job["status"],
+            "query": query,
+            "path": job["path"],
+            "uri": pathlib.Path(job["path"]).as_uri()
+        }
+
+    async def job_status(self, arguments: dict) -> dict:
+        """エクスポートジョブの状態（job_id省略時はすべてのジョブ）"""
+        job_id = arguments.get("job_id", "")
+        loop = asyncio.get_running_loop()
+        if not job_id:
+            jobs = await loop.run_in_executor(None, self.exports.jobs)
+            return {"success": True, "jobs": [self._job_summary(job) for job in jobs]}
+
+        job = await loop.run_in_executor(None, self.exports.load, job_id)
+        if job is None:
+            return {"success": False, "error": f"ジョブが見つかりません: {job_id}"}
+        return dict({"success": True}, **self._job_summary(job))
+
+    async def job_result(self, arguments: dict) -> dict:
+        """完了したエクスポートジョブの出力ファイルと先頭数件"""
+        job_id = arguments.get("job_id", "")
+        preview = min(max(int(arguments.get("preview", 5)), 0), EXPORT_PREVIEW_MAX)
+        loop = asyncio.get_running_loop()
+
+        job = await loop.run_in_executor(None, self.exports.load, job_id)
+        if job is None:
+            return {"success": False, "error": f"ジョブが見つかりません: {job_id}"}
+        if job["status"] != "completed":
+            return dict({"success": False, "error": f"ジョブは完了していません（{job['status']}）"},
+                        **self._job_summary(job))
+
+        import pathlib
+        try:
+            papers = await loop.run_in_executor(None, self.exports.preview, job, preview)
+            size = os.path.getsize(job["path"])
+        except (OSError, ValueError) as e:
             return {"success": False, "error": str(e)}
+        return {
+            "success": True,
+            "job_id": job_id,
+            "format": job["format"],
+            "records": job["fetched"],
+            "total_results": job["total"],
+            "bytes": size,
+            "path": job["path"],
+            "uri": pathlib.Path(job["path"]).as_uri(),
+            "papers": papers
+        }
+
+    async def get_api_quota(self, arguments: dict) -> dict:
+        """APIクォータ状態"""
+        return {"success": True, "quota": self.http.limiter.snapshot()}
+
+    async def list_resources(self, cursor: str = None) -> dict:
+        """resources/list（カーソルは索引のrowid。不正なカーソルは ValueError）"""
+        if self.resources is None:
+            return {"resources": []}
+        after = int(cursor) if cursor else 0
+        rows, next_cursor = await asyncio.get_running_loop().run_in_executor(
+            None, self.resources.list, after, RESOURCE_PAGE_SIZE)
+        result = {"resources": [{"uri": uri, "name": name, "mimeType": "application/json"} for uri, name in rows]}
+        if next_cursor is not None:
+            result["nextCursor"] = str(next_cursor)
+        return result
+
+    async def read_resource(self, uri: str):
+        """resources/read の結果（PreSerialized）。存在しないURIはNone
+
+        ストアにあれば保存済みの本文をそのまま埋め込み、なければ抄録・著者は取得してから返す。
+        """
+        match = RESOURCE_URI_PATTERN.match(uri or "")
+        if match is None:
+            return None
+        kind, identifier = match.groups()
+        literal = None
+        if self.resources is not None:
+            literal = await asyncio.get_running_loop().run_in_executor(None, self.resources.read, uri)
+        if literal is not None:
+            self.metrics.inc("resource_reads_total", (("source", "store"),))
+        else:
+            if kind == "author":
+                outcome = (await self.get_authors_batch({"ids": [identifier]}))["results"][0]
+                record = {key: value for key, value in outcome.items() if key not in ("success", "cached", "id")}
+            else:
+                outcome = await self.get_paper_abstract({"eid": identifier})
+                record = outcome.get("paper")
+                if isinstance(record, PaperRecord):
+                    record = record.to_dict()
+            if not outcome["success"]:
+                return None
+            self.metrics.inc("resource_reads_total", (("source", "upstream"),))
+            literal = json.dumps(dumps_text(record), ensure_ascii=False).encode("utf-8")
+
+        head = json.dumps({"uri": uri, "mimeType": "application/json"}, ensure_ascii=False).encode("utf-8")
+        return PreSerialized.from_chunks((b'{"contents":[' + head[:-1] + b',"text":', literal, b"}]}"))
+
+    def metrics_extra(self) -> list:
+        """Prometheus出力に加えるキャッシュ・集約の統計"""
+        extra = []
+        if self.http.cache is not None:
+            cache = self.http.cache.snapshot()
+            for tier in ("memory", "disk"):
+                extra.append(("cache_hits_total", "counter", (("tier", tier),), cache[f"{tier}_hits"]))
+            extra.append(("cache_misses_total", "counter", (), cache["misses"]))
+            extra.append(("cache_evictions_total", "counter", (), cache["evictions"]))
+            extra.append(("cache_hit_ratio", "gauge", (), cache["hit_ratio"]))
+        for layer, flight in (("tool", self.tool_calls), ("upstream", self.http.inflight)):
+            extra.append(("coalesced_calls_total", "counter", (("layer", layer),), flight.stats["coalesced"]))
+        for endpoint, latency in self.http.latency.snapshot().items():
+            labels = (("endpoint", endpoint),)
+            extra.append(("upstream_timeouts_total", "counter", labels, latency["timeouts"]))
+            extra.append(("upstream_hedge_saved_seconds_total", "counter", labels, latency["hedge_saved_seconds"]))
+            if latency["adaptive_timeout_s"] is not None:
+                extra.append(("upstream_adaptive_timeout_seconds", "gauge", labels, latency["adaptive_timeout_s"]))
+        return extra
+
+    def write_metrics_file(self, path: str = METRICS_FILE):
+        """Prometheusテキストをファイルへ書き出す（node_exporter textfile collector向け）"""
+        temporary = f"{path}.tmp"
+        with open(temporary, "w", encoding="utf-8") as f:
+            f.write(self.metrics.render_prometheus(self.metrics_extra()))
+        os.replace(temporary, path)
+
+    async def get_server_metrics(self, arguments: dict) -> dict:
+        """サーバー計測値"""
+        if arguments.get("format") == "prometheus":
+            return {"success": True, "format": "prometheus",
+                    "metrics": self.metrics.render_prometheus(self.metrics_extra())}
 
-async def handle_request(server, request):
-    """MCPリクエスト処理"""
+        result = self.metrics.snapshot()
+        result["cache"] = self.http.cache.snapshot() if self.http.cache is not None else None
+        result["coalescing"] = {
+            "tool_calls": self.tool_calls.snapshot(),
+            "upstream": self.http.inflight.snapshot(),
+        }
+        result["latency"] = self.http.latency.snapshot()
+        return {"success": True, "metrics": result}
+
+_orjson = None
+
+
+def _fast_json():
+    """orjson（任意依存）を初回使用時に読み込む。なければFalse"""
+    global _orjson
+    if _orjson is None:
+        try:
+            import orjson
+            _orjson = orjson
+        except ImportError:
+            _orjson = False
+    return _orjson
+
+
+def dumps_bytes(value, pretty: bool = False) -> bytes:
+    """JSONをUTF-8のバイト列にする（orjsonがあれば使用、pretty はインデント2）"""
+    orjson = _fast_json()
+    if orjson:
+        option = orjson.OPT_NON_STR_KEYS | (orjson.OPT_INDENT_2 if pretty else 0)
+        return orjson.dumps(value, default=json_default, option=option)
+    if pretty:
+        return json.dumps(value, ensure_ascii=False, indent=2, default=json_default).encode("utf-8")
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"), default=json_default).encode("utf-8")
+
+
+def dumps_text(value, pretty: bool = False) -> str:
+    """JSONを文字列にする（標準のjsonではバイト列を経由しない）"""
+    orjson = _fast_json()
+    if orjson:
+        return dumps_bytes(value, pretty).decode("utf-8")
+    if pretty:
+        return json.dumps(value, ensure_ascii=False, indent=2, default=json_default)
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"), default=json_default)
+
+
+class PreSerialized:
+    """シリアライズ済みのJSON値（レスポンスへそのまま埋め込み、毎回の再シリアライズを避ける）
+
+    chunks は連結するとJSONになるバイト列（または memoryview）のタプル。
+    """
+
+    __slots__ = ("chunks",)
+
+    def __init__(self, value):
+        self.chunks = (json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8"),)
+
+    @classmethod
+    def from_bytes(cls, data: bytes):
+        """組み立て済みのJSONバイト列から作る"""
+        return cls.from_chunks((data,))
+
+    @classmethod
+    def from_chunks(cls, chunks: tuple):
+        """連結するとJSONになる断片から作る（連結は書き出し時まで行わない）"""
+        value = cls.__new__(cls)
+        value.chunks = tuple(chunks)
+        return value
+
+
+# initialize の結果は固定のため1度だけシリアライズする
+INITIALIZE_RESULT = PreSerialized({
+    "protocolVersion": "2024-11-05",
+    "capabilities": {
+        "tools": {},
+        "resources": {}
+    },
+    "serverInfo": {
+        "name": "elsevier-mcp-complete-server",
+        "version": "1.0.0"
+    }
+})
+
+
+# resources/templates/list の結果（固定）
+RESOURCE_TEMPLATES = PreSerialized({"resourceTemplates": [
+    {"uriTemplate": "elsevier://abstract/{eid}", "name": "Abstract",
+     "description": "論文の抄録とメタデータ（未取得ならAbstract Retrievalで取得）", "mimeType": "application/json"},
+    {"uriTemplate": "elsevier://paper/{eid}", "name": "Paper",
+     "description": "検索結果として取得済みの論文メタデータ", "mimeType": "application/json"},
+    {"uriTemplate": "elsevier://author/{author_id}", "name": "Author",
+     "description": "著者プロファイルとSciValメトリクス（未取得ならAuthor Retrievalで取得）",
+     "mimeType": "application/json"},
+]})
+
+
+def encode_chunks(message) -> list:
+    """JSON-RPCメッセージ（またはそのリスト）を、連結すると1行のJSONになる断片のリストにする
+
+    PreSerialized の結果は断片のまま埋め込み（mmap の memoryview もコピーしない）、
+    その他は1回でシリアライズする。
+    """
+    if isinstance(message, list):
+        chunks = [b"["]
+        for index, item in enumerate(message):
+            if index:
+                chunks.append(b",")
+            chunks.extend(encode_chunks(item))
+        chunks.append(b"]")
+        return chunks
+    result = message.get("result")
+    if isinstance(result, PreSerialized):
+        # 小さな外枠は標準のjsonで十分（initialize時点でorjsonを読み込まない）
+        head = json.dumps({key: value for key, value in message.items() if key != "result"},
+                          separators=(",", ":")).encode("utf-8")
+        return [head[:-1] + b',"result":', *result.chunks, b"}"]
+    return [dumps_bytes(message)]
+
+
+def encode_message(message) -> bytes:
+    """JSON-RPCメッセージ（またはそのリスト）を1行のJSON（UTF-8バイト列）にする"""
+    chunks = encode_chunks(message)
+    return chunks[0] if len(chunks) == 1 else b"".join(chunks)
+
+
+def known_fields(result: dict) -> set:
+    """fields に指定できる名前（論文を含む結果では論文・行のフィールド、それ以外は結果のキー）"""
+    rows = [result.get(key) for key in SINGLE_RECORD_KEYS if result.get(key) is not None]
+    for key in RECORD_LIST_KEYS:
+        value = result.get(key)
+        if isinstance(value, dict) and all(isinstance(item, list) for item in value.values()):
+            value = [record for records in value.values() for record in records]
+        if isinstance(value, list):
+            rows.extend(value)
+    for page in result.get("pages") or []:
+        rows.extend(page)
+    if not rows and not any(key in result for key in RECORD_LIST_KEYS + ("pages",)):
+        return set(result)
+    names = set(PaperRecord.__slots__)
+    for row in rows:
+        row = _record_row(row)
+        if isinstance(row, dict):
+            names.update(row)
+    return names
+
+
+def build_tool_content(result: dict, output_format: str = "json", fields: list = None,
+                       max_bytes: int = None) -> list:
+    """ツール結果をMCPコンテンツに変換（ページ単位の結果はページごとに分割）
+
+    output_format="compact" では論文一覧を列指向にし、インデントなしで出力する。
+    fields を指定すると論文（論文を含まない結果では結果のキー）をそのフィールドに絞る。
+    該当しない名前は無視して "ignored_fields" に示す（すべて該当しなければ絞らない）。
+    max_bytes を指定すると出力サイズが上限に収まるよう抄録と一覧を切り詰める。
+    """
+    compact = output_format == "compact"
+    if fields is not None:
+        fields = [str(name) for name in fields]
+        if isinstance(result, dict) and result.get("success", True):
+            known = known_fields(result)
+            ignored = [name for name in fields if name not in known and name not in ALWAYS_KEPT_KEYS]
+            if ignored:
+                fields = [name for name in fields if name not in ignored] or None
+                result = dict(result, ignored_fields=ignored)
+    if max_bytes:
+        result = fit_to_budget(result, max_bytes, lambda value: sum(
+            len(item["text"].encode("utf-8")) for item in build_tool_content(value, output_format, fields)))
+
+    def convert(records):
+        return to_columns(records, fields) if compact else select_fields(records, fields)
+
+    def dumps(value, indent=None):
+        return dumps_text(value, pretty=bool(indent) and not compact)
+
+    if not isinstance(result, dict):
+        return [{"type": "text", "text": dumps(result, 2)}]
+
+    pages = result.get("pages")
+    summary = {key: value for key, value in result.items() if key != "pages"}
+    if compact or fields is not None:
+        for key in RECORD_LIST_KEYS:
+            value = summary.get(key)
+            if isinstance(value, list):
+                summary[key] = convert(value)
+            elif isinstance(value, dict) and all(isinstance(item, list) for item in value.values()):
+                # 機関別など、グループごとの論文一覧
+                summary[key] = {group: convert(records) for group, records in value.items()}
+        if fields is not None:
+            single = [key for key in SINGLE_RECORD_KEYS if summary.get(key) is not None]
+            for key in single:
+                summary[key] = _record_row(summary[key], fields)
+            if pages is None and not single and not any(key in summary for key in RECORD_LIST_KEYS):
+                summary = {key: value for key, value in summary.items()
+                           if key in fields or key in ALWAYS_KEPT_KEYS}
+        if compact:
+            summary["format"] = "compact"
+    if pages is None:
+        return [{"type": "text", "text": dumps(summary, 2)}]
+
+    summary["page_count"] = len(pages)
+    content = [{"type": "text", "text": dumps(summary, 2)}]
+    for number, papers in enumerate(pages, 1):
+        content.append({
+            "type": "text",
+            "text": dumps({"page": number, "papers": convert(papers)})
+        })
+    return content
+
+async def handle_request(server, request, notify=None):
+    """MCPリクエスト処理
+
+    notify: 進捗通知などサーバー発のメッセージを送るコルーチン関数（任意）
+    idのない通知メッセージには応答しない（Noneを返す）。
+    """
     method = request.get("method")
 
+    if "id" not in request:
+        return None
+
     if method == "initialize":
+        server.http.warm_up()
+        asyncio.ensure_future(server.resume_exports())
         return {
             "jsonrpc": "2.0",
             "id": request.get("id"),
-            "result": {
-                "protocolVersion": "2024-11-05",
-                "capabilities": {
-                    "tools": {},
-                    "resources": {}
-                },
-                "serverInfo": {
-                    "name": "elsevier-mcp-complete-server",
-                    "version": "1.0.0"
-                }
-            }
+            "result": INITIALIZE_RESULT
         }
 
     elif method == "tools/list":
-        tools_list = []
-        for tool_name, tool_def in server.tools.items():
-            tools_list.append({
-                "name": tool_def["name"],
-                "description": tool_def["description"],
-                "inputSchema": tool_def["inputSchema"]
-            })
-
         return {
             "jsonrpc": "2.0",
             "id": request.get("id"),
-            "result": {"tools": tools_list}
+            "result": server.tools_list
         }
 
+    elif method == "resources/list":
+        try:
+            result = await server.list_resources(request.get("params", {}).get("cursor"))
+        except ValueError:
+            return {"jsonrpc": "2.0", "id": request.get("id"),
+                    "error": {"code": -32602, "message": "Invalid cursor"}}
+        return {"jsonrpc": "2.0", "id": request.get("id"), "result": result}
+
+    elif method == "resources/templates/list":
+        return {"jsonrpc": "2.0", "id": request.get("id"), "result": RESOURCE_TEMPLATES}
+
+    elif method == "resources/read":
+        uri = request.get("params", {}).get("uri", "")
+        result = await server.read_resource(uri)
+        if result is None:
+            return {"jsonrpc": "2.0", "id": request.get("id"),
+                    "error": {"code": -32002, "message": "Resource not found", "data": {"uri": uri}}}
+        return {"jsonrpc": "2.0", "id": request.get("id"), "result": result}
+
     elif method == "tools/call":
         tool_name = request.get("params", {}).get("name")
         arguments = request.get("params", {}).get("arguments", {})
 
         if tool_name in server.tools:
             # ツール実行
-            handler = getattr(server, tool_name)
-            result = await handler(arguments)
+            progress_token = request.get("params", {}).get("_meta", {}).get("progressToken")
+            if progress_token is not None and notify is not None:
+                _progress_reporter.set((progress_token, notify))
+
+            labels = (("tool", tool_name),)
+            started = time.perf_counter()
+            server.metrics.gauge_add("tool_in_flight", labels, 1)
+            try:
+                result = await server.call_tool(tool_name, arguments)
+            finally:
+                server.metrics.gauge_add("tool_in_flight", labels, -1)
+            handled = time.perf_counter()
+            content = build_tool_content(result, arguments.get("format", "json"), arguments.get("fields"),
+                                         response_budget(arguments))
+
+            server.metrics.observe("tool_handler_seconds", labels, handled - started)
+            server.metrics.observe("tool_serialize_seconds", labels, time.perf_counter() - handled)
+            outcome = "success" if result.get("success", True) else "error"
+            server.metrics.inc("tool_calls_total", labels + (("outcome", outcome),))
 
             return {
                 "jsonrpc": "2.0",
                 "id": request.get("id"),
                 "result": {
-                    "content": [{
-                        "type": "text",
-                        "text": json.dumps(result, ensure_ascii=False, indent=2)
-                    }]
+                    "content": content
                 }
             }
         else:
@@ -466,32 +4319,402 @@ async def handle_request(server, request):
             "error": {"code": -32601, "message": f"Method not found: {method}"}
         }
 
-async def main():
-    """メイン処理"""
-    server = ElsevierMCPServer()
-    print("Elsevier MCP Complete Server started", file=sys.stderr)
+class StdoutWriter:
+    """stdoutへのバッファ付き書き出し
 
-    # stdio での通信処理
-    while True:
+    同じイベントループ周回内に書かれたメッセージは1回のflushでまとめて送る。
+    """
+
+    def __init__(self, stream=None):
+        self.stream = stream if stream is not None else sys.stdout.buffer
+        self._flush_scheduled = False
+
+    def write(self, data: bytes):
+        self.writelines((data,))
+
+    def writelines(self, chunks):
+        self.stream.writelines(chunks)
+        if not self._flush_scheduled:
+            self._flush_scheduled = True
+            asyncio.get_running_loop().call_soon(self.flush)
+
+    def flush(self):
+        self._flush_scheduled = False
+        self.stream.flush()
+
+
+_stdout_writer = None
+
+
+async def write_message(message: dict):
+    """stdoutへJSON-RPCメッセージを1行で書き出す"""
+    global _stdout_writer
+    if _stdout_writer is None:
+        _stdout_writer = StdoutWriter()
+    _stdout_writer.writelines(encode_chunks(message) + [b"\n"])
+
+async def process_request(server, request, semaphore, notify=None):
+    """同時実行数の上限内で1リクエストを処理する（例外はJSON-RPCエラーに変換）"""
+    if not isinstance(request, dict):
+        return {"jsonrpc": "2.0", "id": None, "error": {"code": -32600, "message": "Invalid Request"}}
+    async with semaphore:
         try:
-            line = sys.stdin.readline()
-            if not line:
-                break
+            return await handle_request(server, request, notify=notify)
+        except Exception as e:
+            return {
+                "jsonrpc": "2.0",
+                "id": request.get("id"),
+                "error": {"code": -32603, "message": str(e)}
+            }
+
+async def process_message(server, message, semaphore, notify=None):
+    """単体または配列（バッチ）のメッセージを処理する（応答するものがなければNone）"""
+    if isinstance(message, list) and message:
+        responses = await asyncio.gather(*[
+            process_request(server, item, semaphore, notify=notify) for item in message
+        ])
+        return [response for response in responses if response is not None] or None
+    return await process_request(server, message, semaphore, notify=notify)
 
-            request = json.loads(line.strip())
-            response = await handle_request(server, request)
+async def dispatch_request(server, request, semaphore):
+    """1メッセージを処理し、完了次第レスポンスを書き出す"""
+    response = await process_message(server, request, semaphore, notify=write_message)
+    if response is not None:
+        await write_message(response)
 
-            print(json.dumps(response), flush=True)
+async def export_metrics_periodically(server, interval: float = METRICS_FILE_INTERVAL):
+    """ELSEVIER_MCP_METRICS_FILE へ定期的にPrometheusテキストを書き出す"""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            server.write_metrics_file()
+        except OSError as e:
+            print(f"⚠️ Failed to write metrics file: {e}", file=sys.stderr)
 
-        except EOFError:
+async def serve_stdio(server):
+    """stdioトランスポート（1行1メッセージ）"""
+    loop = asyncio.get_running_loop()
+    semaphore = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
+    pending = set()
+
+    # 各リクエストを個別タスクで並行処理
+    while True:
+        line = await loop.run_in_executor(None, sys.stdin.readline)
+        if not line:
             break
-        except Exception as e:
+        if not line.strip():
+            continue
+
+        try:
+            request = json.loads(line)
+        except ValueError as e:
             error_response = {
                 "jsonrpc": "2.0",
-                "id": request.get("id") if 'request' in locals() else None,
-                "error": {"code": -32603, "message": str(e)}
+                "id": None,
+                "error": {"code": -32700, "message": f"Parse error: {e}"}
             }
-            print(json.dumps(error_response), flush=True)
+            await write_message(error_response)
+            continue
+
+        task = asyncio.ensure_future(dispatch_request(server, request, semaphore))
+        pending.add(task)
+        task.add_done_callback(pending.discard)
+
+    # EOF後も処理中のリクエストは最後まで応答する
+    if pending:
+        await asyncio.gather(*pending)
+    if _stdout_writer is not None:
+        _stdout_writer.flush()
+
+
+class HTTPTransport:
+    """MCP Streamable HTTPトランスポート
+
+    POST /mcp でJSON-RPCメッセージ（単体または配列）を受け取り、
+    application/json で応答する。クライアントが text/event-stream を受け付け、
+    progressToken 付きの tools/call を送った場合はSSEで進捗通知とレスポンスを流す。
+    GET /metrics はPrometheus/OpenMetricsテキストを返す。
+    1プロセスで複数クライアントを受け付け、キャッシュ・接続プール・レート制限を共有する。
+    """
+
+    REASONS = {200: "OK", 202: "Accepted", 400: "Bad Request", 403: "Forbidden", 404: "Not Found",
+               405: "Method Not Allowed", 411: "Length Required", 413: "Payload Too Large",
+               500: "Internal Server Error"}
+
+    def __init__(self, server, host: str = HTTP_HOST, port: int = HTTP_PORT):
+        self.server = server
+        self.host = host
+        self.port = port
+        self.semaphore = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
+
+    async def serve(self, sock=None):
+        if sock is not None:
+            listener = await asyncio.start_server(self._handle_connection, sock=sock)
+        else:
+            listener = await asyncio.start_server(self._handle_connection, self.host, self.port)
+        address = listener.sockets[0].getsockname()
+        print(f"Streamable HTTP transport listening on http://{address[0]}:{address[1]}/mcp",
+              file=sys.stderr)
+        async with listener:
+            await listener.serve_forever()
+
+    async def _handle_connection(self, reader, writer):
+        """1接続分のリクエストを順に処理する
+
+        HTTP_IDLE_TIMEOUT 秒以内に次のリクエスト（ヘッダー・ボディ）が届かなければ接続を閉じる。
+        停止時（SIGTERMなど）に取り消された場合も接続を閉じて静かに終わる。
+        """
+        try:
+            while True:
+                request_line = await asyncio.wait_for(reader.readline(), HTTP_IDLE_TIMEOUT)
+                if not request_line.strip():
+                    break
+                method, target, version = request_line.decode("latin-1").split(" ", 2)
+                headers = {}
+                while True:
+                    line = await asyncio.wait_for(reader.readline(), HTTP_IDLE_TIMEOUT)
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+
+                keep_alive = headers.get("connection", "").lower() != "close" and "1.1" in version
+                body = await asyncio.wait_for(self._read_body(reader, headers), HTTP_IDLE_TIMEOUT)
+                if body is None:
+                    await self._respond(writer, 413, b"", "text/plain", keep_alive=False)
+                    break
+
+                keep_alive = await self._route(writer, method, urlparse(target).path, headers, body) and keep_alive
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, asyncio.TimeoutError, ConnectionError, ValueError):
+            pass
+        except asyncio.CancelledError:
+            # サーバー停止時の待機中の接続（ログにトレースバックを残さない）
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    async def _read_body(reader, headers):
+        """リクエストボディを読む（上限超過時はNone）"""
+        if headers.get("transfer-encoding", "").lower() == "chunked":
+            chunks = []
+            size = 0
+            while True:
+                chunk_size = int((await reader.readline()).split(b";")[0].strip(), 16)
+                if chunk_size == 0:
+                    await reader.readline()
+                    return b"".join(chunks)
+                size += chunk_size
+                if size > HTTP_MAX_BODY_BYTES:
+                    return None
+                chunks.append(await reader.readexactly(chunk_size))
+                await reader.readline()
+        length = int(headers.get("content-length", "0") or 0)
+        if length > HTTP_MAX_BODY_BYTES:
+            return None
+        return await reader.readexactly(length) if length else b""
+
+    async def _respond(self, writer, status: int, body, content_type: str = "application/json",
+                       keep_alive: bool = True):
+        """レスポンスを書き出す（body はバイト列または encode_chunks の断片リスト）"""
+        chunks = body if isinstance(body, list) else [body]
+        head = [
+            f"HTTP/1.1 {status} {self.REASONS.get(status, '')}",
+            f"Content-Type: {content_type}",
+            f"Content-Length: {sum(len(chunk) for chunk in chunks)}",
+            "Connection: " + ("keep-alive" if keep_alive else "close"),
+        ]
+        writer.writelines([("\r\n".join(head) + "\r\n\r\n").encode("latin-1"), *chunks])
+        await writer.drain()
+
+    @staticmethod
+    def _origin_allowed(origin: str) -> bool:
+        """DNSリバインディング対策：ローカルまたは許可済みのOriginのみ受け付ける"""
+        if not origin or origin in HTTP_ALLOWED_ORIGINS:
+            return True
+        return urlparse(origin).hostname in ("localhost", "127.0.0.1", "::1")
+
+    async def _route(self, writer, method: str, path: str, headers: dict, body: bytes) -> bool:
+        """ルーティング（接続を維持するならTrue）"""
+        if not self._origin_allowed(headers.get("origin", "")):
+            await self._respond(writer, 403, b"", "text/plain")
+            return True
+
+        if path == "/metrics" and method == "GET":
+            text = self.server.metrics.render_prometheus(self.server.metrics_extra())
+            await self._respond(writer, 200, text.encode("utf-8"), "text/plain; version=0.0.4; charset=utf-8")
+            return True
+        if path == "/health" and method == "GET":
+            await self._respond(writer, 200, b'{"status":"ok"}')
+            return True
+        if path != "/mcp":
+            await self._respond(writer, 404, b"", "text/plain")
+            return True
+        if method != "POST":
+            # サーバー発のスタンドアロンSSEストリームは提供しない
+            await self._respond(writer, 405, b"", "text/plain")
+            return True
+
+        try:
+            message = json.loads(body)
+        except ValueError as e:
+            error = {"jsonrpc": "2.0", "id": None, "error": {"code": -32700, "message": f"Parse error: {e}"}}
+            await self._respond(writer, 400, encode_message(error))
+            return True
+
+        if (isinstance(message, dict) and "text/event-stream" in headers.get("accept", "")
+                and message.get("method") == "tools/call"
+                and message.get("params", {}).get("_meta", {}).get("progressToken") is not None):
+            await self._stream(writer, message)
+            return False
+
+        result = await process_message(self.server, message, self.semaphore)
+
+        if result is None:
+            await self._respond(writer, 202, b"")
+        else:
+            await self._respond(writer, 200, encode_chunks(result))
+        return True
+
+    async def _stream(self, writer, request: dict):
+        """SSEで進捗通知を流し、最後にレスポンスを送って閉じる"""
+        writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: text/event-stream\r\n"
+                     b"Cache-Control: no-cache\r\nConnection: close\r\n\r\n")
+
+        async def send_event(message):
+            writer.writelines([b"event: message\ndata: ", *encode_chunks(message), b"\n\n"])
+            await writer.drain()
+
+        response = await process_request(self.server, request, self.semaphore, notify=send_event)
+        await send_event(response)
+
+
+def run_worker(sock, index: int):
+    """ワーカープロセス：共有ソケットでHTTPトランスポートを実行
+
+    Ctrl+C と SIGHUP は親がまとめて扱う。SIGTERM では待ち受けを止め、ストアを閉じてから終了する。
+    """
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGHUP, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+
+    async def serve():
+        server = ElsevierMCPServer(shared_state=True)
+        serving = asyncio.ensure_future(HTTPTransport(server).serve(sock=sock))
+        asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, serving.cancel)
+        try:
+            await serving
+        except asyncio.CancelledError:
+            pass
+        finally:
+            await server.aclose()
+
+    print(f"Worker {index} started (pid {os.getpid()})", file=sys.stderr)
+    asyncio.run(serve())
+
+def run_workers(args):
+    """pre-forkモード：親が待ち受けソケットを作り、N個のワーカーで共有する
+
+    レスポンスキャッシュ（SQLite WAL）とレート制限・クォータ（SharedRateLimiter）は
+    ワーカー間で共有される。メトリクスはワーカーごと。
+    """
+    if not hasattr(os, "fork"):
+        print("⚠️ --workers requires fork(); running a single process", file=sys.stderr)
+        args.workers = 1
+        asyncio.run(main(args))
+        return
+
+    sock = socket.socket(socket.AF_INET6 if ":" in args.host else socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((args.host, args.port))
+    sock.listen(512)
+    sock.setblocking(False)
+    print(f"Elsevier MCP Complete Server started with {args.workers} workers "
+          f"on http://{args.host}:{sock.getsockname()[1]}/mcp", file=sys.stderr)
+
+    import multiprocessing
+    context = multiprocessing.get_context("fork")
+    workers = {}
+
+    def spawn(index):
+        process = context.Process(target=run_worker, args=(sock, index), daemon=True)
+        process.start()
+        workers[index] = process
+
+    def stop(signum, frame):
+        raise SystemExit(0)
+
+    # systemd・docker の停止（SIGTERM）や端末の切断（SIGHUP）でもワーカーを終了させてから抜ける
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGHUP, stop)
+
+    for index in range(args.workers):
+        spawn(index)
+
+    try:
+        # 異常終了したワーカーは再起動する
+        while True:
+            time.sleep(1)
+            for index, process in list(workers.items()):
+                if not process.is_alive():
+                    print(f"⚠️ Worker {index} exited ({process.exitcode}); restarting", file=sys.stderr)
+                    spawn(index)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        signal.signal(signal.SIGTERM, signal.SIG_IGN)
+        signal.signal(signal.SIGHUP, signal.SIG_IGN)
+        for process in workers.values():
+            process.terminate()
+        for process in workers.values():
+            process.join(10)
+            if process.is_alive():
+                process.kill()
+                process.join()
+        sock.close()
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Elsevier MCP Complete Server")
+    parser.add_argument("--transport", choices=["stdio", "http"],
+                        default=os.getenv("ELSEVIER_MCP_TRANSPORT", "stdio"),
+                        help="stdio（デフォルト）または Streamable HTTP")
+    parser.add_argument("--host", default=HTTP_HOST, help="HTTPトランスポートの待ち受けアドレス")
+    parser.add_argument("--port", type=int, default=HTTP_PORT, help="HTTPトランスポートのポート")
+    parser.add_argument("--workers", type=int, default=HTTP_WORKERS,
+                        help="HTTPトランスポートのワーカープロセス数（キャッシュとクォータを共有）")
+    args = parser.parse_args(argv)
+    if args.workers > 1 and args.transport != "http":
+        parser.error("--workers requires --transport http")
+    return args
+
+async def main(args=None):
+    """メイン処理"""
+    if args is None:
+        args = parse_args()
+    server = ElsevierMCPServer()
+    print("Elsevier MCP Complete Server started", file=sys.stderr)
+
+    exporter = asyncio.ensure_future(export_metrics_periodically(server)) if METRICS_FILE else None
+    try:
+        if args.transport == "http":
+            await HTTPTransport(server, args.host, args.port).serve()
+        else:
+            await serve_stdio(server)
+    finally:
+        if exporter is not None:
+            exporter.cancel()
+            server.write_metrics_file()
+        await server.aclose()
+
+def run(argv=None):
+    """コマンドライン起動"""
+    args = parse_args(argv)
+    if args.workers > 1:
+        run_workers(args)
+    else:
+        asyncio.run(main(args))
 
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    run()
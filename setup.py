@@ -15,6 +15,7 @@ setup(
     long_description=long_description,
     long_description_content_type="text/markdown",
     url="https://github.com/yourusername/elsevier-mcp-server",
+    py_modules=["elsevier_mcp_complete"],
     packages=find_packages(),
     classifiers=[
         "Development Status :: 4 - Beta",
@@ -32,6 +33,10 @@ setup(
     ],
     python_requires=">=3.7",
     install_requires=requirements,
+    extras_require={
+        # ツール応答のJSONシリアライズを高速化（なければ標準のjsonを使用）
+        "fast": ["orjson"],
+    },
     keywords="elsevier scopus scival academic research mcp cursor ai",
     project_urls={
         "Bug Reports": "https://github.com/yourusername/elsevier-mcp-server/issues",
@@ -41,7 +46,7 @@ setup(
     },
     entry_points={
         "console_scripts": [
-            "elsevier-mcp-server=elsevier_mcp_complete:main",
+            "elsevier-mcp-server=elsevier_mcp_complete:run",
         ],
     },
 )
\ No newline at end of file
@@ -0,0 +1,66 @@
+"""
+テスト共通の設定
+=====================
+
+モックElsevier API（benchmarks/mock_elsevier_api.py）を起動し、サーバーの接続先にします。
+APIキーやネットワーク接続は不要です。キャッシュやストアはテストごとの一時ディレクトリに置きます。
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+
+from mock_elsevier_api import start_mock_server  # noqa: E402
+
+MOCK_SERVER, MOCK_API = start_mock_server(latency_ms=0, jitter_ms=0)
+os.environ.update({
+    "ELSEVIER_API_KEY": "test-key",
+    "ELSEVIER_API_BASE_URL": f"http://127.0.0.1:{MOCK_SERVER.server_port}",
+    "ELSEVIER_MCP_CACHE_DIR": tempfile.mkdtemp(prefix="elsevier-mcp-test-"),
+    "ELSEVIER_MCP_RATE_LIMITS": "scopus_search=100000,abstract_retrieval=100000,"
+                                "author_retrieval=100000,scival=100000",
+})
+
+import elsevier_mcp_complete as server_module  # noqa: E402
+
+MOCK_OPTIONS = ("latency_ms", "jitter_ms", "error_rate", "slow_rate", "slow_ms")
+
+
+@pytest.fixture(autouse=True)
+def isolated_state(tmp_path, monkeypatch):
+    """キャッシュ・ストア・エクスポート先をテストごとに分け、モックAPIの設定を戻す"""
+    monkeypatch.setattr(server_module, "CACHE_DIR", str(tmp_path))
+    monkeypatch.setattr(server_module, "EXPORT_DIR", str(tmp_path / "exports"))
+    saved = {name: getattr(MOCK_API, name) for name in MOCK_OPTIONS}
+    yield
+    for name, value in saved.items():
+        setattr(MOCK_API, name, value)
+
+
+@pytest.fixture
+def mock_api():
+    """モックAPI（遅延・エラー率の変更と request_count の参照用）"""
+    return MOCK_API
+
+
+@pytest.fixture
+def run_with_server():
+    """async def body(server) を新しい ElsevierMCPServer で実行し、終了後に閉じる"""
+    def run(body, **options):
+        async def main():
+            server = server_module.ElsevierMCPServer(**options)
+            try:
+                return await body(server)
+            finally:
+                await server.aclose()
+
+        return asyncio.run(main())
+
+    return run
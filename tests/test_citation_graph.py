@@ -0,0 +1,52 @@
+"""
+build_citation_graph のグラフストア再利用テスト
+=====================
+
+モックElsevier APIに対してクロールし、グラフストアから再構築した結果が
+新規のクロールと一致することを確認します。
+
+使い方:
+    python -m pytest tests/test_citation_graph.py
+"""
+
+SEED = "2-s2.0-85000000001"
+
+
+def crawl_twice(run_with_server, arguments: dict) -> tuple:
+    """新規のクロール（refresh）と、直後のグラフストアからのクロールの結果"""
+    async def body(server):
+        fresh = await server.build_citation_graph(dict(arguments, refresh=True))
+        stored = await server.build_citation_graph(arguments)
+        return fresh, stored
+
+    return run_with_server(body)
+
+
+def assert_same_graph(fresh: dict, stored: dict):
+    for key in ("nodes", "edges", "nodes_by_depth", "degree", "edge_list", "top_papers"):
+        assert fresh[key] == stored[key], key
+
+
+def test_store_served_crawl_matches_fresh_crawl(run_with_server):
+    fresh, stored = crawl_twice(run_with_server, {"eid": SEED, "depth": 2, "max_citing": 10,
+                                                  "max_nodes": 2000, "include_edges": True})
+    assert fresh["success"] and "errors" not in fresh
+    assert fresh["expansions"]["from_store"] == 0
+    assert stored["expansions"] == {"fetched": 0, "from_store": fresh["expansions"]["fetched"]}
+    assert_same_graph(fresh, stored)
+
+
+def test_smaller_limits_reuse_stored_expansions_in_order(run_with_server):
+    # 先に大きい上限で展開しておき、小さい上限では保存済みの先頭から同じ隣接ノードを使う
+    crawl_twice(run_with_server, {"eid": SEED, "depth": 1, "max_citing": 25, "max_references": 40})
+    fresh, stored = crawl_twice(run_with_server, {"eid": SEED, "depth": 1, "max_citing": 5,
+                                                  "max_references": 10, "include_edges": True})
+    assert stored["expansions"]["fetched"] == 0
+    assert_same_graph(fresh, stored)
+
+
+def test_node_limit_gives_the_same_graph(run_with_server):
+    fresh, stored = crawl_twice(run_with_server, {"eid": SEED, "depth": 2, "max_citing": 10,
+                                                  "max_nodes": 100, "include_edges": True})
+    assert fresh["node_limit_reached"] and stored["node_limit_reached"]
+    assert_same_graph(fresh, stored)
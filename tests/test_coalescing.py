@@ -0,0 +1,118 @@
+"""
+同一呼び出しの集約（SingleFlight）のテスト
+=====================
+
+使い方:
+    python -m pytest tests/test_coalescing.py
+"""
+
+import asyncio
+
+import pytest
+
+import elsevier_mcp_complete as server_module
+
+
+def test_single_flight_shares_one_execution():
+    async def main():
+        flight = server_module.SingleFlight()
+        calls = []
+
+        async def factory():
+            calls.append(1)
+            await asyncio.sleep(0.05)
+            return object()
+
+        results = await asyncio.gather(*[flight.do("key", factory) for _ in range(5)])
+        later = await flight.do("key", factory)
+        return calls, results, later, flight.stats
+
+    calls, results, later, stats = asyncio.run(main())
+    assert len(calls) == 2
+    assert all(result is results[0] for result in results)
+    assert later is not results[0]
+    assert stats == {"calls": 6, "executions": 2, "coalesced": 4}
+
+
+def test_single_flight_shares_errors_and_survives_a_cancelled_caller():
+    async def main():
+        flight = server_module.SingleFlight()
+
+        async def failing():
+            await asyncio.sleep(0.02)
+            raise RuntimeError("upstream failed")
+
+        outcomes = await asyncio.gather(flight.do("error", failing), flight.do("error", failing),
+                                        return_exceptions=True)
+
+        async def slow():
+            await asyncio.sleep(0.05)
+            return "done"
+
+        first = asyncio.ensure_future(flight.do("slow", slow))
+        second = asyncio.ensure_future(flight.do("slow", slow))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        return outcomes, await second
+
+    outcomes, shared = asyncio.run(main())
+    assert [str(outcome) for outcome in outcomes] == ["upstream failed", "upstream failed"]
+    assert shared == "done"
+
+
+def test_identical_tool_calls_share_one_upstream_request(run_with_server, mock_api):
+    mock_api.latency_ms = 50
+
+    async def body(server):
+        before = mock_api.request_count
+        results = await asyncio.gather(*[server.call_tool("search_papers", {"query": "graphene", "count": 5})
+                                         for _ in range(4)])
+        return results, mock_api.request_count - before, dict(server.tool_calls.stats)
+
+    results, upstream_calls, stats = run_with_server(body)
+    assert all(result is results[0] for result in results)
+    assert upstream_calls == 1
+    assert stats["coalesced"] == 3
+
+
+def test_joined_callers_each_get_progress(run_with_server, mock_api):
+    mock_api.latency_ms = 20
+
+    async def body(server):
+        received = {"a": [], "b": []}
+
+        async def call(token):
+            async def notify(message):
+                received[token].append(message["params"])
+
+            return await server_module.handle_request(server, {
+                "jsonrpc": "2.0", "id": token, "method": "tools/call",
+                "params": {"name": "compare_institutions", "_meta": {"progressToken": token},
+                           "arguments": {"institutions": ["MIT", "Stanford"], "years": [2022, 2023],
+                                         "top_papers": 0}}
+            }, notify=notify)
+
+        await asyncio.gather(call("a"), call("b"))
+        return received, dict(server.tool_calls.stats)
+
+    received, stats = run_with_server(body)
+    assert stats["coalesced"] == 1
+    for token, notifications in received.items():
+        assert notifications and all(params["progressToken"] == token for params in notifications)
+        assert notifications[-1]["progress"] == notifications[-1]["total"] == 4
+
+
+@pytest.mark.parametrize("tool", ["start_export", "job_status"])
+def test_job_tools_are_not_coalesced(run_with_server, tool):
+    async def body(server):
+        arguments = {"query": "graphene", "max_results": 5} if tool == "start_export" else {}
+        results = await asyncio.gather(*[server.call_tool(tool, arguments) for _ in range(2)])
+        for task in list(server._export_tasks.values()):
+            await task
+        return results, dict(server.tool_calls.stats)
+
+    results, stats = run_with_server(body)
+    assert stats["coalesced"] == 0
+    assert results[0] is not results[1]
+    if tool == "start_export":
+        assert results[0]["job_id"] != results[1]["job_id"]
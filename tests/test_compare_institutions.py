@@ -0,0 +1,44 @@
+"""
+compare_institutions（機関 × 年の論文数マトリクス）のテスト
+=====================
+
+使い方:
+    python -m pytest tests/test_compare_institutions.py
+"""
+
+import elsevier_mcp_complete as server_module
+
+
+def compare(run_with_server, mock_api, arguments: dict) -> tuple:
+    """(結果, 上流へのリクエスト数)"""
+    async def body(server):
+        before = mock_api.request_count
+        result = await server.compare_institutions(arguments)
+        return result, mock_api.request_count - before
+
+    return run_with_server(body)
+
+
+def test_matrix_and_top_papers(run_with_server, mock_api):
+    result, requests = compare(run_with_server, mock_api, {"institutions": ["MIT", "Stanford"],
+                                                           "years": [2020, 2022], "top_papers": 2})
+    assert result["success"]
+    assert set(result["matrix"]) == {"MIT", "Stanford"}
+    assert result["totals_by_institution"]["MIT"] == sum(result["matrix"]["MIT"].values())
+    assert [len(papers) for papers in result["top_papers"].values()] == [2, 2]
+    assert requests == 4 + 2
+
+
+def test_non_positive_top_papers_skips_the_fetch(run_with_server, mock_api):
+    for top_papers, institutions in ((0, ["MIT", "Stanford"]), (-2, ["ETH", "Oxford"])):
+        result, requests = compare(run_with_server, mock_api, {"institutions": institutions,
+                                                               "years": [2020, 2022], "top_papers": top_papers})
+        assert result["success"]
+        assert "top_papers" not in result
+        assert requests == 4
+
+
+def test_years_clause_keeps_gaps():
+    assert server_module.ElsevierMCPServer._years_clause([2020, 2021, 2022]) == \
+        "PUBYEAR > 2019 AND PUBYEAR < 2023"
+    assert server_module.ElsevierMCPServer._years_clause([2020, 2022]) == "(PUBYEAR = 2020 OR PUBYEAR = 2022)"
@@ -0,0 +1,102 @@
+"""
+バックグラウンド一括エクスポート（start_export / job_status / job_result とチェックポイント再開）のテスト
+=====================
+
+使い方:
+    python -m pytest tests/test_export_jobs.py
+"""
+
+import asyncio
+import json
+
+
+def eids(count: int, start: int = 0) -> list:
+    """モックAPIが検索結果の位置に応じて振るEID"""
+    return [f"2-s2.0-{85000000000 + position}" for position in range(start, start + count)]
+
+
+def read_lines(path: str) -> list:
+    with open(path, "rb") as f:
+        return [json.loads(line) for line in f]
+
+
+async def finish(server):
+    """実行中のエクスポートジョブの完了を待つ"""
+    while server._export_tasks:
+        await asyncio.gather(*list(server._export_tasks.values()))
+
+
+def test_export_runs_to_completion(run_with_server):
+    async def body(server):
+        started = await server.call_tool("start_export", {"query": "graphene", "max_results": 60,
+                                                          "columns": ["eid", "title", "citations"]})
+        await finish(server)
+        return (started, await server.job_status({"job_id": started["job_id"]}),
+                await server.job_result({"job_id": started["job_id"], "preview": 3}),
+                await server.job_status({}))
+
+    started, status, result, listing = run_with_server(body)
+    assert started["success"] and started["status"] == "queued"
+    assert status["status"] == "completed"
+    assert status["fetched"] == 60 and status["pages_fetched"] == 3 and status["percent"] == 100.0
+    assert result["records"] == 60 and result["bytes"] > 0
+    assert [paper["eid"] for paper in result["papers"]] == eids(3)
+    assert all(set(paper) <= {"eid", "title", "citations"} for paper in result["papers"])
+    assert [record["eid"] for record in read_lines(result["path"])] == eids(60)
+    assert [job["job_id"] for job in listing["jobs"]] == [started["job_id"]]
+
+
+def test_job_errors_are_reported(run_with_server):
+    async def body(server):
+        return (await server.start_export({}),
+                await server.start_export({"query": "graphene", "output": "csv"}),
+                await server.job_status({"job_id": "../etc/passwd"}),
+                await server.job_result({"job_id": "missing"}))
+
+    for result in run_with_server(body):
+        assert not result["success"] and result["error"]
+
+
+def test_interrupted_job_resumes_from_its_checkpoint(run_with_server, mock_api):
+    async def interrupted(server):
+        # 25件（1ページ）で止まったジョブを作り、最後のチェックポイント以降に途中まで書かれた行を残す
+        started = await server.start_export({"query": "graphene", "max_results": 25})
+        await finish(server)
+        store = server.exports
+        job = store.load(started["job_id"])
+        job.update(status="running", max_results=60, finished_at=None)
+        store.save(job)
+        with open(job["data_path"], "ab") as f:
+            f.write(b'{"eid": "2-s2.0-partial"')
+        return job
+
+    job = run_with_server(interrupted)
+    assert job["cursor"] == "25" and job["fetched"] == 25
+
+    async def resumed(server):
+        before = mock_api.request_count
+        await server.resume_exports()
+        await finish(server)
+        return (await server.job_result({"job_id": job["job_id"], "preview": 0}),
+                mock_api.request_count - before)
+
+    result, upstream_calls = run_with_server(resumed)
+    assert result["success"] and result["records"] == 60
+    assert [record["eid"] for record in read_lines(result["path"])] == eids(60)
+    # 出力済みの1ページ目は取り直さない
+    assert upstream_calls == 2
+
+
+def test_unfinished_job_has_no_result(run_with_server, mock_api):
+    mock_api.latency_ms = 200
+
+    async def body(server):
+        started = await server.start_export({"query": "graphene", "max_results": 50})
+        await asyncio.sleep(0.05)
+        result = await server.job_result({"job_id": started["job_id"]})
+        await finish(server)
+        return result
+
+    result = run_with_server(body)
+    assert not result["success"]
+    assert result["status"] in ("queued", "running")
@@ -0,0 +1,109 @@
+"""
+ヘッジ送信と適応タイムアウト（LatencyTracker / ElsevierHTTPClient._send_hedged）のテスト
+=====================
+
+使い方:
+    python -m pytest tests/test_hedging.py
+"""
+
+import asyncio
+import time
+
+import elsevier_mcp_complete as server_module
+
+FAMILY = "scopus_search"
+
+
+def prime(latency, requests: int = 100, seconds: float = 0.01):
+    """ヘッジの待ち時間と予算が決まるだけの送信数と応答時間を記録しておく"""
+    latency.record(FAMILY, "requests", requests)
+    for _ in range(server_module.LATENCY_MIN_SAMPLES):
+        latency.observe(FAMILY, seconds)
+
+
+async def connect(server):
+    """接続とセッションの初回作成を済ませ、送信の確認が遅れないようにする"""
+    await server.search_papers({"query": "warm-up", "count": 1})
+
+
+async def slow_first_search(server, mock_api, query: str):
+    """1本目だけを遅くし、送信を確認したら以降のリクエストは即時に返す"""
+    mock_api.slow_rate, mock_api.slow_ms = 1.0, 300
+    before = mock_api.request_count
+    started = time.monotonic()
+    task = asyncio.ensure_future(server.search_papers({"query": query, "count": 1}))
+    while mock_api.request_count == before:
+        await asyncio.sleep(0.005)
+    mock_api.slow_rate = 0
+    result = await task
+    return result, time.monotonic() - started, mock_api.request_count - before
+
+
+def test_hedge_delay_needs_samples_and_budget():
+    latency = server_module.LatencyTracker()
+    latency.record(FAMILY, "requests", 100)
+    assert latency.hedge_delay(FAMILY) is None
+
+    for _ in range(server_module.LATENCY_MIN_SAMPLES):
+        latency.observe(FAMILY, 0.2)
+    assert latency.hedge_delay(FAMILY) == 0.2
+
+    # 予算（送信数 × HEDGE_BUDGET）を使い切ると送らない
+    latency.record(FAMILY, "hedged", 100 * server_module.HEDGE_BUDGET)
+    assert latency.hedge_delay(FAMILY) is None
+
+
+def test_adaptive_timeout_is_bounded():
+    latency = server_module.LatencyTracker()
+    assert latency.timeout_for(FAMILY, 30) == 30
+    prime(latency)
+    assert latency.timeout_for(FAMILY, 30) == server_module.ADAPTIVE_TIMEOUT_MIN
+    for _ in range(server_module.LATENCY_MIN_SAMPLES):
+        latency.observe(FAMILY, 5.0)
+    assert latency.timeout_for(FAMILY, 30) == 15.0
+    assert latency.timeout_for(FAMILY, 10) == 10
+
+
+def test_hedge_wins_over_a_slow_first_request(run_with_server, mock_api):
+    async def body(server):
+        await connect(server)
+        prime(server.http.latency)
+        result, elapsed, upstream_calls = await slow_first_search(server, mock_api, "hedge")
+        return result, elapsed, upstream_calls, server.http.latency.snapshot()[FAMILY]
+
+    result, elapsed, upstream_calls, stats = run_with_server(body)
+    assert result["success"]
+    assert elapsed < 0.25
+    assert upstream_calls == 2
+    assert stats["hedged"] == 1 and stats["hedge_wins"] == 1
+
+
+def test_no_hedge_when_the_first_reply_beats_the_token_wait(run_with_server, mock_api):
+    async def body(server):
+        await connect(server)
+        # 1本目でトークンを使い切り、2本目は約1秒待たないと送れない
+        limiter = server.http.limiter = server_module.RateLimiter({FAMILY: (1, 1)})
+        prime(server.http.latency)
+        result, _, upstream_calls = await slow_first_search(server, mock_api, "token wait")
+        return result, upstream_calls, limiter.quota[FAMILY]["requests"], \
+            server.http.latency.snapshot()[FAMILY]
+
+    result, upstream_calls, requests, stats = run_with_server(body, shared_state=False)
+    assert result["success"]
+    assert upstream_calls == 1
+    assert requests == 1
+    assert stats["hedged"] == 0
+
+
+def test_hedging_is_off_without_budget(run_with_server, mock_api, monkeypatch):
+    monkeypatch.setattr(server_module, "HEDGE_BUDGET", 0)
+
+    async def body(server):
+        await connect(server)
+        prime(server.http.latency)
+        return await slow_first_search(server, mock_api, "no hedge")
+
+    result, elapsed, upstream_calls = run_with_server(body)
+    assert result["success"]
+    assert elapsed >= 0.3
+    assert upstream_calls == 1
@@ -0,0 +1,103 @@
+"""
+Streamable HTTPトランスポート（HTTPTransport）のテスト
+=====================
+
+使い方:
+    python -m pytest tests/test_http_transport.py
+"""
+
+import asyncio
+import json
+import socket
+
+import elsevier_mcp_complete as server_module
+
+
+async def start_transport(server):
+    """空きポートで待ち受けを始め、(serve のタスク, ポート番号) を返す"""
+    sock = socket.socket()
+    sock.bind(("127.0.0.1", 0))
+    sock.listen()
+    serving = asyncio.ensure_future(server_module.HTTPTransport(server).serve(sock=sock))
+    await asyncio.sleep(0.05)
+    return serving, sock.getsockname()[1]
+
+
+def post(body: dict) -> bytes:
+    payload = json.dumps(body).encode("utf-8")
+    return (b"POST /mcp HTTP/1.1\r\nHost: localhost\r\nContent-Type: application/json\r\n"
+            b"Content-Length: " + str(len(payload)).encode() + b"\r\n\r\n" + payload)
+
+
+async def read_response(reader) -> tuple:
+    """(ステータス行, ボディのJSON)"""
+    status = await reader.readline()
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line == b"\r\n":
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+    body = await reader.readexactly(int(headers["content-length"]))
+    return status, json.loads(body)
+
+
+def test_keep_alive_connection_serves_several_requests(run_with_server):
+    async def body(server):
+        serving, port = await start_transport(server)
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        replies = []
+        for request_id in (1, 2):
+            writer.write(post({"jsonrpc": "2.0", "id": request_id, "method": "tools/list"}))
+            replies.append(await read_response(reader))
+        writer.close()
+        serving.cancel()
+        return replies
+
+    replies = run_with_server(body)
+    assert [status.split()[1] for status, _ in replies] == [b"200", b"200"]
+    assert [reply["id"] for _, reply in replies] == [1, 2]
+
+
+def test_idle_connection_is_closed(run_with_server, monkeypatch):
+    monkeypatch.setattr(server_module, "HTTP_IDLE_TIMEOUT", 0.2)
+
+    async def body(server):
+        serving, port = await start_transport(server)
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        # リクエストを送らずに待つと、サーバー側が接続を閉じる
+        data = await asyncio.wait_for(reader.read(), 5)
+        writer.close()
+        serving.cancel()
+        return data
+
+    assert run_with_server(body) == b""
+
+
+def test_shutdown_with_idle_connections_logs_nothing(run_with_server):
+    async def body(server):
+        errors = []
+        asyncio.get_running_loop().set_exception_handler(lambda loop, context: errors.append(context))
+        serving, port = await start_transport(server)
+        connections = [await asyncio.open_connection("127.0.0.1", port) for _ in range(3)]
+        await asyncio.sleep(0.05)
+        serving.cancel()
+        try:
+            await serving
+        except asyncio.CancelledError:
+            pass
+        # 待機中の接続のタスクも取り消す（asyncio.run の終了時と同じ）
+        handlers = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+        for task in handlers:
+            task.cancel()
+        await asyncio.gather(*handlers, return_exceptions=True)
+        await asyncio.sleep(0.05)
+        closed = [await reader.read() for reader, _ in connections]
+        for _, writer in connections:
+            writer.close()
+        return errors, closed
+
+    errors, closed = run_with_server(body)
+    assert errors == []
+    assert closed == [b"", b"", b""]
@@ -0,0 +1,59 @@
+"""
+複数クエリの被引用数順マージ（merge_top_papers）と論文検索ツールのテスト
+=====================
+
+使い方:
+    python -m pytest tests/test_merged_search.py
+"""
+
+
+def citations(papers: list) -> list:
+    return [paper.citations for paper in papers]
+
+
+def test_merge_returns_a_deduplicated_citation_ranking(run_with_server):
+    async def body(server):
+        return await server.merge_top_papers(["aff(MIT) AND PUBYEAR = 2023", "aff(MIT) AND PUBYEAR = 2024"], 60)
+
+    merged = run_with_server(body)
+    entries = merged["entries"]
+    counts = [int(entry["citedby-count"]) for entry in entries]
+    assert len(entries) == 60
+    assert counts == sorted(counts, reverse=True)
+    assert len({entry["eid"] for entry in entries}) == 60
+    # モックはどのクエリにも同じ論文を返すため、2本目のクエリの結果はすべて重複になる
+    assert merged["stats"]["duplicates"] >= 59
+    assert not merged["errors"]
+
+
+def test_single_and_merged_paths_return_the_same_record_shape(run_with_server):
+    async def body(server):
+        return (
+            await server.get_institution_papers({"institution": "MIT", "year": 2023, "count": 5}),
+            await server.get_institution_papers({"institution": ["MIT", "Stanford"], "year": 2023, "count": 5}),
+            await server.search_open_access_papers({"field": "graphene", "year": 2023, "count": 5}),
+            await server.search_open_access_papers({"field": ["graphene", "perovskite"], "year": 2023,
+                                                    "count": 5}),
+        )
+
+    single, merged, single_open, merged_open = run_with_server(body)
+    for result in (single, merged, single_open, merged_open):
+        assert result["success"]
+    assert [paper.to_dict().keys() for paper in single["top_papers"]] == \
+        [paper.to_dict().keys() for paper in merged["top_papers"]]
+    assert [paper.to_dict().keys() for paper in single_open["papers"]] == \
+        [paper.to_dict().keys() for paper in merged_open["papers"]]
+    assert all(paper.eid and paper.year for paper in single["top_papers"] + single_open["papers"])
+    assert all(paper.open_access for paper in single_open["papers"] + merged_open["papers"])
+    assert set(merged["total_papers_by_institution"]) == {"MIT", "Stanford"}
+    assert citations(merged["top_papers"]) == sorted(citations(merged["top_papers"]), reverse=True)
+
+
+def test_counts_above_one_page_are_merged(run_with_server):
+    async def body(server):
+        return await server.get_institution_papers({"institution": "MIT", "year": 2023, "count": 40})
+
+    result = run_with_server(body)
+    assert len(result["top_papers"]) == 40
+    assert citations(result["top_papers"]) == sorted(citations(result["top_papers"]), reverse=True)
+    assert result["merge"]["duplicates"] == 0
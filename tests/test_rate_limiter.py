@@ -0,0 +1,129 @@
+"""
+レート制限・クォータ管理・再試行（RateLimiter / SharedRateLimiter）のテスト
+=====================
+
+使い方:
+    python -m pytest tests/test_rate_limiter.py
+"""
+
+import asyncio
+import time
+
+import pytest
+
+import elsevier_mcp_complete as server_module
+
+FAMILY = "scopus_search"
+
+
+def test_token_bucket_allows_a_burst_then_paces():
+    async def main():
+        bucket = server_module.TokenBucket(rate=20, burst=2)
+        started = time.monotonic()
+        for _ in range(2):
+            await bucket.acquire()
+        burst = time.monotonic() - started
+        for _ in range(2):
+            await bucket.acquire()
+        return burst, time.monotonic() - started
+
+    burst, total = asyncio.run(main())
+    assert burst < 0.03
+    assert 0.08 <= total < 0.5
+
+
+def test_released_token_is_reused_without_waiting():
+    async def main():
+        limiter = server_module.RateLimiter({FAMILY: (0.01, 1)})
+        await limiter.acquire(FAMILY)
+        limiter.release(FAMILY)
+        started = time.monotonic()
+        await limiter.acquire(FAMILY)
+        return time.monotonic() - started, limiter.quota[FAMILY]["requests"]
+
+    waited, requests = asyncio.run(main())
+    assert waited < 0.05
+    assert requests == 1
+
+
+def test_exhausted_quota_blocks_until_reset():
+    async def main():
+        limiter = server_module.RateLimiter({FAMILY: (100, 10)})
+        limiter.update(FAMILY, server_module.APIResponse(429, {
+            "X-RateLimit-Limit": "20000", "X-RateLimit-Remaining": "0",
+            "X-RateLimit-Reset": str(int(time.time()) + 3600)}))
+        with pytest.raises(server_module.QuotaExhaustedError):
+            await limiter.acquire(FAMILY)
+        # リセット時刻を過ぎれば再び送信できる
+        limiter.quota[FAMILY]["reset_at"] = int(time.time()) - 1
+        await limiter.acquire(FAMILY)
+        return limiter.snapshot()[FAMILY]
+
+    snapshot = asyncio.run(main())
+    assert snapshot["throttled"] == 1
+    assert snapshot["limit"] == 20000
+
+
+def test_backoff_prefers_retry_after_and_is_capped():
+    backoff = server_module.RateLimiter.backoff_delay
+    assert backoff(0, server_module.APIResponse(429, {"Retry-After": "2"})) == 2.0
+    assert backoff(0, server_module.APIResponse(429, {"Retry-After": "99999"})) == server_module.RETRY_MAX_DELAY
+    for attempt in range(4):
+        delay = backoff(attempt, server_module.APIResponse(503, {}))
+        ceiling = min(server_module.RETRY_MAX_DELAY, server_module.RETRY_BASE_DELAY * 2 ** attempt)
+        assert ceiling / 2 <= delay <= ceiling
+    assert backoff(20, server_module.APIResponse(503, {})) <= server_module.RETRY_MAX_DELAY
+
+
+def test_shared_limiter_spans_instances(tmp_path):
+    async def main():
+        path = str(tmp_path / "ratelimit.sqlite3")
+        first = server_module.SharedRateLimiter(path, {FAMILY: (5, 2)})
+        second = server_module.SharedRateLimiter(path, {FAMILY: (5, 2)})
+        try:
+            await first.acquire(FAMILY)
+            await first.acquire(FAMILY)
+            # もう一方のプロセス（インスタンス）も同じバケットから取る
+            started = time.monotonic()
+            await second.acquire(FAMILY)
+            waited = time.monotonic() - started
+
+            first.update(FAMILY, server_module.APIResponse(200, {
+                "X-RateLimit-Limit": "20000", "X-RateLimit-Remaining": "0",
+                "X-RateLimit-Reset": str(int(time.time()) + 3600)}))
+            await asyncio.sleep(0.1)
+            with pytest.raises(server_module.QuotaExhaustedError):
+                await second.acquire(FAMILY)
+            return waited, second.snapshot()[FAMILY]
+        finally:
+            first.close()
+            second.close()
+
+    waited, snapshot = asyncio.run(main())
+    assert waited >= 0.1
+    assert snapshot["remaining"] == 0 and snapshot["shared"] is True
+
+
+def test_failing_upstream_is_retried_then_reported(run_with_server, mock_api, monkeypatch):
+    monkeypatch.setattr(server_module, "RETRY_BASE_DELAY", 0.001)
+    mock_api.error_rate = 1.0
+
+    async def body(server):
+        before = mock_api.request_count
+        result = await server.search_papers({"query": "retry", "count": 1})
+        return result, mock_api.request_count - before
+
+    result, upstream_calls = run_with_server(body)
+    assert not result["success"]
+    assert result["error"].startswith("API Error")
+    assert upstream_calls == server_module.MAX_RETRIES + 1
+
+
+def test_quota_headers_are_tracked(run_with_server):
+    async def body(server):
+        await server.search_papers({"query": "quota", "count": 1})
+        return await server.get_api_quota({})
+
+    quota = run_with_server(body)
+    assert quota["success"]
+    assert quota["quota"][FAMILY]["remaining"] == 19999
@@ -0,0 +1,115 @@
+"""
+MCPリソース（resources/list・resources/read と ResourceStore）のテスト
+=====================
+
+使い方:
+    python -m pytest tests/test_resources.py
+"""
+
+import asyncio
+import json
+import os
+
+import elsevier_mcp_complete as server_module
+
+EID = "2-s2.0-85000000001"
+
+
+async def request(server, method: str, params: dict = None) -> dict:
+    """JSON-RPCリクエストを処理し、送信されるJSONとして読み直した応答を返す"""
+    response = await server_module.handle_request(server, {"jsonrpc": "2.0", "id": 1, "method": method,
+                                                           "params": params or {}})
+    return json.loads(server_module.encode_message(response))
+
+
+async def settle(server):
+    """バックグラウンドのストア書き込みを待つ"""
+    while server._background:
+        await asyncio.gather(*list(server._background), return_exceptions=True)
+
+
+def test_fetched_abstract_is_read_from_the_store(run_with_server, mock_api):
+    async def body(server):
+        fetched = await server.get_paper_abstract({"eid": EID})
+        await settle(server)
+        listed = await request(server, "resources/list")
+        before = mock_api.request_count
+        read = await request(server, "resources/read", {"uri": f"elsevier://abstract/{EID}"})
+        return fetched, listed, read, mock_api.request_count - before
+
+    fetched, listed, read, upstream_calls = run_with_server(body)
+    assert f"elsevier://abstract/{EID}" in [item["uri"] for item in listed["result"]["resources"]]
+    content = read["result"]["contents"][0]
+    assert content["uri"] == f"elsevier://abstract/{EID}"
+    assert json.loads(content["text"]) == json.loads(json.dumps(fetched["paper"],
+                                                                 default=server_module.json_default))
+    assert upstream_calls == 0
+
+
+def test_search_results_are_published_as_papers(run_with_server):
+    async def body(server):
+        await server.search_papers({"query": "graphene", "count": 3})
+        await settle(server)
+        return await request(server, "resources/list")
+
+    uris = [item["uri"] for item in run_with_server(body)["result"]["resources"]]
+    assert len(uris) == 3 and all(uri.startswith("elsevier://paper/") for uri in uris)
+
+
+def test_placeholder_abstract_is_not_published_as_an_abstract(run_with_server):
+    async def body(server):
+        server._index_papers([
+            server_module.PaperRecord(title="Without abstract", abstract="No abstract", eid="2-s2.0-1"),
+            server_module.PaperRecord(title="With abstract", abstract="Text", eid="2-s2.0-2"),
+        ])
+        await settle(server)
+        return await request(server, "resources/list")
+
+    uris = [item["uri"] for item in run_with_server(body)["result"]["resources"]]
+    assert uris == ["elsevier://paper/2-s2.0-1", "elsevier://abstract/2-s2.0-2"]
+
+
+def test_unknown_abstract_is_fetched_on_first_read(run_with_server):
+    async def body(server):
+        return (await request(server, "resources/read", {"uri": f"elsevier://abstract/{EID}"}),
+                await request(server, "resources/read", {"uri": "https://example.com/"}))
+
+    fetched, invalid = run_with_server(body)
+    assert json.loads(fetched["result"]["contents"][0]["text"])["eid"] == EID
+    assert invalid["error"]["code"] == -32002
+
+
+def test_list_is_paginated_with_a_cursor(run_with_server, monkeypatch):
+    monkeypatch.setattr(server_module, "RESOURCE_PAGE_SIZE", 4)
+
+    async def body(server):
+        await server.search_papers({"query": "graphene", "count": 10})
+        await settle(server)
+        pages = [await request(server, "resources/list")]
+        while "nextCursor" in pages[-1]["result"]:
+            pages.append(await request(server, "resources/list", {"cursor": pages[-1]["result"]["nextCursor"]}))
+        invalid = await request(server, "resources/list", {"cursor": "x"})
+        return pages, invalid
+
+    pages, invalid = run_with_server(body)
+    assert [len(page["result"]["resources"]) for page in pages] == [4, 4, 2]
+    uris = [item["uri"] for page in pages for item in page["result"]["resources"]]
+    assert len(set(uris)) == 10
+    assert invalid["error"]["code"] == -32602
+
+
+def test_store_reads_views_and_skips_unchanged_records(tmp_path):
+    store = server_module.ResourceStore(str(tmp_path))
+    store.put([("elsevier://paper/a", "a", {"title": "A"})])
+    size = os.path.getsize(tmp_path / "resources.dat")
+    store.put([("elsevier://paper/a", "a", {"title": "A"})])
+    assert os.path.getsize(tmp_path / "resources.dat") == size
+
+    view = store.read("elsevier://paper/a")
+    assert isinstance(view, memoryview)
+    # 追記後の読み出しで張り直しても、先に返したビューは有効なまま
+    store.put([("elsevier://paper/b", "b", {"title": "B" * 10000})])
+    assert json.loads(json.loads(bytes(store.read("elsevier://paper/b"))))["title"] == "B" * 10000
+    assert json.loads(json.loads(bytes(view))) == {"title": "A"}
+    assert store.read("elsevier://paper/missing") is None
+    store.close()
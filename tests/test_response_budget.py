@@ -0,0 +1,83 @@
+"""
+fields / max_bytes / max_tokens（出力の絞り込みとサイズ上限）のテスト
+=====================
+
+使い方:
+    python -m pytest tests/test_response_budget.py
+"""
+
+import json
+
+import elsevier_mcp_complete as server_module
+
+EIDS = [f"2-s2.0-8500000000{number}" for number in range(5)]
+
+
+def call_tool(run_with_server, name: str, arguments: dict) -> tuple:
+    """tools/call の出力（連結したテキスト、そのバイト数、先頭のJSON）"""
+    async def body(server):
+        return await server_module.handle_request(server, {
+            "jsonrpc": "2.0", "id": 1, "method": "tools/call", "params": {"name": name, "arguments": arguments}
+        })
+
+    response = run_with_server(body)
+    texts = [item["text"] for item in response["result"]["content"]]
+    return "".join(texts), len("".join(texts).encode("utf-8")), json.loads(texts[0])
+
+
+def test_single_record_fits_the_budget(run_with_server):
+    text, size, result = call_tool(run_with_server, "get_paper_abstract",
+                                   {"eid": EIDS[1], "max_bytes": 400})
+    assert size <= 400
+    assert result["paper"]["eid"] == EIDS[1]
+    assert "authors" in result["truncated"]["dropped_fields"]
+    assert "exceeded" not in result["truncated"]
+
+
+def test_tight_batch_budget_cuts_abstracts_before_dropping_results(run_with_server):
+    text, size, result = call_tool(run_with_server, "get_paper_abstracts_batch",
+                                   {"ids": EIDS, "max_tokens": 200})
+    assert size <= 200 * server_module.BYTES_PER_TOKEN
+    assert result["results"]
+    assert result["truncated"]["abstract_chars"] == 0
+    assert "abstract" not in result["results"][0]["paper"]
+
+
+def test_list_items_are_dropped_last(run_with_server):
+    text, size, result = call_tool(run_with_server, "search_papers",
+                                   {"query": "graphene", "count": 25, "max_bytes": 1500})
+    assert size <= 1500
+    assert 0 < len(result["papers"]) < 25
+    assert result["truncated"]["omitted_items"] == 25 - len(result["papers"])
+
+
+def test_unmeetable_budget_is_reported():
+    result = {"success": True, "summary": "x" * 1000}
+    content = server_module.build_tool_content(result, max_bytes=256)
+    output = json.loads(content[0]["text"])
+    assert output["truncated"]["exceeded"] is True
+    assert output["truncated"]["bytes"] == len(content[0]["text"].encode("utf-8"))
+
+
+def test_fields_narrow_papers(run_with_server):
+    text, size, result = call_tool(run_with_server, "search_papers",
+                                   {"query": "graphene", "count": 3, "fields": ["title", "year"]})
+    assert result["papers"] and all(set(paper) == {"title", "year"} for paper in result["papers"])
+    assert "ignored_fields" not in result
+
+
+def test_unknown_fields_are_ignored_with_a_warning(run_with_server):
+    text, size, result = call_tool(run_with_server, "search_papers",
+                                   {"query": "graphene", "count": 3, "fields": ["title", "bogus"]})
+    assert result["ignored_fields"] == ["bogus"]
+    assert all(set(paper) == {"title"} for paper in result["papers"])
+
+    text, size, result = call_tool(run_with_server, "search_papers",
+                                   {"query": "graphene", "count": 3, "fields": ["bogus"]})
+    assert result["ignored_fields"] == ["bogus"]
+    assert all(paper.get("title") for paper in result["papers"])
+
+    text, size, result = call_tool(run_with_server, "get_author_info",
+                                   {"author_id": "57215842016", "fields": ["name", "bogus"]})
+    assert set(result["author"]) == {"name"}
+    assert result["ignored_fields"] == ["bogus"]
@@ -0,0 +1,98 @@
+"""
+2段レスポンスキャッシュ（ResponseCache）のテスト
+=====================
+
+使い方:
+    python -m pytest tests/test_response_cache.py
+"""
+
+import threading
+import time
+
+import elsevier_mcp_complete as server_module
+
+URL = "https://api.elsevier.com/content/search/scopus"
+
+
+def test_memory_hit_and_disk_promotion(tmp_path):
+    path = str(tmp_path / "responses.sqlite3")
+    cache = server_module.ResponseCache(path=path)
+    key = cache.make_key(URL, {"query": "x", "count": 1})
+    assert key == cache.make_key(URL + "/", {"count": "1", "query": "x"})
+    cache.put(key, {"value": 1}, 60)
+    assert cache.get_memory(key) == {"value": 1}
+    cache.close()
+
+    # 再起動後はディスク層から読み、メモリ層へ昇格する
+    reopened = server_module.ResponseCache(path=path)
+    assert reopened.get_memory(key) is None
+    assert reopened.get_disk(key) == {"value": 1}
+    assert reopened.get_memory(key) == {"value": 1}
+    stats = reopened.snapshot()
+    assert (stats["memory_hits"], stats["disk_hits"]) == (1, 1)
+    reopened.close()
+
+
+def test_expired_entries_are_misses(tmp_path):
+    cache = server_module.ResponseCache(path=str(tmp_path / "responses.sqlite3"))
+    cache.put("key", {"value": 1}, -1)
+    assert cache.get_memory("key") is None
+    assert cache.get_disk("key") is None
+    assert cache.snapshot()["misses"] == 1
+    cache.close()
+
+
+def test_lru_eviction_in_both_tiers(tmp_path):
+    cache = server_module.ResponseCache(path=str(tmp_path / "responses.sqlite3"), memory_entries=2,
+                                        disk_entries=50)
+    for number in range(3):
+        cache.put(f"key{number}", number, 60)
+    assert cache.get_memory("key0") is None
+    assert cache.get_memory("key2") == 2
+    # ディスク層の整理は100件の書き込みごと
+    for number in range(3, 100):
+        cache.put(f"key{number}", number, 60)
+    assert cache.get_disk("key0") is None
+    assert cache.get_disk("key99") == 99
+    assert cache.snapshot()["evictions"] >= 50
+    cache.close()
+
+
+def test_memory_tier_does_not_wait_for_the_disk_tier(tmp_path):
+    cache = server_module.ResponseCache(path=str(tmp_path / "responses.sqlite3"))
+    cache.put("key", {"value": 1}, 60)
+    # ディスク層が遅い（DBのロック待ちなど）間もメモリ層はすぐ返る
+    held = threading.Event()
+    release = threading.Event()
+
+    def slow_disk():
+        with cache._disk_lock:
+            held.set()
+            release.wait(5)
+
+    thread = threading.Thread(target=slow_disk)
+    thread.start()
+    held.wait(5)
+    try:
+        started = time.perf_counter()
+        assert cache.get_memory("key") == {"value": 1}
+        assert cache.snapshot()["memory_hits"] == 1
+        assert time.perf_counter() - started < 0.5
+    finally:
+        release.set()
+        thread.join()
+    cache.close()
+
+
+def test_repeated_tool_call_is_served_from_cache(run_with_server, mock_api):
+    async def body(server):
+        first = await server.search_papers({"query": "graphene", "count": 5})
+        before = mock_api.request_count
+        second = await server.search_papers({"query": "graphene", "count": 5})
+        return first, second, mock_api.request_count - before, server.http.cache.snapshot()
+
+    first, second, upstream_calls, stats = run_with_server(body)
+    assert first["success"] and second["success"]
+    assert [paper.to_dict() for paper in first["papers"]] == [paper.to_dict() for paper in second["papers"]]
+    assert upstream_calls == 0
+    assert stats["memory_hits"] >= 1